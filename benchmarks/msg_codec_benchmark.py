@@ -0,0 +1,57 @@
+"""
+Compares MsgCodec with pydantic model_dump_json / model_validate_json on a synthetic multimodal conversation.
+
+Run: python benchmarks/msg_codec_benchmark.py
+"""
+
+import os
+import timeit
+
+from google.genai import types
+
+from llmbrix.codec import MsgCodec
+from llmbrix.msg import BaseMsg, ModelMsg, ToolMsg, UserMsg, UserMsgFileTypes
+
+N_TURNS = 50
+N_REPEATS = 20
+
+
+def make_conversation() -> list[BaseMsg]:
+    messages = []
+    for i in range(N_TURNS):
+        files = [(os.urandom(200_000), UserMsgFileTypes.IMAGE_PNG)] if i % 5 == 0 else None
+        messages.append(UserMsg(text=f"Question number {i}, please answer in detail." * 3, files=files))
+        call = types.FunctionCall(name="search", args={"query": f"query {i}"})
+        messages.append(ModelMsg(parts=[types.Part(function_call=call)]))
+        messages.append(ToolMsg(tool_call=call, result={"results": [f"result {j}" for j in range(10)]}))
+        messages.append(ModelMsg.from_text(f"Answer number {i}. " * 50))
+    return messages
+
+
+def main():
+    messages = make_conversation()
+
+    pydantic_dumped = [m.model_dump_json(exclude_none=True) for m in messages]
+    codec_dumped = MsgCodec.dumps(messages)
+    pydantic_size = sum(len(d) for d in pydantic_dumped)
+    print(f"Messages: {len(messages)}")
+    print(f"Size    pydantic: {pydantic_size / 1e6:8.2f} MB   codec: {len(codec_dumped) / 1e6:8.2f} MB")
+
+    dump_pydantic = timeit.timeit(lambda: [m.model_dump_json(exclude_none=True) for m in messages], number=N_REPEATS)
+    dump_codec = timeit.timeit(lambda: MsgCodec.dumps(messages), number=N_REPEATS)
+    print(
+        f"Encode  pydantic: {dump_pydantic / N_REPEATS * 1e3:8.2f} ms   codec: {dump_codec / N_REPEATS * 1e3:8.2f} ms"
+    )
+
+    content_dumped = [m.model_dump_json(include={"role", "parts"}, exclude_none=True) for m in messages]
+    load_pydantic = timeit.timeit(
+        lambda: [types.Content.model_validate_json(d) for d in content_dumped], number=N_REPEATS
+    )
+    load_codec = timeit.timeit(lambda: MsgCodec.loads(codec_dumped), number=N_REPEATS)
+    print(
+        f"Decode  pydantic: {load_pydantic / N_REPEATS * 1e3:8.2f} ms   codec: {load_codec / N_REPEATS * 1e3:8.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
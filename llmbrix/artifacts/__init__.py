@@ -0,0 +1,5 @@
+from .artifact_ref import ArtifactRef
+from .artifact_store import ArtifactStore
+from .in_memory_artifact_store import InMemoryArtifactStore
+from .mmap_artifact_store import MmapArtifactStore
+from .temp_dir_artifact_store import TempDirArtifactStore
@@ -0,0 +1,37 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+if TYPE_CHECKING:
+    from llmbrix.artifacts.artifact_store import ArtifactStore
+
+
+@dataclass(frozen=True)
+class ArtifactRef:
+    """
+    Lightweight reference to an artifact kept in an ArtifactStore.
+    Holds no artifact data => can be passed around (ToolOutput, ToolMsg, UI layer) without keeping payloads alive.
+    """
+
+    key: str
+    nbytes: int
+    mime_type: str
+    pickled: bool = False  # True if artifact is a Python object serialized by pickle, False for raw bytes
+    store: "ArtifactStore" = field(default=None, compare=False, repr=False)
+
+    def get(self) -> Any:
+        """
+        Returns: Artifact value (bytes or the original Python object).
+        """
+        return self.store.get(self)
+
+    def view(self) -> memoryview:
+        """
+        Returns: Read-only view of stored bytes (serialized artifact).
+        """
+        return self.store.view(self)
+
+    def open(self) -> BinaryIO:
+        """
+        Returns: Binary stream over stored bytes, useful for streaming artifacts to clients.
+        """
+        return self.store.open(self)
@@ -0,0 +1,125 @@
+import io
+import logging
+import pickle
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Optional
+
+from llmbrix.artifacts.artifact_ref import ArtifactRef
+
+logger = logging.getLogger(__name__)
+
+RAW_MIME_TYPE = "application/octet-stream"
+PICKLE_MIME_TYPE = "application/x-python-pickle"
+
+
+class ArtifactStore(ABC):
+    """
+    Storage of tool artifacts (outputs not visible to LLM, e.g. generated plots) outside of ToolOutput objects.
+
+    Tools (or ToolExecutor) write artifacts via put() and pass around ArtifactRef objects instead of payloads.
+    Bytes are stored as they are, other values are pickled.
+    Implementations only handle storage of bytes under a key, see _write(), _read() and _delete().
+    """
+
+    def put(self, value: Any, mime_type: Optional[str] = None) -> ArtifactRef:
+        """
+        Store an artifact.
+
+        Args:
+            value: bytes-like object or any picklable Python object.
+            mime_type: MIME type of bytes value (e.g. "image/png"), used by clients streaming the artifact.
+
+        Returns: Reference to the stored artifact.
+        """
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            data, pickled = value, False
+        else:
+            data, pickled = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), True
+        key = uuid.uuid4().hex
+        self._write(key, data)
+        return ArtifactRef(
+            key=key,
+            nbytes=memoryview(data).nbytes,
+            mime_type=PICKLE_MIME_TYPE if pickled else mime_type or RAW_MIME_TYPE,
+            pickled=pickled,
+            store=self,
+        )
+
+    def offload(self, artifacts: dict[str, Any]) -> dict[str, ArtifactRef]:
+        """
+        Move artifacts dict (e.g. ToolOutput.artifacts) into the store.
+
+        Args:
+            artifacts: Artifact name => value, values which are already ArtifactRef are kept.
+
+        Returns: Artifact name => reference.
+        """
+        return {name: v if isinstance(v, ArtifactRef) else self.put(v) for name, v in artifacts.items()}
+
+    def get(self, ref: ArtifactRef) -> Any:
+        """
+        Args:
+            ref: Reference returned by put().
+
+        Returns: Stored value, bytes for artifacts stored as bytes.
+
+        Raises: KeyError if artifact was evicted or deleted.
+        """
+        view = self.view(ref)
+        return pickle.loads(view) if ref.pickled else view.tobytes()
+
+    def view(self, ref: ArtifactRef) -> memoryview:
+        """
+        Args:
+            ref: Reference returned by put().
+
+        Returns: Read-only view of stored bytes.
+
+        Raises: KeyError if artifact was evicted or deleted.
+        """
+        data = self._read(ref.key)
+        if data is None:
+            raise KeyError(f"Artifact {ref.key} is not available (evicted or deleted).")
+        return memoryview(data).toreadonly()
+
+    def open(self, ref: ArtifactRef) -> BinaryIO:
+        """
+        Args:
+            ref: Reference returned by put().
+
+        Returns: Binary stream over stored bytes.
+
+        Raises: KeyError if artifact was evicted or deleted.
+        """
+        return io.BytesIO(self.view(ref))
+
+    def delete(self, ref: ArtifactRef):
+        """
+        Remove artifact from the store (no-op if it is not stored).
+
+        Args:
+            ref: Reference returned by put().
+        """
+        self._delete(ref.key)
+
+    @abstractmethod
+    def _write(self, key: str, data: bytes | bytearray | memoryview):
+        """
+        Store bytes under a new key.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _read(self, key: str) -> Optional[bytes | memoryview]:
+        """
+        Returns: Stored bytes, None if key is not stored.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _delete(self, key: str):
+        """
+        Remove stored bytes, no-op if key is not stored.
+        """
+        raise NotImplementedError()
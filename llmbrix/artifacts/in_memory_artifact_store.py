@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from llmbrix.artifacts.artifact_store import ArtifactStore
+
+
+class InMemoryArtifactStore(ArtifactStore):
+    """
+    Artifacts kept in process memory, bounded by total size.
+    Least recently used artifacts are evicted first, references to evicted artifacts raise KeyError on access.
+    Thread safe.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Maximum total size of stored artifacts.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _write(self, key: str, data: bytes | bytearray | memoryview):
+        data = bytes(data)
+        with self._lock:
+            self._data[key] = data
+            self.nbytes += len(data)
+            while self.nbytes > self.max_bytes and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._data.get(key)
+            if data is not None:
+                self._data.move_to_end(key)
+            return data
+
+    def _delete(self, key: str):
+        with self._lock:
+            data = self._data.pop(key, None)
+            if data is not None:
+                self.nbytes -= len(data)
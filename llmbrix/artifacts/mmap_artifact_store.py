@@ -0,0 +1,22 @@
+import mmap
+from typing import Optional
+
+from llmbrix.artifacts.temp_dir_artifact_store import TempDirArtifactStore
+
+
+class MmapArtifactStore(TempDirArtifactStore):
+    """
+    File-backed artifact store with memory-mapped reads.
+    view() is backed by the OS page cache instead of process heap => large artifacts are not copied into memory
+    when read (e.g. when sliced into chunks for streaming).
+    """
+
+    def _read(self, key: str) -> Optional[bytes | memoryview]:
+        try:
+            with open(self._path(key), "rb") as f:
+                if f.seek(0, 2) == 0:
+                    return b""
+                # mapping stays valid after the file is closed (or even deleted), it is released with the view
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import BinaryIO, Optional
+
+from llmbrix.artifacts.artifact_ref import ArtifactRef
+from llmbrix.artifacts.artifact_store import ArtifactStore
+
+
+class TempDirArtifactStore(ArtifactStore):
+    """
+    Artifacts stored as files in a directory => memory of the process stays flat regardless of artifact sizes.
+    open() streams the file directly.
+
+    If no directory is given a temporary one is created and removed together with the store.
+    Optionally bounded by total size, oldest artifacts are deleted first.
+    Thread safe.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            directory: Directory for artifact files. None => new temporary directory owned by the store.
+            max_bytes: Maximum total size of stored artifacts, None => unbounded.
+        """
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="llmbrix-artifacts-")
+            self._finalizer = weakref.finalize(self, shutil.rmtree, directory, ignore_errors=True)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, ref: ArtifactRef) -> BinaryIO:
+        """
+        Args:
+            ref: Reference returned by put().
+
+        Returns: File opened for binary reading.
+
+        Raises: KeyError if artifact was evicted or deleted.
+        """
+        try:
+            return open(self._path(ref.key), "rb")
+        except FileNotFoundError:
+            raise KeyError(f"Artifact {ref.key} is not available (evicted or deleted).") from None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _write(self, key: str, data: bytes | bytearray | memoryview):
+        with open(self._path(key), "wb") as f:
+            f.write(data)
+        evicted = []
+        with self._lock:
+            self._sizes[key] = memoryview(data).nbytes
+            self.nbytes += self._sizes[key]
+            while self.max_bytes is not None and self.nbytes > self.max_bytes and len(self._sizes) > 1:
+                evicted_key, size = self._sizes.popitem(last=False)
+                self.nbytes -= size
+                evicted.append(evicted_key)
+        for evicted_key in evicted:
+            self._remove_file(evicted_key)
+
+    def _read(self, key: str) -> Optional[bytes | memoryview]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _delete(self, key: str):
+        with self._lock:
+            size = self._sizes.pop(key, None)
+            if size is None:
+                return
+            self.nbytes -= size
+        self._remove_file(key)
+
+    def _remove_file(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,3 @@
+from .attachment_aging_policy import AttachmentAgingPolicy
+from .attachment_manager import AttachmentManager
+from .uploaded_file import UploadedFile
@@ -0,0 +1,105 @@
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from google.genai import types
+
+from llmbrix.attachments.attachment_manager import AttachmentManager
+from llmbrix.msg.media_handle import MediaHandle
+
+logger = logging.getLogger(__name__)
+
+_SHARED_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="attachment_aging")
+
+
+class AttachmentAgingPolicy:
+    """
+    Replaces heavy attachments (images, files, videos) of old user messages in chat history by compact
+    placeholders => size and latency of requests stay bounded as conversation grows.
+
+    Attachment of a message older than max_age_turns is replaced by (first available option):
+        1. text summary produced by summarizer
+        2. Files API reference (inline data uploaded via attachment manager, URI parts are kept)
+        3. short "attachment omitted" marker
+
+    Original inline payloads can be archived to temporary files (off-heap), see ChatHistory.archived_attachments().
+    Aging (uploads, summarizer calls, spills) runs in background on the executor, never on the request path.
+    """
+
+    def __init__(
+        self,
+        max_age_turns: int = 2,
+        min_size: int = 0,
+        summarizer: Optional[Callable[[types.Part], str]] = None,
+        attachment_manager: Optional[AttachmentManager] = None,
+        archive_originals: bool = False,
+        archive_dir: Optional[str] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Args:
+            max_age_turns: Number of most recent conversation turns whose attachments are kept intact.
+            min_size: Inline attachments smaller than this number of bytes are kept.
+            summarizer: Optional function producing short text description of an attachment part.
+            attachment_manager: Optional manager uploading inline attachments to Files API.
+            archive_originals: If True inline payloads of replaced attachments are spilled to temporary files.
+            archive_dir: Directory for archived payloads, defaults to system temp dir.
+            executor: Executor running aging in background, defaults to executor shared by all policies.
+        """
+        self.max_age_turns = max_age_turns
+        self.min_size = min_size
+        self.summarizer = summarizer
+        self.attachment_manager = attachment_manager
+        self.archive_originals = archive_originals
+        self.archive_dir = archive_dir
+        self.executor = executor or _SHARED_EXECUTOR
+
+    def age(self, parts: list[types.Part]) -> tuple[list[types.Part], list[MediaHandle]]:
+        """
+        Replace heavy attachment parts by placeholders.
+
+        Args:
+            parts: Parts of an old user message.
+
+        Returns: Tuple (new parts, archived original payloads).
+        """
+        new_parts, archived = [], []
+        for part in parts:
+            if not self._is_heavy(part):
+                new_parts.append(part)
+                continue
+            new_parts.append(self._placeholder(part))
+            if self.archive_originals and part.inline_data:
+                handle = MediaHandle(part.inline_data.data, part.inline_data.mime_type or "application/octet-stream")
+                handle.spill(directory=self.archive_dir)
+                archived.append(handle)
+        return new_parts, archived
+
+    def _is_heavy(self, part: types.Part) -> bool:
+        if part.inline_data and part.inline_data.data:
+            return len(part.inline_data.data) >= self.min_size
+        return part.file_data is not None
+
+    def _placeholder(self, part: types.Part) -> types.Part:
+        """
+        Returns: Compact part replacing the attachment.
+        """
+        mime_type = (part.inline_data or part.file_data).mime_type
+        if self.summarizer is not None:
+            try:
+                return types.Part.from_text(text=f"[Attachment {mime_type}: {self.summarizer(part)}]")
+            except Exception as ex:
+                logger.warning(f"Attachment summarizer failed, falling back to another placeholder: {ex}")
+        if part.file_data is not None and self.attachment_manager is not None:
+            return part
+        if part.inline_data is not None and self.attachment_manager is not None:
+            try:
+                uploaded = self.attachment_manager.upload(part.inline_data.data, mime_type)
+                return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+            except Exception as ex:
+                logger.warning(f"Upload of aged attachment failed, attachment will be omitted: {ex}")
+        if part.inline_data is not None:
+            return types.Part.from_text(
+                text=f"[Attachment omitted: {mime_type}, {len(part.inline_data.data) // 1024} KB]"
+            )
+        return types.Part.from_text(text=f"[Attachment omitted: {mime_type} {part.file_data.file_uri}]")
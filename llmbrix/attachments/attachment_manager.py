@@ -0,0 +1,297 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from google.genai import Client, types
+
+from llmbrix.attachments.uploaded_file import UploadedFile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_TTL = 48 * 3600  # Files API keeps uploaded files for 48 hours
+DEFAULT_MIN_SIZE = 1024 * 1024
+DEFAULT_MAX_SOURCE_BYTES = 1024 * 1024 * 1024
+
+
+class AttachmentManager:
+    """
+    Uploads large attachments to Gemini Files API once and references them by URI afterwards.
+
+    Inline attachments are re-sent with every request while their turn stays in chat history. With the manager
+    large files are uploaded once, requests then carry only a short file URI (Part.from_uri).
+    Uploads are deduplicated by SHA-256 of the content: same bytes => same URI, no upload, until the uploaded file
+    is about to expire (then it is uploaded again).
+
+    Files API deletes uploaded files after 48 hours. With keep_sources uploaded content is kept in a temporary
+    directory (on disk, not in memory, least recently used files are deleted over max_source_bytes), refresh()
+    re-uploads it and swaps expiring URIs of messages stored in chat history (GeminiModel does so for every request
+    when attachment_manager is set).
+
+    Thread safe, concurrent uploads of the same content are done only once.
+    """
+
+    def __init__(
+        self,
+        gemini_client: Client,
+        min_size: int = DEFAULT_MIN_SIZE,
+        expiry_margin: float = 3600.0,
+        processing_timeout: float = 300.0,
+        poll_interval: float = 1.0,
+        keep_sources: bool = False,
+        source_dir: Optional[str] = None,
+        max_source_bytes: int = DEFAULT_MAX_SOURCE_BYTES,
+    ):
+        """
+        Args:
+            gemini_client: Client object from google-genai SDK (Gemini Developer API, Files API is not in Vertex).
+            min_size: Attachments smaller than this number of bytes stay inline.
+            expiry_margin: Uploaded file is re-uploaded if it expires in less than this number of seconds
+                           (conversation using it needs the URI to stay valid).
+            processing_timeout: Maximum number of seconds to wait for uploaded file to be processed (e.g. videos).
+            poll_interval: Number of seconds between checks of the file processing state.
+            keep_sources: If True uploaded content is stored in a temporary directory so expiring files can be
+                          re-uploaded by refresh(). If False expired URIs can't be refreshed.
+            source_dir: Parent directory of the temporary directory, defaults to system temp dir.
+            max_source_bytes: Maximum total size of kept sources, least recently used ones are deleted over it.
+        """
+        self.gemini_client = gemini_client
+        self.min_size = min_size
+        self.expiry_margin = expiry_margin
+        self.processing_timeout = processing_timeout
+        self.poll_interval = poll_interval
+        self.keep_sources = keep_sources
+        self.source_dir = source_dir
+        self.max_source_bytes = max_source_bytes
+        self.n_uploads = 0
+        self.n_dedupe_hits = 0
+        self.n_refreshes = 0
+        self._files: dict[str, UploadedFile] = {}
+        self._uri_keys: dict[str, str] = {}  # URI (also of expired uploads) => content key
+        self._sources: OrderedDict[str, tuple[str, int]] = OrderedDict()  # content key => (path, size), LRU order
+        self._source_bytes = 0
+        self._source_tmp_dir: Optional[tempfile.TemporaryDirectory] = None
+        self._key_locks: dict[str, list] = {}  # content key => [lock, number of threads using it]
+        self._lock = threading.Lock()
+
+    def upload(self, data: bytes, mime_type: str) -> UploadedFile:
+        """
+        Upload file unless the same content was already uploaded and is still valid.
+
+        Args:
+            data: File bytes.
+            mime_type: MIME type of the file.
+
+        Returns: UploadedFile with URI to reference in requests.
+        """
+        key = f"{mime_type}:{hashlib.sha256(data).hexdigest()}"
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                uploaded = self._files.get(key)
+                with self._lock:
+                    if key in self._sources:
+                        self._sources.move_to_end(key)
+                if uploaded is not None and uploaded.is_valid(time.time(), self.expiry_margin):
+                    self.n_dedupe_hits += 1
+                    return uploaded
+                uploaded = self._upload(data, mime_type)
+                source = self._store_source(key, data) if self.keep_sources and key not in self._sources else None
+                evicted = []
+                with self._lock:
+                    self._files[key] = uploaded
+                    self._uri_keys[uploaded.uri] = key
+                    if source is not None:
+                        self._sources[key] = (source, len(data))
+                        self._source_bytes += len(data)
+                        while self._source_bytes > self.max_source_bytes:
+                            evicted.append(self._pop_source(next(iter(self._sources))))
+                    self.n_uploads += 1
+                self._delete_files(evicted)
+                return uploaded
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[key]
+
+    def to_part(self, data: bytes, mime_type: str) -> types.Part:
+        """
+        Create request part for an attachment, large attachments are uploaded and referenced by URI.
+
+        Args:
+            data: File bytes.
+            mime_type: MIME type of the file.
+
+        Returns: Part with inline data (small files) or file URI (large files).
+        """
+        if len(data) < self.min_size:
+            return types.Part.from_bytes(data=data, mime_type=mime_type)
+        uploaded = self.upload(data, mime_type)
+        return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+
+    def offload(self, message: types.Content) -> types.Content:
+        """
+        Replace large inline attachments of a message by Files API references (in place).
+        Use for messages already stored in chat history.
+
+        Args:
+            message: Message (BaseMsg) to offload attachments of.
+
+        Returns: The same message instance.
+        """
+        parts = message.parts or []
+        if any(self._is_large(p) for p in parts):
+            message.parts = [
+                self.to_part(p.inline_data.data, p.inline_data.mime_type) if self._is_large(p) else p for p in parts
+            ]
+        return message
+
+    def needs_refresh(self, messages: list[types.Content]) -> bool:
+        """
+        Check whether messages reference files uploaded by this manager which expire soon (or already expired).
+
+        Args:
+            messages: Messages (BaseMsg), e.g. from chat history.
+
+        Returns: True if refresh() would replace some file URI.
+        """
+        now = time.time()
+        return any(self._is_expiring(p, now) for m in messages for p in m.parts or [])
+
+    def refresh(self, messages: list[types.Content]) -> int:
+        """
+        Replace expiring file URIs uploaded by this manager by valid ones (in place). Content is re-uploaded
+        (once per content) from the stored source. URIs which can't be refreshed are kept and logged.
+
+        Args:
+            messages: Messages (BaseMsg), e.g. from chat history.
+
+        Returns: Number of replaced parts.
+        """
+        n_replaced = 0
+        now = time.time()
+        for message in messages:
+            parts = message.parts or []
+            if not any(self._is_expiring(p, now) for p in parts):
+                continue
+            new_parts = []
+            for part in parts:
+                if self._is_expiring(part, now):
+                    new_part = self._refresh_part(part)
+                    n_replaced += new_part is not part
+                    part = new_part
+                new_parts.append(part)
+            message.parts = new_parts
+        return n_replaced
+
+    def purge_expired(self) -> int:
+        """
+        Forget uploaded files which already expired and delete their kept sources
+        (references to them stored in chat history can't be refreshed afterwards).
+
+        Returns: Number of removed records.
+        """
+        now = time.time()
+        with self._lock:
+            expired = [k for k, f in self._files.items() if not f.is_valid(now)]
+            for key in expired:
+                del self._files[key]
+            sources = [self._pop_source(k) for k in expired if k in self._sources]
+        self._delete_files(sources)
+        return len(expired)
+
+    def _is_expiring(self, part: types.Part, now: float) -> bool:
+        if part.file_data is None:
+            return False
+        key = self._uri_keys.get(part.file_data.file_uri)
+        if key is None:
+            return False  # not uploaded by this manager
+        uploaded = self._files.get(key)
+        if uploaded is None or uploaded.uri != part.file_data.file_uri:
+            return True  # expired and purged, or content was uploaded again under a new URI
+        return not uploaded.is_valid(now, self.expiry_margin)
+
+    def _refresh_part(self, part: types.Part) -> types.Part:
+        """
+        Returns: Part referencing valid upload of the same content, the original part if refresh failed.
+        """
+        key = self._uri_keys[part.file_data.file_uri]
+        with self._lock:
+            path = self._sources[key][0] if key in self._sources else None
+        if path is None:
+            logger.warning(f"File {part.file_data.file_uri} expires and its content is not kept, can't refresh it.")
+            return part
+        mime_type = key.split(":", 1)[0]
+        try:
+            with open(path, "rb") as f:
+                uploaded = self.upload(f.read(), mime_type)
+        except Exception as ex:
+            logger.warning(f"Re-upload of expiring file {part.file_data.file_uri} failed: {ex}")
+            return part
+        with self._lock:
+            self.n_refreshes += 1
+        return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+
+    def _store_source(self, key: str, data: bytes) -> str:
+        """
+        Write uploaded content to the temporary directory of the manager.
+
+        Returns: Path of the written file.
+        """
+        with self._lock:
+            if self._source_tmp_dir is None:
+                self._source_tmp_dir = tempfile.TemporaryDirectory(prefix="llmbrix_attachments_", dir=self.source_dir)
+        path = os.path.join(self._source_tmp_dir.name, hashlib.sha256(key.encode()).hexdigest())
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _pop_source(self, key: str) -> str:
+        """
+        Forget kept source of the content. Lock has to be held.
+
+        Returns: Path of the source file to delete.
+        """
+        path, size = self._sources.pop(key)
+        self._source_bytes -= size
+        return path
+
+    @staticmethod
+    def _delete_files(paths: list[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError as ex:
+                logger.warning(f"Failed to delete kept source {path}: {ex}")
+
+    def _is_large(self, part: types.Part) -> bool:
+        return bool(part.inline_data and part.inline_data.data and len(part.inline_data.data) >= self.min_size)
+
+    def _upload(self, data: bytes, mime_type: str) -> UploadedFile:
+        """
+        Upload file to Files API and wait until it is processed.
+
+        Returns: UploadedFile record.
+        """
+        start = time.monotonic()
+        file = self.gemini_client.files.upload(
+            file=io.BytesIO(data), config=types.UploadFileConfig(mime_type=mime_type)
+        )
+        while file.state == types.FileState.PROCESSING:
+            if time.monotonic() - start > self.processing_timeout:
+                raise TimeoutError(f"Uploaded file {file.name} was not processed in {self.processing_timeout}s.")
+            time.sleep(self.poll_interval)
+            file = self.gemini_client.files.get(name=file.name)
+        if file.state == types.FileState.FAILED:
+            raise RuntimeError(f"Processing of uploaded file {file.name} failed: {file.error}")
+        expires_at = file.expiration_time.timestamp() if file.expiration_time else time.time() + DEFAULT_FILE_TTL
+        logger.info(f"Uploaded {len(data)} bytes to {file.uri} in {time.monotonic() - start:.2f}s.")
+        return UploadedFile(uri=file.uri, mime_type=file.mime_type or mime_type, expires_at=expires_at)
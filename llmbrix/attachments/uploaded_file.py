@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class UploadedFile:
+    """
+    File uploaded to Gemini Files API.
+    """
+
+    uri: str
+    mime_type: str
+    expires_at: float  # time.time() timestamp after which the URI can't be used anymore
+
+    def is_valid(self, now: float, margin: float = 0.0) -> bool:
+        """
+        Args:
+            now: Current time.time() timestamp.
+            margin: Number of seconds the file has to remain valid for.
+
+        Returns: True if file can still be referenced by requests.
+        """
+        return now + margin < self.expires_at
@@ -0,0 +1,2 @@
+from .batch_job_manifest import BatchJobManifest
+from .local_batches import LocalBatches
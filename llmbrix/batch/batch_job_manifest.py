@@ -0,0 +1,102 @@
+import importlib
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_JOB_STATES = frozenset(
+    {
+        "JOB_STATE_SUCCEEDED",
+        "JOB_STATE_PARTIALLY_SUCCEEDED",
+        "JOB_STATE_FAILED",
+        "JOB_STATE_CANCELLED",
+        "JOB_STATE_EXPIRED",
+    }
+)
+COLLECTABLE_JOB_STATES = frozenset({"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"})
+
+
+class BatchJobManifest(BaseModel):
+    """
+    Local record of a submitted Gemini batch job.
+    Persisted as JSON file so bulk jobs can be polled / collected again after process restart.
+    """
+
+    job_name: str  # name of the batch job assigned by Gemini API, e.g. "batches/123"
+    model: str
+    n_requests: int
+    state: str  # last observed types.JobState value
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    path: Optional[str] = None  # where this manifest is persisted, None => in-memory only
+    response_schema_ref: Optional[str] = None  # "module:QualName" of response schema class, if importable
+    response_json_schema: Optional[dict[str, Any]] = None  # JSON schema of structured output of the job
+
+    @property
+    def is_done(self) -> bool:
+        """
+        Returns: True if job reached a terminal state (no need to poll anymore).
+        """
+        return self.state in TERMINAL_JOB_STATES
+
+    def set_response_schema(self, schema: Any):
+        """
+        Record response schema of the job, so results can be parsed by collect() in another process.
+
+        Args:
+            schema: Response schema type (e.g. pydantic model class), None => job has no structured output.
+        """
+        if schema is None:
+            self.response_schema_ref, self.response_json_schema = None, None
+            return
+        qualname = getattr(schema, "__qualname__", None)
+        is_importable = isinstance(schema, type) and qualname and "<locals>" not in qualname
+        self.response_schema_ref = f"{schema.__module__}:{qualname}" if is_importable else None
+        self.response_json_schema = schema if isinstance(schema, dict) else TypeAdapter(schema).json_schema()
+
+    def resolve_response_schema(self) -> Optional[type]:
+        """
+        Import response schema class recorded by set_response_schema().
+
+        Returns: Schema class, None if no class was recorded or it can't be imported (use response_json_schema).
+        """
+        if self.response_schema_ref is None:
+            return None
+        module_name, qualname = self.response_schema_ref.split(":", 1)
+        try:
+            schema = importlib.import_module(module_name)
+            for name in qualname.split("."):
+                schema = getattr(schema, name)
+            return schema
+        except (ImportError, AttributeError) as ex:
+            logger.warning(f"Response schema {self.response_schema_ref} of batch job can't be imported: {ex}")
+            return None
+
+    def save(self):
+        """
+        Write manifest to its path (atomically). Does nothing for in-memory manifests.
+        """
+        if self.path is None:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.model_dump_json(indent=2))
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def load(cls, path: str) -> "BatchJobManifest":
+        """
+        Load manifest from JSON file.
+
+        Args:
+            path: Path to the manifest file.
+
+        Returns: BatchJobManifest instance.
+        """
+        with open(path) as f:
+            manifest = cls.model_validate_json(f.read())
+        manifest.path = path
+        return manifest
@@ -0,0 +1,90 @@
+import logging
+import threading
+import uuid
+from typing import Any, Optional
+
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBatches:
+    """
+    Local stand-in for Gemini Batch API (client.batches) for tests and local development.
+
+    Executes every inlined request with synchronous generate_content calls on the given models API as soon as the job
+    is created, results are kept in memory and returned by get() in the same format as the real Batch API.
+
+    Usage:
+        model = GeminiModel(...)
+        model.batches = LocalBatches(model.gemini_client.models)
+    """
+
+    def __init__(self, models_api: Any, running_polls: int = 0):
+        """
+        Args:
+            models_api: Object with generate_content(model, contents, config) method, e.g. client.models.
+            running_polls: Number of get() calls reporting the job as running before it is reported finished.
+                           Useful to test polling logic.
+        """
+        self.models_api = models_api
+        self.running_polls = running_polls
+        self._jobs: dict[str, types.BatchJob] = {}
+        self._remaining_polls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def create(
+        self,
+        model: str,
+        src: list[types.InlinedRequest],
+        config: Optional[types.CreateBatchJobConfig] = None,
+    ) -> types.BatchJob:
+        """
+        Run all requests of the batch and store the results.
+
+        Args:
+            model: Name of the model.
+            src: List of inlined requests.
+            config: Batch job config, only display_name is used.
+
+        Returns: BatchJob in pending state.
+        """
+        responses = []
+        for request in src:
+            try:
+                response = self.models_api.generate_content(
+                    model=request.model or model, contents=request.contents, config=request.config
+                )
+                responses.append(types.InlinedResponse(response=response, metadata=request.metadata))
+            except Exception as ex:
+                logger.warning(f"Local batch request failed: {ex}")
+                responses.append(
+                    types.InlinedResponse(error=types.JobError(message=str(ex)), metadata=request.metadata)
+                )
+        name = f"batches/local-{uuid.uuid4().hex}"
+        job = types.BatchJob(
+            name=name,
+            display_name=config.display_name if config else None,
+            model=model,
+            state=types.JobState.JOB_STATE_SUCCEEDED,
+            dest=types.BatchJobDestination(inlined_responses=responses),
+        )
+        with self._lock:
+            self._jobs[name] = job
+            self._remaining_polls[name] = self.running_polls
+        return job.model_copy(update={"state": types.JobState.JOB_STATE_PENDING, "dest": None})
+
+    def get(self, name: str) -> types.BatchJob:
+        """
+        Args:
+            name: Name of the batch job.
+
+        Returns: BatchJob, running until running_polls get() calls were made, then succeeded with results.
+        """
+        with self._lock:
+            if name not in self._jobs:
+                raise KeyError(f"Batch job {name} does not exist.")
+            if self._remaining_polls[name] > 0:
+                self._remaining_polls[name] -= 1
+                return self._jobs[name].model_copy(update={"state": types.JobState.JOB_STATE_RUNNING, "dest": None})
+            return self._jobs[name]
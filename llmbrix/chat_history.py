@@ -1,6 +1,16 @@
-from collections import deque
+import bisect
+import itertools
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import wait as futures_wait
+from typing import Optional
 
-from llmbrix.msg import BaseMsg, ModelMsg, ToolMsg, UserMsg
+from llmbrix.attachments import AttachmentAgingPolicy
+from llmbrix.history_compactor import HistoryCompactor
+from llmbrix.msg import BaseMsg, MediaHandle, ModelMsg, ToolMsg, UserMsg
+
+logger = logging.getLogger(__name__)
 
 
 class ChatHistory:
@@ -8,20 +18,61 @@ class ChatHistory:
     Contains chat message history with automatically applied trimming based on number conversation turns.
     Each new user message begins new conversation turn.
     Note this strategy of message trimming might not optimally leverage Gemini API caching.
+
+    Turns are immutable and stored in a tuple which is replaced on every change (copy-on-write) => fork() is O(1)
+    and forks share all existing turns.
+
+    Thread-safe: writers build a new tuple under a lock and publish it (together with compactor state) with a single
+    assignment, readers never lock and always see a consistent snapshot. insert_batch() publishes all its messages
+    at once, evicted turns are handed to the compactor in the same step => every message is always visible either
+    as a turn or in compactor state (summary / unsummarized messages), never in both or neither.
+    Turns are ordered by sequence number. By default it is assigned when UserMsg is inserted; overlapping requests
+    (e.g. user sends a new message while the previous answer is still generated) can reserve it upfront with
+    begin_turn() => turns are ordered by the time requests started, not by the time they finished.
     """
 
-    def __init__(self, max_turns: int = 5):
+    def __init__(
+        self,
+        max_turns: int = 5,
+        attachment_aging: Optional[AttachmentAgingPolicy] = None,
+        compactor: Optional[HistoryCompactor] = None,
+    ):
         """
         Args:
             max_turns: Maximum number of conversation turns stored in this conversation history.
                        Limit is applied automatically when messages are added.
                        Each conversation turn starts with UserMsg and contains subsequent related
                        ModelMsg/ToolMsg objects.
+            attachment_aging: Optional policy replacing attachments of old user messages by compact placeholders.
+                              Applied in background, see wait_for_aging().
+            compactor: Optional compactor folding turns evicted by max_turns limit into a rolling summary
+                       (computed in background). Summary is returned as the first message by get().
         """
         self.max_turns = max_turns
-        self._conv_turns: deque[_ConversationTurn] = deque(maxlen=max_turns)
+        self.attachment_aging = attachment_aging
+        self.compactor = compactor
+        # (turns, compactor state) published as a whole => readers see turns and compactor state consistently
+        self._snapshot: tuple[tuple[_ConversationTurn, ...], Optional[tuple]] = (
+            (),
+            compactor.state if compactor else None,
+        )
+        self._seq = itertools.count()
+        self._write_lock = threading.Lock()
+        self._aging: set[int] = set()  # seq of turns being aged right now
+        self._aging_futures: set[Future] = set()
+        if compactor:
+            compactor.subscribe(self._publish_compactor_state)
 
-    def insert(self, message: BaseMsg):
+    def begin_turn(self) -> int:
+        """
+        Reserve position of a conversation turn which will be inserted later (e.g. once the answer is complete).
+        Pass the returned value as turn_seq to insert() / insert_batch() of the turn's UserMsg.
+
+        Returns: Sequence number of the turn.
+        """
+        return next(self._seq)
+
+    def insert(self, message: BaseMsg, turn_seq: Optional[int] = None):
         """
         Add a message to the conversation history.
         If UserMsg is added, new conversation turn is started.
@@ -29,24 +80,68 @@ class ChatHistory:
 
         Args:
             message: BaseMsg instance.
+            turn_seq: Sequence number from begin_turn(). For UserMsg the turn is placed among existing turns
+                      by this number (None => after all existing turns), for other messages it identifies the turn
+                      the message belongs to (None => latest turn).
         """
-        if isinstance(message, UserMsg):
-            self._conv_turns.append(_ConversationTurn(user_msg=message))
-        elif isinstance(message, (ToolMsg, ModelMsg)):
-            if len(self._conv_turns) == 0:
-                raise ValueError("Conversation must start with a UserMsg.")
-            self._conv_turns[-1].add_followup_message(message)
-        else:
-            raise TypeError(f"Message has to be one of [ModelMsg, ToolMsg, UserMsg], got: {type(message)}")
+        self.insert_batch([message], turn_seq=turn_seq)
 
-    def insert_batch(self, messages: list[BaseMsg]):
+    def insert_batch(self, messages: list[BaseMsg], turn_seq: Optional[int] = None):
         """
         Add multiple messages to the conversation history.
+        All messages are published at once => readers never see part of the batch.
+        Follow-up messages are appended to the turn started by the preceding UserMsg of the batch. If batch doesn't
+        start with UserMsg, they are appended to the turn given by turn_seq (latest turn if turn_seq is None).
+
         Args:
             messages: List of BaseMsg instances.
+            turn_seq: Sequence number from begin_turn(). If batch starts with UserMsg, the new turn gets this number,
+                      otherwise it identifies the turn the follow-up messages belong to.
+        """
+        with self._write_lock:
+            turns = self._conv_turns
+            index = self._turn_index(turns, turn_seq) if messages and not isinstance(messages[0], UserMsg) else -1
+            if index is None:
+                logger.warning(
+                    f"Conversation turn {turn_seq} was evicted, dropping {len(messages)} follow-up messages."
+                )
+                return
+            for m in messages:
+                if isinstance(m, UserMsg):
+                    seq = turn_seq if turn_seq is not None else next(self._seq)
+                    turn_seq = None
+                    index = bisect.bisect_right([t.seq for t in turns], seq)
+                    turns = turns[:index] + (_ConversationTurn(user_msg=m, seq=seq),) + turns[index:]
+                elif isinstance(m, (ToolMsg, ModelMsg)):
+                    if len(turns) == 0:
+                        raise ValueError("Conversation must start with a UserMsg.")
+                    turns = turns[:index] + (turns[index].with_followup_message(m),) + turns[index + 1 :]
+                else:
+                    raise TypeError(f"Message has to be one of [ModelMsg, ToolMsg, UserMsg], got: {type(m)}")
+            evicted = turns[: max(0, len(turns) - self.max_turns)]
+            if self.compactor and evicted:
+                self.compactor.submit([m for turn in evicted for m in turn.flatten()])
+            self._conv_turns = turns[len(evicted) :]
+        if self.attachment_aging:
+            self._schedule_aging()
+
+    @staticmethod
+    def _turn_index(turns: tuple["_ConversationTurn", ...], turn_seq: Optional[int]) -> Optional[int]:
+        """
+        Find position of the turn follow-up messages belong to.
+
+        Returns: Index of the turn (latest turn if turn_seq is None), None if the turn was already evicted.
+
+        Raises: ValueError if turn_seq doesn't belong to any inserted turn.
         """
-        for m in messages:
-            self.insert(m)
+        if turn_seq is None:
+            return len(turns) - 1
+        for index in range(len(turns) - 1, -1, -1):
+            if turns[index].seq == turn_seq:
+                return index
+        if turns and turn_seq < turns[0].seq:
+            return None
+        raise ValueError(f"Conversation turn {turn_seq} was not started, insert its UserMsg first.")
 
     def get(self, n=None) -> list[BaseMsg]:
         """
@@ -56,14 +151,37 @@ class ChatHistory:
         Args:
             n: Number of last conversation turns to fetch messages from.
 
-        Returns: List of messages from chat history.
+        Returns: List of messages from chat history. If compactor is set and n is None, the list starts with
+                 summary of evicted turns (once available) followed by evicted messages not summarized yet.
 
         """
-        turns = list(self._conv_turns)
+        turns, compactor_state = self._snapshot
         if n is not None:
             start_index = max(0, len(turns) - n)
             turns = turns[start_index:]
-        return [msg for turn in turns for msg in turn.flatten()]
+        messages = [msg for turn in turns for msg in turn.flatten()]
+        if compactor_state is None or n is not None:
+            return messages
+        _, summary_msg, unsummarized = compactor_state
+        return ([summary_msg] if summary_msg else []) + list(unsummarized) + messages
+
+    @property
+    def _conv_turns(self) -> tuple["_ConversationTurn", ...]:
+        return self._snapshot[0]
+
+    @_conv_turns.setter
+    def _conv_turns(self, turns: tuple["_ConversationTurn", ...]):
+        """
+        Publish turns together with the current compactor state. Write lock has to be held.
+        """
+        self._snapshot = (turns, self.compactor.state if self.compactor else None)
+
+    def _publish_compactor_state(self):
+        """
+        Re-publish snapshot after compactor changed its summary in background.
+        """
+        with self._write_lock:
+            self._conv_turns = self._snapshot[0]
 
     def pop(self) -> list[BaseMsg]:
         """
@@ -72,9 +190,99 @@ class ChatHistory:
 
         Returns: List of messages from the last conversation turn.
         """
-        if self.count_conversation_turns() > 0:
-            return self._conv_turns.pop().flatten()
-        return []
+        with self._write_lock:
+            turns = self._conv_turns
+            if len(turns) == 0:
+                return []
+            self._conv_turns = turns[:-1]
+        return turns[-1].flatten()
+
+    def fork(self) -> "ChatHistory":
+        """
+        Create independent branch of this chat history (e.g. to regenerate an answer or run parallel agents on the
+        same context). O(1) in time and memory, existing turns are shared and never modified, changes of either
+        branch are not visible in the other one.
+
+        Returns: New ChatHistory with the same messages and settings. Compactor (if set) is forked as well.
+        """
+        forked = ChatHistory(
+            max_turns=self.max_turns,
+            attachment_aging=self.attachment_aging,
+            compactor=self.compactor.fork() if self.compactor else None,
+        )
+        forked._conv_turns = self._conv_turns
+        forked._seq = itertools.count(next(self._seq))
+        return forked
+
+    def archived_attachments(self) -> list[MediaHandle]:
+        """
+        Original payloads of attachments replaced by attachment aging policy (if archiving is enabled).
+
+        Returns: list of MediaHandle objects backed by temporary files, oldest first.
+        """
+        return [h for turn in self._conv_turns for h in turn.archived_attachments]
+
+    def wait_for_aging(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until background attachment aging scheduled so far is finished.
+
+        Args:
+            timeout: Maximum number of seconds to wait.
+
+        Returns: True if no aging is running, False on timeout.
+        """
+        with self._write_lock:
+            futures = set(self._aging_futures)
+        return not futures_wait(futures, timeout=timeout).not_done
+
+    def _schedule_aging(self):
+        """
+        Run attachment aging in background (executor of the aging policy) => insert never waits for uploads,
+        summarizer calls or disk writes.
+        """
+        turns = self._conv_turns
+        if all(t.aged for t in turns[: max(0, len(turns) - self.attachment_aging.max_age_turns)]):
+            return
+        future = self.attachment_aging.executor.submit(self._age_attachments)
+        with self._write_lock:
+            self._aging_futures.add(future)
+        future.add_done_callback(self._aging_done)
+
+    def _aging_done(self, future: Future):
+        with self._write_lock:
+            self._aging_futures.discard(future)
+        if future.exception() is not None:
+            logger.warning(f"Attachment aging failed, attachments are kept: {future.exception()}")
+
+    def _age_attachments(self):
+        """
+        Apply attachment aging policy to turns older than max_age_turns which were not aged yet.
+        Runs in background, policy may upload files or call the summarizer => it runs without holding the write lock
+        and aged turns are swapped in afterwards.
+        Turn is replaced by an aged copy, message instance owned by the caller is not modified.
+        """
+        with self._write_lock:
+            turns = self._conv_turns
+            candidates = [
+                t
+                for t in turns[: max(0, len(turns) - self.attachment_aging.max_age_turns)]
+                if not t.aged and t.seq not in self._aging
+            ]
+            self._aging.update(t.seq for t in candidates)
+        if not candidates:
+            return
+        aged = {}
+        try:
+            for turn in candidates:
+                parts, archived = self.attachment_aging.age(turn.user_msg.parts or [])
+                aged[turn.seq] = (turn.user_msg.model_copy(update={"parts": parts}), tuple(archived))
+        finally:
+            with self._write_lock:
+                self._aging.difference_update(t.seq for t in candidates)
+                # turns could change in between (follow-ups, eviction) => aged user messages are merged by seq
+                self._conv_turns = tuple(
+                    t.with_aged_user_msg(*aged[t.seq]) if t.seq in aged else t for t in self._conv_turns
+                )
 
     def count_conversation_turns(self) -> int:
         """
@@ -105,17 +313,37 @@ class _ConversationTurn:
     """
     Hold messages for a single conversation turn.
     Conversation turn starts with user message and contains all subsequent non-user messages added to chat history.
+    Immutable, adding a message creates a new turn => turns can be shared between forked histories.
     """
 
-    def __init__(self, user_msg: UserMsg):
+    __slots__ = ("user_msg", "llm_responses", "aged", "archived_attachments", "seq")
+
+    def __init__(
+        self,
+        user_msg: UserMsg,
+        llm_responses: tuple[ModelMsg | ToolMsg, ...] = (),
+        aged: bool = False,
+        archived_attachments: tuple[MediaHandle, ...] = (),
+        seq: int = 0,
+    ):
         self.user_msg = user_msg
-        self.llm_responses: list[ModelMsg | ToolMsg] = []
+        self.llm_responses = llm_responses
+        self.aged = aged
+        self.archived_attachments = archived_attachments
+        self.seq = seq
+
+    def with_followup_message(self, msg: ModelMsg | ToolMsg) -> "_ConversationTurn":
+        return _ConversationTurn(
+            self.user_msg, self.llm_responses + (msg,), self.aged, self.archived_attachments, self.seq
+        )
 
-    def add_followup_message(self, msg: ModelMsg | ToolMsg):
-        self.llm_responses.append(msg)
+    def with_aged_user_msg(
+        self, user_msg: UserMsg, archived_attachments: tuple[MediaHandle, ...]
+    ) -> "_ConversationTurn":
+        return _ConversationTurn(user_msg, self.llm_responses, True, archived_attachments, self.seq)
 
     def flatten(self) -> list[BaseMsg]:
-        return [self.user_msg] + self.llm_responses
+        return [self.user_msg, *self.llm_responses]
 
     def __len__(self) -> int:
         return 1 + len(self.llm_responses)
@@ -0,0 +1,243 @@
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from llmbrix.chat_history import ChatHistory
+from llmbrix.codec import MsgCodec
+
+logger = logging.getLogger(__name__)
+
+MSG_OVERHEAD_BYTES = 256  # rough size of message objects without payload
+SCHEMA_VERSION = 1  # PRAGMA user_version of the database, bump and upgrade in _init_schema() on format changes
+
+
+class ChatSessionStore:
+    """
+    Store of ChatHistory objects of many user sessions (e.g. one per user of a chatbot server).
+
+    Hot sessions are kept in memory while their estimated total size fits into max_bytes. Least recently used
+    sessions over the budget are spilled to SQLite database (encoded by MsgCodec) and loaded back lazily on next
+    access.
+
+    Access session via session() context manager, it holds a per-session lock => concurrent requests of one
+    session are serialized, different sessions are processed in parallel. Sessions in use are never spilled.
+    Locks are kept only for resident sessions and sessions in use, they are dropped on spill and delete.
+
+    Note compactor summary (see HistoryCompactor) is persisted, attachment archives of aging policy are not.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        history_factory: Callable[[], ChatHistory] = ChatHistory,
+    ):
+        """
+        Args:
+            db_path: Path of SQLite database for spilled sessions (":memory:" for tests).
+            max_bytes: Budget for estimated size of sessions kept in memory.
+            history_factory: Creates empty ChatHistory for new / reloaded sessions.
+        """
+        self.max_bytes = max_bytes
+        self.history_factory = history_factory
+        self.n_hits = 0
+        self.n_loads = 0
+        self.n_created = 0
+        self.n_spills = 0
+        self._resident: OrderedDict[str, ChatHistory] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._resident_bytes = 0
+        self._in_use: dict[str, int] = {}
+        self._session_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_schema()
+        self._db_lock = threading.Lock()
+
+    @contextmanager
+    def session(self, session_id: str) -> Iterator[ChatHistory]:
+        """
+        Exclusive access to chat history of a session. Session is created if it doesn't exist.
+
+        Args:
+            session_id: Unique id of the session.
+
+        Returns: Context manager yielding ChatHistory of the session.
+        """
+        with self._lock:
+            session_lock = self._session_locks.setdefault(session_id, threading.Lock())
+            self._in_use[session_id] = self._in_use.get(session_id, 0) + 1
+        try:
+            with session_lock:
+                history = self._acquire(session_id)
+                try:
+                    yield history
+                finally:
+                    self._update_size(session_id, history)
+        finally:
+            with self._lock:
+                self._in_use[session_id] -= 1
+                if not self._in_use[session_id]:
+                    del self._in_use[session_id]
+            self._enforce_budget()
+
+    def delete(self, session_id: str):
+        """
+        Remove session from memory and disk.
+
+        Args:
+            session_id: Unique id of the session.
+        """
+        with self._lock:
+            if session_id in self._resident:
+                del self._resident[session_id]
+                self._resident_bytes -= self._sizes.pop(session_id)
+            if session_id not in self._in_use:
+                self._session_locks.pop(session_id, None)
+        with self._db_lock:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    def flush(self):
+        """
+        Spill all sessions which are not in use to disk (e.g. before shutdown).
+        """
+        self._enforce_budget(max_bytes=0)
+
+    def stats(self) -> dict:
+        """
+        Returns: dict with number / estimated size of resident sessions and hit, load, creation and spill counters.
+        """
+        with self._lock:
+            n_accesses = self.n_hits + self.n_loads + self.n_created
+            return {
+                "n_resident": len(self._resident),
+                "resident_bytes": self._resident_bytes,
+                "n_hits": self.n_hits,
+                "n_loads": self.n_loads,
+                "n_created": self.n_created,
+                "n_spills": self.n_spills,
+                "hit_rate": self.n_hits / n_accesses if n_accesses else 0.0,
+            }
+
+    def _acquire(self, session_id: str) -> ChatHistory:
+        """
+        Get resident session, load it from disk or create a new one. Session lock has to be held.
+
+        Returns: ChatHistory of the session.
+        """
+        with self._lock:
+            history = self._resident.get(session_id)
+            if history is not None:
+                self._resident.move_to_end(session_id)
+                self.n_hits += 1
+                return history
+        with self._db_lock:
+            row = self._db.execute("SELECT summary, data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        history = self.history_factory()
+        if row is not None:
+            self._deserialize(history, *row)
+        with self._lock:
+            if row is not None:
+                self.n_loads += 1
+            else:
+                self.n_created += 1
+            self._resident[session_id] = history
+            self._sizes[session_id] = 0
+        return history
+
+    def _update_size(self, session_id: str, history: ChatHistory):
+        size = _estimate_bytes(history)
+        with self._lock:
+            if session_id in self._resident:
+                self._resident_bytes += size - self._sizes[session_id]
+                self._sizes[session_id] = size
+
+    def _enforce_budget(self, max_bytes: int | None = None):
+        """
+        Spill least recently used sessions not in use until resident sessions fit into the budget.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        while True:
+            with self._lock:
+                if self._resident_bytes <= max_bytes:
+                    return
+                session_id, session_lock = None, None
+                for candidate in self._resident:
+                    if candidate not in self._in_use and self._session_locks[candidate].acquire(blocking=False):
+                        session_id, session_lock = candidate, self._session_locks[candidate]
+                        break
+                if session_id is None:
+                    return
+                history = self._resident.pop(session_id)
+                self._resident_bytes -= self._sizes.pop(session_id)
+            # session lock is held => concurrent session() call waits until the session is on disk
+            try:
+                summary, data = self._serialize(history)
+                with self._db_lock:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO sessions (session_id, summary, data) VALUES (?, ?, ?)",
+                        (session_id, summary, data),
+                    )
+                    self._db.commit()
+                with self._lock:
+                    self.n_spills += 1
+            finally:
+                with self._lock:
+                    if session_id not in self._in_use and session_id not in self._resident:
+                        del self._session_locks[session_id]
+                session_lock.release()
+            logger.debug(f"Spilled chat session {session_id} to disk ({len(data)} bytes).")
+
+    def _init_schema(self):
+        """
+        Create sessions table, refuse databases written by a newer version.
+        """
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"Chat session database has unsupported schema version {version}.")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, summary TEXT, data BLOB NOT NULL)"
+        )
+        self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.commit()
+
+    @staticmethod
+    def _serialize(history: ChatHistory) -> tuple[Optional[str], bytes]:
+        """
+        Returns: Tuple (compactor summary, messages of chat history encoded by MsgCodec).
+                 Evicted messages not summarized yet are stored as regular messages, on load they are evicted
+                 and submitted to the compactor again.
+        """
+        summary = history.compactor.summary if history.compactor else None
+        unsummarized = history.compactor.unsummarized_messages() if history.compactor else []
+        return summary, MsgCodec.dumps(unsummarized + history.get(n=history.count_conversation_turns()))
+
+    @staticmethod
+    def _deserialize(history: ChatHistory, summary: Optional[str], data: bytes):
+        """
+        Restore messages (and compactor summary) into an empty chat history.
+        """
+        if summary and history.compactor:
+            history.compactor.restore(summary)
+        history.insert_batch(MsgCodec.loads(data))
+
+
+def _estimate_bytes(history: ChatHistory) -> int:
+    """
+    Returns: Rough in-memory size of messages in chat history (text and inline payloads).
+    """
+    size = 0
+    for msg in history.get(n=history.count_conversation_turns()):
+        size += MSG_OVERHEAD_BYTES
+        for part in msg.parts or []:
+            if part.text:
+                size += len(part.text)
+            elif part.inline_data and part.inline_data.data:
+                size += len(part.inline_data.data)
+            else:
+                size += MSG_OVERHEAD_BYTES
+    return size
@@ -0,0 +1,3 @@
+from .msg_codec import MsgCodec
+from .msg_log_reader import MsgLogReader
+from .msg_log_writer import MsgLogWriter
@@ -0,0 +1,174 @@
+import json
+from typing import Any, Callable, Iterable
+
+from google.genai import types
+from pydantic import BaseModel
+
+from llmbrix.msg import BaseMsg, ModelMsg, ToolMsg, UserMsg
+
+BlobWriter = Callable[[bytes], tuple[int, int]]  # stores bytes, returns (offset, length)
+BlobReader = Callable[[int, int], bytes]  # returns bytes stored at (offset, length)
+
+MSG_TYPE_CODES = {UserMsg: "u", ModelMsg: "m", ToolMsg: "f"}
+MSG_TYPES = {code: cls for cls, code in MSG_TYPE_CODES.items()}
+KNOWN_PART_FIELDS = {
+    "text",
+    "thought",
+    "thought_signature",
+    "inline_data",
+    "file_data",
+    "function_call",
+    "function_response",
+}
+
+
+class MsgCodec:
+    """
+    Compact serialization of UserMsg, ModelMsg and ToolMsg.
+
+    Each message is encoded as a single-line JSON record with short keys, fields with default values are omitted
+    and plain text parts are encoded as bare strings. Binary payloads (inline data, thought signatures) are not
+    base64-encoded into JSON, they are stored out-of-line via blob writer and referenced by (offset, length).
+
+    Used by MsgLogWriter / MsgLogReader (append-only log files) and dumps() / loads() (single buffer).
+    Structured output (ModelMsg.parsed) is stored as JSON and restored as dict.
+    """
+
+    @staticmethod
+    def encode(msg: BaseMsg, write_blob: BlobWriter) -> str:
+        """
+        Encode message to JSON record.
+
+        Args:
+            msg: UserMsg, ModelMsg or ToolMsg.
+            write_blob: Stores binary payload, returns its (offset, length).
+
+        Returns: str single-line JSON record.
+        """
+        record: dict[str, Any] = {"t": MSG_TYPE_CODES[type(msg)], "p": [_encode_part(p, write_blob) for p in msg.parts]}
+        if isinstance(msg, ToolMsg):
+            record["n"] = msg.tool_name
+            if msg.tool_args:
+                record["a"] = msg.tool_args
+        elif isinstance(msg, ModelMsg) and msg.parsed is not None:
+            parsed = msg.parsed
+            record["x"] = parsed.model_dump(mode="json") if isinstance(parsed, BaseModel) else parsed
+        return json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    @staticmethod
+    def decode(line: str | bytes, read_blob: BlobReader) -> BaseMsg:
+        """
+        Decode message from JSON record.
+
+        Args:
+            line: JSON record produced by encode().
+            read_blob: Returns binary payload stored at (offset, length).
+
+        Returns: Decoded message.
+        """
+        record = json.loads(line)
+        cls = MSG_TYPES[record["t"]]
+        fields = {"parts": [_decode_part(p, read_blob) for p in record["p"]]}
+        if cls is ToolMsg:
+            fields["tool_name"] = record["n"]
+            fields["tool_args"] = record.get("a")
+        elif cls is ModelMsg:
+            fields["parsed"] = record.get("x")
+        role = {UserMsg: "user", ModelMsg: "model", ToolMsg: "function"}[cls]
+        return cls.model_construct(role=role, **fields)  # bypasses custom __init__ of message classes
+
+    @classmethod
+    def dumps(cls, messages: Iterable[BaseMsg]) -> bytes:
+        """
+        Encode messages to a single buffer: length of record section, JSON records, binary payloads.
+
+        Args:
+            messages: Messages to encode.
+
+        Returns: bytes buffer.
+        """
+        blobs = []
+        blobs_size = 0
+
+        def write_blob(data: bytes) -> tuple[int, int]:
+            nonlocal blobs_size
+            blobs.append(data)
+            blobs_size += len(data)
+            return blobs_size - len(data), len(data)
+
+        records = "\n".join(cls.encode(m, write_blob) for m in messages).encode()
+        return b"".join([b"%d\n" % len(records), records, *blobs])
+
+    @classmethod
+    def loads(cls, data: bytes) -> list[BaseMsg]:
+        """
+        Decode messages from buffer produced by dumps().
+
+        Args:
+            data: bytes buffer.
+
+        Returns: list of decoded messages.
+        """
+        header_end = data.index(b"\n")
+        records_start = header_end + 1
+        blobs_start = records_start + int(data[:header_end])
+        view = memoryview(data)
+
+        def read_blob(offset: int, length: int) -> bytes:
+            return bytes(view[blobs_start + offset : blobs_start + offset + length])
+
+        records = data[records_start:blobs_start]
+        return [cls.decode(line, read_blob) for line in records.split(b"\n") if line]
+
+
+def _encode_part(part: types.Part, write_blob: BlobWriter) -> Any:
+    """
+    Returns: str for plain text part, otherwise dict with short keys.
+    """
+    fields = {k for k in part.model_fields_set if getattr(part, k) is not None}
+    if fields == {"text"}:
+        return part.text
+    encoded: dict[str, Any] = {}
+    if part.text is not None:
+        encoded["tx"] = part.text
+    if part.thought:
+        encoded["th"] = 1
+    if part.thought_signature:
+        encoded["ts"] = write_blob(part.thought_signature)
+    if part.inline_data is not None:
+        encoded["b"] = write_blob(part.inline_data.data or b"")
+        encoded["mt"] = part.inline_data.mime_type
+    if part.file_data is not None:
+        encoded["u"] = part.file_data.file_uri
+        encoded["mt"] = part.file_data.mime_type
+    if part.function_call is not None:
+        encoded["fc"] = part.function_call.model_dump(mode="json", exclude_none=True)
+    if part.function_response is not None:
+        encoded["fr"] = part.function_response.model_dump(mode="json", exclude_none=True)
+    other = fields - KNOWN_PART_FIELDS
+    if other:
+        encoded["r"] = part.model_dump(mode="json", include=other, exclude_none=True)
+    return encoded
+
+
+def _decode_part(encoded: Any, read_blob: BlobReader) -> types.Part:
+    if isinstance(encoded, str):
+        return types.Part.model_construct(text=encoded)
+    fields: dict[str, Any] = dict(encoded.get("r", {}))
+    if "tx" in encoded:
+        fields["text"] = encoded["tx"]
+    if "th" in encoded:
+        fields["thought"] = True
+    if "ts" in encoded:
+        fields["thought_signature"] = read_blob(*encoded["ts"])
+    if "b" in encoded:
+        fields["inline_data"] = types.Blob.model_construct(data=read_blob(*encoded["b"]), mime_type=encoded["mt"])
+    if "u" in encoded:
+        fields["file_data"] = types.FileData.model_construct(file_uri=encoded["u"], mime_type=encoded["mt"])
+    if "fc" in encoded:
+        fields["function_call"] = types.FunctionCall.model_validate(encoded["fc"])
+    if "fr" in encoded:
+        fields["function_response"] = types.FunctionResponse.model_validate(encoded["fr"])
+    if "r" in encoded:
+        return types.Part.model_validate(fields)
+    return types.Part.model_construct(**fields)
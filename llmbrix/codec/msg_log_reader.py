@@ -0,0 +1,38 @@
+import mmap
+import os
+from typing import Iterator
+
+from llmbrix.codec.msg_codec import MsgCodec
+from llmbrix.codec.msg_log_writer import BLOBS_SUFFIX
+from llmbrix.msg import BaseMsg
+
+
+class MsgLogReader:
+    """
+    Streaming reader of message log written by MsgLogWriter.
+
+    Messages are decoded one by one while iterating, binary payloads are read from memory-mapped blobs file
+    only for decoded messages.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the log file.
+        """
+        self.path = path
+
+    def __iter__(self) -> Iterator[BaseMsg]:
+        """
+        Returns: Iterator over messages of the log in order they were appended.
+        """
+        blobs_path = self.path + BLOBS_SUFFIX
+        with open(self.path, "rb") as records, open(blobs_path, "rb") as blobs_file:
+            blobs = mmap.mmap(blobs_file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(blobs_path) else b""
+            try:
+                for line in records:
+                    if line.endswith(b"\n"):  # incomplete last record (interrupted append) is skipped
+                        yield MsgCodec.decode(line, lambda offset, length: blobs[offset : offset + length])
+            finally:
+                if isinstance(blobs, mmap.mmap):
+                    blobs.close()
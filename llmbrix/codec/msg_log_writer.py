@@ -0,0 +1,74 @@
+import os
+import threading
+from typing import Iterable
+
+from llmbrix.codec.msg_codec import MsgCodec
+from llmbrix.msg import BaseMsg
+
+BLOBS_SUFFIX = ".blobs"
+
+
+class MsgLogWriter:
+    """
+    Append-only log of messages (e.g. one conversation) encoded by MsgCodec.
+
+    JSON records are appended to the log file, binary payloads to a companion "<path>.blobs" file.
+    Call append() once per conversation turn, data is flushed after every append.
+    Read with MsgLogReader.
+
+    Thread safe.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        """
+        Args:
+            path: Path of the log file, created if it doesn't exist, appended to otherwise.
+            fsync: If True every append is fsync-ed to disk (durable, slower).
+        """
+        self.path = path
+        self.fsync = fsync
+        self._records = open(path, "ab")
+        self._blobs = open(path + BLOBS_SUFFIX, "ab")
+        self._blobs_size = self._blobs.seek(0, os.SEEK_END)
+        self._lock = threading.Lock()
+
+    def append(self, messages: Iterable[BaseMsg]):
+        """
+        Append messages to the log.
+
+        Args:
+            messages: Messages to append, typically messages of one conversation turn.
+        """
+        with self._lock:
+            blobs = []
+
+            def write_blob(data: bytes) -> tuple[int, int]:
+                offset = self._blobs_size + sum(len(b) for b in blobs)
+                blobs.append(data)
+                return offset, len(data)
+
+            records = "".join(MsgCodec.encode(m, write_blob) + "\n" for m in messages).encode()
+            # blobs are written first => records never reference missing payloads
+            for blob in blobs:
+                self._blobs.write(blob)
+            self._blobs.flush()
+            self._records.write(records)
+            self._records.flush()
+            self._blobs_size += sum(len(b) for b in blobs)
+            if self.fsync:
+                os.fsync(self._blobs.fileno())
+                os.fsync(self._records.fileno())
+
+    def close(self):
+        """
+        Close log files.
+        """
+        with self._lock:
+            self._records.close()
+            self._blobs.close()
+
+    def __enter__(self) -> "MsgLogWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,11 +1,31 @@
+import asyncio
+import json
 import logging
 import os
-from typing import Optional, Type
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional, Type
 
 from google.genai import Client, types
 from pydantic import BaseModel
 
+from llmbrix.attachments import AttachmentManager
+from llmbrix.batch import BatchJobManifest
+from llmbrix.batch.batch_job_manifest import COLLECTABLE_JOB_STATES
 from llmbrix.msg import BaseMsg, ModelMsg
+from llmbrix.serving import (
+    SHARED_CLIENT_REGISTRY,
+    CircuitBreaker,
+    CircuitOpenError,
+    RequestCoalescer,
+    RequestHedger,
+    RequestPriority,
+    RequestScheduler,
+    estimate_input_tokens,
+)
+from llmbrix.structured_output import CompiledSchema, SchemaCache
+from llmbrix.thinking import RequestFeatures, ThinkingDecision, ThinkingPolicy
 from llmbrix.tool_calling import BaseTool
 
 logger = logging.getLogger(__name__)
@@ -31,12 +51,20 @@ class GeminiModel:
         thinking_budget: Optional[int] = None,
         thinking_level: types.ThinkingLevel | None = None,
         temperature: Optional[float] = 0.0,
+        request_scheduler: Optional[RequestScheduler] = None,
+        request_hedger: Optional[RequestHedger] = None,
+        request_coalescer: Optional[RequestCoalescer] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        thinking_policy: Optional[ThinkingPolicy] = None,
+        schema_cache: Optional[SchemaCache] = None,
+        attachment_manager: Optional[AttachmentManager] = None,
         **extra_config_kwargs,
     ):
         """
         Args:
             gemini_client: Client object from google-genai SDK.
-                           If not provided then it will be automatically created from GOOGLE_API_KEY env var.
+                           If not provided then shared client for GOOGLE_API_KEY env var is used (one connection
+                           pool is shared by all GeminiModel instances using the same API key).
             model: Name of model to use e.g. "gemini-2.5-flash-lite"
             system_instruction: Static system instruction. Can be overridden with instruction passed to generate().
             tools: List of tools for LLM to use.
@@ -58,14 +86,39 @@ class GeminiModel:
             thinking_level: Gemini 3 only.
                             Set thinking level for Gemini 3 models.
             temperature: Float temperature setting, controls randomness of output. Set to 0 by default.
+            request_scheduler: Optional RPM / TPM aware scheduler, each request waits for quota before it is sent.
+                               Share one instance between all models using the same API quota.
+            request_hedger: Optional hedging of slow requests. Requests slower than tracked latency percentile
+                            are duplicated and the first response is used. Cuts tail latency for extra API cost.
+            request_coalescer: Optional coalescing of identical in-flight requests (same model, config and
+                               messages). Concurrent callers share one response instead of sending duplicates.
+            circuit_breaker: Optional circuit breaker. When backend is degraded requests fail fast with
+                             CircuitOpenError (or return breaker's fallback_msg) instead of waiting for timeouts.
+            thinking_policy: Optional policy choosing thinking budget / level and max output tokens for each request
+                             from request features (overrides values set here), learns from observed responses.
+                             Not applied to requests passing thinking_config explicitly to generate().
+            schema_cache: Optional cache of compiled response schemas. Schemas are converted to JSON schema once
+                          and structured outputs are parsed by cached validators (or not validated at all if
+                          cache is created with validate=False). Share one instance between models.
+            attachment_manager: Optional manager of Files API uploads (the one used to create UserMsg attachments).
+                                Expiring file references in request messages are re-uploaded and replaced
+                                before the request is sent (Files API keeps files for 48 hours only).
             extra_config_kwargs: Extra config kwargs to be set to types.GenerateContentConfig object construction
         """
         if not gemini_client:
             if not os.environ.get("GOOGLE_API_KEY"):
                 raise ValueError("You have to either set env var GOOGLE_API_KEY or pass a gemini_client object.")
-            gemini_client = Client()
+            gemini_client = SHARED_CLIENT_REGISTRY.get()
         self.gemini_client = gemini_client
+        self.batches = gemini_client.batches  # Batch API used by submit_batch(), can be replaced by LocalBatches
         self.model = model
+        self.request_scheduler = request_scheduler
+        self.request_hedger = request_hedger
+        self.request_coalescer = request_coalescer
+        self.circuit_breaker = circuit_breaker
+        self.thinking_policy = thinking_policy
+        self.schema_cache = schema_cache
+        self.attachment_manager = attachment_manager
         self.generation_config = types.GenerateContentConfig(
             system_instruction=system_instruction,
             max_output_tokens=max_output_tokens,
@@ -83,6 +136,7 @@ class GeminiModel:
     def from_gemini_api_key(cls, google_api_key: str | None = None, **kwargs):
         """
         Constructs LlmAgent from API key, takes care of initialization of Gemini API client.
+        Client (and its connection pool) is shared with other models using the same API key.
 
         You have to either set env var GOOGLE_API_KEY or pass google_api_key parameter.
 
@@ -94,9 +148,32 @@ class GeminiModel:
         """
         if (not google_api_key) and (not os.environ.get("GOOGLE_API_KEY")):
             raise ValueError("You have to either set env var GOOGLE_API_KEY or pass google_api_key parameter.")
-        gemini_client = Client(api_key=google_api_key)
+        gemini_client = SHARED_CLIENT_REGISTRY.get(api_key=google_api_key)
         return cls(gemini_client=gemini_client, **kwargs)
 
+    def warmup(self, connections: int = 1):
+        """
+        Pre-establish connections to Gemini API (TCP + TLS handshake) so the first user request doesn't pay for it.
+        Sends lightweight model metadata requests, no tokens are generated.
+        Call at application startup, connections stay in the client's pool for reuse by generate().
+
+        Args:
+            connections: Number of connections to open (sent concurrently). Set to expected request concurrency.
+        """
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            futures = [executor.submit(self.gemini_client.models.get, model=self.model) for _ in range(connections)]
+            for future in futures:
+                future.result()
+
+    async def warmup_async(self, connections: int = 1):
+        """
+        Async version of warmup(), warms up connection pool of the async client used by generate_async().
+
+        Args:
+            connections: Number of connections to open (sent concurrently). Set to expected request concurrency.
+        """
+        await asyncio.gather(*[self.gemini_client.aio.models.get(model=self.model) for _ in range(connections)])
+
     def generate(
         self,
         messages: list[BaseMsg],
@@ -104,6 +181,7 @@ class GeminiModel:
         response_schema: Optional[Type[BaseModel]] = None,
         tools: Optional[list[BaseTool] | types.ToolListUnion] = None,
         tool_call_required: bool = False,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
         **extra_config_kwargs,
     ):
         """
@@ -117,6 +195,7 @@ class GeminiModel:
                  in .parsed attribute of the returned ModelMsg. Overrides response schema set in constructor.
             tools: List of tools for LLM to use. Overrides list of tools set in constructor.
             tool_call_required: If True LLM will be forced to use a tool call (tool mode set to "ANY")
+            priority: Priority class used by request scheduler (if set). Use BATCH for bulk / offline jobs.
             extra_config_kwargs: Extra config kwargs to be set to types.GenerateContentConfig object construction.
                                  Overrides constructor - provided generation config kwargs.
                                  N ote some args might not work depending on other settings
@@ -124,6 +203,203 @@ class GeminiModel:
 
         Returns: ModelMsg object containing response from Gemini model.
         """
+        if self.attachment_manager and self.attachment_manager.needs_refresh(messages):
+            self.attachment_manager.refresh(messages)
+        generation_config = self._build_generation_config(
+            system_instruction=system_instruction,
+            response_schema=response_schema,
+            tools=tools,
+            tool_call_required=tool_call_required,
+            **extra_config_kwargs,
+        )
+        features, decision = None, None
+        if self.thinking_policy and "thinking_config" not in extra_config_kwargs:
+            features, decision, generation_config = self._apply_thinking_policy(messages, generation_config)
+        compiled_schema = None
+        if self.schema_cache:
+            generation_config, compiled_schema = self.schema_cache.prepare_config(generation_config)
+        start = time.monotonic()
+        send_request = partial(self._send_request, messages, generation_config, priority)
+        try:
+            if self.request_coalescer:
+                key = self.request_coalescer.request_key(self.model, generation_config, messages)
+                response = self.request_coalescer.call(key, send_request)
+            else:
+                response = send_request()
+        except CircuitOpenError:
+            if self.circuit_breaker.fallback_msg is None:
+                raise
+            return self.circuit_breaker.fallback_msg.model_copy()
+        model_msg = self._to_model_msg(response, generation_config, compiled_schema)
+        if decision is not None:
+            self.thinking_policy.observe(features, decision, time.monotonic() - start, model_msg)
+        return model_msg
+
+    async def generate_async(
+        self,
+        messages: list[BaseMsg],
+        system_instruction: Optional[str] = None,
+        response_schema: Optional[Type[BaseModel]] = None,
+        tools: Optional[list[BaseTool] | types.ToolListUnion] = None,
+        tool_call_required: bool = False,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+        **extra_config_kwargs,
+    ):
+        """
+        Async version of generate(), uses async Gemini client.
+        See generate() for documentation of arguments.
+
+        Returns: ModelMsg object containing response from Gemini model.
+        """
+        if self.attachment_manager and self.attachment_manager.needs_refresh(messages):
+            await asyncio.to_thread(self.attachment_manager.refresh, messages)
+        generation_config = self._build_generation_config(
+            system_instruction=system_instruction,
+            response_schema=response_schema,
+            tools=tools,
+            tool_call_required=tool_call_required,
+            **extra_config_kwargs,
+        )
+        features, decision = None, None
+        if self.thinking_policy and "thinking_config" not in extra_config_kwargs:
+            features, decision, generation_config = self._apply_thinking_policy(messages, generation_config)
+        compiled_schema = None
+        if self.schema_cache:
+            generation_config, compiled_schema = self.schema_cache.prepare_config(generation_config)
+        start = time.monotonic()
+        send_request = partial(self._send_request_async, messages, generation_config, priority)
+        try:
+            if self.request_coalescer:
+                key = self.request_coalescer.request_key(self.model, generation_config, messages)
+                response = await self.request_coalescer.acall(key, send_request)
+            else:
+                response = await send_request()
+        except CircuitOpenError:
+            if self.circuit_breaker.fallback_msg is None:
+                raise
+            return self.circuit_breaker.fallback_msg.model_copy()
+        model_msg = self._to_model_msg(response, generation_config, compiled_schema)
+        if decision is not None:
+            self.thinking_policy.observe(features, decision, time.monotonic() - start, model_msg)
+        return model_msg
+
+    def submit_batch(
+        self,
+        requests: list[list[BaseMsg]],
+        system_instruction: Optional[str] = None,
+        response_schema: Optional[Type[BaseModel]] = None,
+        manifest_path: Optional[str] = None,
+        display_name: Optional[str] = None,
+        **extra_config_kwargs,
+    ) -> BatchJobManifest:
+        """
+        Submit bulk requests to Gemini Batch API (asynchronous processing at reduced price, results usually within
+        hours). Use for offline jobs which don't need interactive latency, see poll() and collect().
+
+        If manifest_path is given the job is recorded there. Calling submit_batch() again with the same manifest_path
+        resumes the recorded job instead of submitting a duplicate (unless the recorded job failed / expired).
+
+        Args:
+            requests: List of requests, each request is a chat history consisting of BaseMsg objects.
+            system_instruction: System instruction for all requests. Overrides instruction set in constructor.
+            response_schema: Structured output schema for all requests. Overrides response schema set in constructor.
+            manifest_path: Optional path of JSON manifest file recording the job.
+            display_name: Optional human-readable name of the batch job.
+            extra_config_kwargs: Extra config kwargs to be set to types.GenerateContentConfig object construction.
+
+        Returns: BatchJobManifest to be passed to poll() and collect().
+        """
+        if manifest_path and os.path.exists(manifest_path):
+            manifest = BatchJobManifest.load(manifest_path)
+            if not manifest.is_done or manifest.state in COLLECTABLE_JOB_STATES:
+                logger.info(f"Resuming batch job {manifest.job_name} recorded in {manifest_path}.")
+                return manifest
+            logger.warning(f"Batch job {manifest.job_name} ended in state {manifest.state}, submitting new job.")
+        generation_config = self._build_generation_config(
+            system_instruction=system_instruction, response_schema=response_schema, **extra_config_kwargs
+        )
+        if self.schema_cache:
+            generation_config, _ = self.schema_cache.prepare_config(generation_config)
+        src = [
+            types.InlinedRequest(contents=messages, config=generation_config, metadata={"index": str(i)})
+            for i, messages in enumerate(requests)
+        ]
+        job = self.batches.create(
+            model=self.model, src=src, config=types.CreateBatchJobConfig(display_name=display_name)
+        )
+        manifest = BatchJobManifest(
+            job_name=job.name, model=self.model, n_requests=len(requests), state=job.state.value, path=manifest_path
+        )
+        manifest.set_response_schema(response_schema or self.generation_config.response_schema)
+        manifest.save()
+        logger.info(f"Submitted batch job {job.name} with {len(requests)} requests.")
+        return manifest
+
+    def poll(self, manifest: BatchJobManifest, wait: bool = False, poll_interval: float = 30.0) -> str:
+        """
+        Check state of a batch job, updates (and saves) the manifest.
+
+        Args:
+            manifest: Manifest returned by submit_batch() or loaded via BatchJobManifest.load().
+            wait: If True blocks until the job reaches a terminal state.
+            poll_interval: Number of seconds between state checks if wait is True.
+
+        Returns: str state of the job (types.JobState value), e.g. "JOB_STATE_SUCCEEDED".
+        """
+        while True:
+            job = self.batches.get(name=manifest.job_name)
+            if job.state.value != manifest.state:
+                manifest.state = job.state.value
+                manifest.save()
+            if manifest.is_done or not wait:
+                return manifest.state
+            time.sleep(poll_interval)
+
+    def collect(
+        self, manifest: BatchJobManifest, response_schema: Optional[Type[BaseModel]] = None
+    ) -> list[ModelMsg | None]:
+        """
+        Collect results of a finished batch job.
+
+        Args:
+            manifest: Manifest of the finished batch job.
+            response_schema: Schema to parse structured outputs with. Defaults to schema recorded in the manifest
+                             (imported by reference, if the class can't be imported structured outputs are
+                             returned as decoded JSON), then to response schema set in constructor.
+
+        Returns: list of ModelMsg in order of submitted requests. None for requests which failed.
+        """
+        job = self.batches.get(name=manifest.job_name)
+        manifest.state = job.state.value
+        manifest.save()
+        if manifest.state not in COLLECTABLE_JOB_STATES:
+            raise RuntimeError(f"Batch job {manifest.job_name} can't be collected, state: {manifest.state}.")
+        if response_schema is None:
+            response_schema = manifest.resolve_response_schema() or manifest.response_json_schema
+        response_schema = response_schema or self.generation_config.response_schema
+        results: list[ModelMsg | None] = [None] * manifest.n_requests
+        inlined_responses = (job.dest.inlined_responses if job.dest else None) or []
+        for position, inlined in enumerate(inlined_responses):
+            index = int((inlined.metadata or {}).get("index", position))
+            if inlined.error or not inlined.response:
+                logger.warning(f"Batch request {index} of job {manifest.job_name} failed: {inlined.error}")
+                continue
+            results[index] = self._to_batch_model_msg(inlined.response, response_schema)
+        return results
+
+    def _build_generation_config(
+        self,
+        system_instruction: Optional[str] = None,
+        response_schema: Optional[Type[BaseModel]] = None,
+        tools: Optional[list[BaseTool] | types.ToolListUnion] = None,
+        tool_call_required: bool = False,
+        **extra_config_kwargs,
+    ) -> types.GenerateContentConfig:
+        """
+        Compose generation config for single request, per-request args override constructor-provided config.
+
+        Returns: GenerateContentConfig for the request.
+        """
         generation_config = self.generation_config
         if system_instruction or tools or response_schema or extra_config_kwargs:
             system_instruction = system_instruction or generation_config.system_instruction
@@ -144,11 +420,153 @@ class GeminiModel:
                 )
             updated_config_fields.update(extra_config_kwargs)
             generation_config = generation_config.model_copy(update=updated_config_fields)
+        return generation_config
+
+    def _apply_thinking_policy(
+        self, messages: list[BaseMsg], generation_config: types.GenerateContentConfig
+    ) -> tuple[RequestFeatures, ThinkingDecision, types.GenerateContentConfig]:
+        """
+        Let thinking policy choose thinking settings for the request.
+
+        Returns: Tuple (request features, thinking decision, generation config with the decision applied).
+        """
+        features = RequestFeatures.from_request(messages, generation_config)
+        decision = self.thinking_policy.decide(features)
+        thinking_update = {}
+        # thinking_budget and thinking_level are mutually exclusive in the API => setting one clears the other
+        if decision.thinking_budget is not None:
+            thinking_update = {"thinking_budget": decision.thinking_budget, "thinking_level": None}
+        if decision.thinking_level is not None:
+            thinking_update = {"thinking_budget": None, "thinking_level": decision.thinking_level}
+        thinking_config = (generation_config.thinking_config or types.ThinkingConfig()).model_copy(
+            update=thinking_update
+        )
+        config_update = {"thinking_config": thinking_config}
+        if decision.max_output_tokens is not None:
+            config_update["max_output_tokens"] = decision.max_output_tokens
+        return features, decision, generation_config.model_copy(update=config_update)
+
+    def _send_request(
+        self, messages: list[BaseMsg], generation_config: types.GenerateContentConfig, priority: RequestPriority
+    ) -> types.GenerateContentResponse:
+        """
+        Send request to Gemini API, waits for quota (if scheduler set) and hedges the request (if hedger set).
+        Request is rejected right away if circuit breaker is open.
+
+        Returns: Raw response from Gemini API.
+        """
+        probe = self.circuit_breaker.acquire_permission() if self.circuit_breaker else None
+        start = None
+        try:
+            estimated_tokens = None
+            if self.request_scheduler:
+                estimated_tokens = estimate_input_tokens(messages, generation_config.system_instruction)
+                self.request_scheduler.acquire(estimated_tokens, priority=priority)
+
+            start = time.monotonic()
+            send_request = partial(self._generate_content, messages, generation_config)
+            if self.request_hedger:
+                response = self.request_hedger.call(
+                    send_request, can_hedge=self._hedge_quota(estimated_tokens, priority)
+                )
+            else:
+                response = send_request()
+        except BaseException as ex:  # includes cancellation => permission is always released
+            if self.circuit_breaker:
+                latency = time.monotonic() - start if start is not None else None
+                self.circuit_breaker.record_error(ex, latency=latency, probe=probe)
+            raise
+        if self.circuit_breaker:
+            self.circuit_breaker.record_success(time.monotonic() - start, probe=probe)
+
+        if self.request_scheduler:
+            self._record_usage(estimated_tokens, response)
+        return response
+
+    async def _send_request_async(
+        self, messages: list[BaseMsg], generation_config: types.GenerateContentConfig, priority: RequestPriority
+    ) -> types.GenerateContentResponse:
+        """
+        Async version of _send_request().
 
-        response = self.gemini_client.models.generate_content(
+        Returns: Raw response from Gemini API.
+        """
+        probe = self.circuit_breaker.acquire_permission() if self.circuit_breaker else None
+        start = None
+        try:
+            estimated_tokens = None
+            if self.request_scheduler:
+                estimated_tokens = estimate_input_tokens(messages, generation_config.system_instruction)
+                await asyncio.to_thread(self.request_scheduler.acquire, estimated_tokens, priority=priority)
+
+            start = time.monotonic()
+            send_request = partial(self._generate_content_async, messages, generation_config)
+            if self.request_hedger:
+                can_hedge = self._hedge_quota(estimated_tokens, priority)
+                response = await self.request_hedger.acall(send_request, can_hedge=can_hedge)
+            else:
+                response = await send_request()
+        except BaseException as ex:  # includes cancellation => permission is always released
+            if self.circuit_breaker:
+                latency = time.monotonic() - start if start is not None else None
+                self.circuit_breaker.record_error(ex, latency=latency, probe=probe)
+            raise
+        if self.circuit_breaker:
+            self.circuit_breaker.record_success(time.monotonic() - start, probe=probe)
+
+        if self.request_scheduler:
+            self._record_usage(estimated_tokens, response)
+        return response
+
+    def _hedge_quota(self, estimated_tokens: Optional[int], priority: RequestPriority) -> Optional[Callable[[], bool]]:
+        """
+        Returns: Function taking scheduler quota for a hedge request (hedge is skipped when quota is short),
+                 None if no scheduler is set.
+        """
+        if self.request_scheduler is None:
+            return None
+        return partial(self.request_scheduler.try_acquire, estimated_tokens, priority=priority)
+
+    def _generate_content(
+        self, messages: list[BaseMsg], generation_config: types.GenerateContentConfig
+    ) -> types.GenerateContentResponse:
+        """
+        Single generate_content call of Gemini API.
+
+        Returns: Raw response from Gemini API.
+        """
+        return self.gemini_client.models.generate_content(model=self.model, contents=messages, config=generation_config)
+
+    async def _generate_content_async(
+        self, messages: list[BaseMsg], generation_config: types.GenerateContentConfig
+    ) -> types.GenerateContentResponse:
+        """
+        Async version of _generate_content().
+
+        Returns: Raw response from Gemini API.
+        """
+        return await self.gemini_client.aio.models.generate_content(
             model=self.model, contents=messages, config=generation_config
         )
 
+    def _record_usage(self, estimated_tokens: int, response: types.GenerateContentResponse):
+        """
+        Report real number of input tokens to the request scheduler.
+        """
+        usage = response.usage_metadata
+        self.request_scheduler.record_usage(estimated_tokens, usage.prompt_token_count if usage else None)
+
+    def _to_model_msg(
+        self,
+        response: types.GenerateContentResponse,
+        generation_config: types.GenerateContentConfig,
+        compiled_schema: Optional[CompiledSchema] = None,
+    ) -> ModelMsg:
+        """
+        Convert raw Gemini API response to ModelMsg.
+
+        Returns: ModelMsg with response parts, parsed structured output is filled if response schema was set.
+        """
         if not response.candidates or not response.candidates[0].content.parts:
             logger.warning(
                 f"Gemini returned an empty response. "
@@ -157,7 +575,32 @@ class GeminiModel:
             return ModelMsg(parts=[])
 
         parsed = None
-        if generation_config.response_schema:
+        if compiled_schema is not None:
+            parsed = self.schema_cache.parse(compiled_schema, response)
+        elif generation_config.response_schema:
             parsed = response.parsed
 
         return ModelMsg(parts=response.parts, parsed=parsed)
+
+    def _to_batch_model_msg(self, response: types.GenerateContentResponse, response_schema: Optional[type]) -> ModelMsg:
+        """
+        Convert response from Batch API to ModelMsg. Batch API doesn't parse structured outputs, they are parsed here.
+
+        Returns: ModelMsg with response parts, parsed structured output is filled if response schema was set.
+        """
+        if not response.candidates or not response.candidates[0].content or not response.candidates[0].content.parts:
+            return ModelMsg(parts=[])
+        parts = response.candidates[0].content.parts
+        parsed = None
+        compiled_schema = self.schema_cache.get(response_schema) if self.schema_cache and response_schema else None
+        if response_schema and response.text:
+            try:
+                if compiled_schema is not None:
+                    parsed = compiled_schema.parse_json(response.text, validate=self.schema_cache.validate)
+                elif isinstance(response_schema, type) and issubclass(response_schema, BaseModel):
+                    parsed = response_schema.model_validate_json(response.text)
+                else:
+                    parsed = json.loads(response.text)
+            except ValueError as ex:
+                logger.warning(f"Failed to parse structured output of batch response: {ex}")
+        return ModelMsg(parts=parts, parsed=parsed)
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from google.genai import Client, errors, types
+
+from llmbrix.gemini_model import GeminiModel
+from llmbrix.msg import BaseMsg
+from llmbrix.serving import SHARED_CLIENT_REGISTRY, PooledClient
+
+logger = logging.getLogger(__name__)
+
+QUOTA_EXCEEDED_CODE = 429
+SERVER_ERROR_MIN_CODE = 500
+
+
+class GeminiModelPool(GeminiModel):
+    """
+    GeminiModel load balancing requests across a pool of Gemini API clients (different API keys or projects /
+    regions) => throughput can scale past quota of a single API key.
+
+    Each request is routed to the least-loaded healthy client (fewest in-flight requests).
+    Client which returns quota (429) or server (5xx) error is temporarily ejected from the pool and the request is
+    retried on another client. If all clients are ejected requests go to the client ejected the longest time ago.
+
+    Per-client usage statistics are available via stats().
+    """
+
+    def __init__(
+        self,
+        gemini_clients: list[Client],
+        ejection_time: float = 30.0,
+        max_failover: int = 1,
+        **kwargs,
+    ):
+        """
+        Args:
+            gemini_clients: List of Client objects from google-genai SDK.
+            ejection_time: Number of seconds client is ejected from the pool after quota / server error.
+            max_failover: Maximum number of retries on other clients after quota / server error.
+            **kwargs: will be passed to GeminiModel.__init__, see its docs for reference.
+        """
+        if not gemini_clients:
+            raise ValueError("At least one gemini client has to be provided.")
+        super().__init__(gemini_client=gemini_clients[0], **kwargs)
+        self.pooled_clients = [PooledClient(client=c, name=f"client_{i}") for i, c in enumerate(gemini_clients)]
+        self.ejection_time = ejection_time
+        self.max_failover = max_failover
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_gemini_api_keys(cls, google_api_keys: list[str], **kwargs):
+        """
+        Constructs GeminiModelPool from list of API keys, clients are taken from the shared client registry.
+
+        Args:
+            google_api_keys: list of str Gemini API keys
+            **kwargs: will be passed to __init__, see docs of __init__ for reference.
+
+        Returns: Initialized instance of GeminiModelPool
+        """
+        gemini_clients = [SHARED_CLIENT_REGISTRY.get(api_key=key) for key in google_api_keys]
+        return cls(gemini_clients=gemini_clients, **kwargs)
+
+    def stats(self) -> list[dict]:
+        """
+        Usage statistics of each client in the pool.
+
+        Returns: list of dicts with name, health, number of in-flight requests, requests, errors, ejections
+                 and average latency of each client.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [c.stats(now) for c in self.pooled_clients]
+
+    def warmup(self, connections: int = 1):
+        """
+        Pre-establish connections for every client in the pool, see GeminiModel.warmup().
+
+        Args:
+            connections: Number of connections to open per client.
+        """
+        with ThreadPoolExecutor(max_workers=connections * len(self.pooled_clients)) as executor:
+            futures = [
+                executor.submit(c.client.models.get, model=self.model)
+                for c in self.pooled_clients
+                for _ in range(connections)
+            ]
+            for future in futures:
+                future.result()
+
+    async def warmup_async(self, connections: int = 1):
+        """
+        Async version of warmup().
+
+        Args:
+            connections: Number of connections to open per client.
+        """
+        await asyncio.gather(
+            *[c.client.aio.models.get(model=self.model) for c in self.pooled_clients for _ in range(connections)]
+        )
+
+    def _generate_content(
+        self, messages: list[BaseMsg], generation_config: types.GenerateContentConfig
+    ) -> types.GenerateContentResponse:
+        """
+        Single generate_content call routed to the least-loaded healthy client, fails over on quota / server errors.
+
+        Returns: Raw response from Gemini API.
+        """
+        tried = []
+        while True:
+            pooled = self._acquire_client(exclude=tried)
+            start = time.monotonic()
+            failed = False
+            try:
+                return pooled.client.models.generate_content(
+                    model=self.model, contents=messages, config=generation_config
+                )
+            except errors.APIError as ex:
+                failed = True
+                tried.append(pooled)
+                if not self._eject_client(pooled, ex) or not self._can_failover(tried):
+                    raise
+            except Exception:
+                failed = True
+                raise
+            finally:  # also on cancellation (e.g. losing hedged request) => in-flight count never leaks
+                self._release_client(pooled, start, failed=failed)
+
+    async def _generate_content_async(
+        self, messages: list[BaseMsg], generation_config: types.GenerateContentConfig
+    ) -> types.GenerateContentResponse:
+        """
+        Async version of _generate_content().
+
+        Returns: Raw response from Gemini API.
+        """
+        tried = []
+        while True:
+            pooled = self._acquire_client(exclude=tried)
+            start = time.monotonic()
+            failed = False
+            try:
+                return await pooled.client.aio.models.generate_content(
+                    model=self.model, contents=messages, config=generation_config
+                )
+            except errors.APIError as ex:
+                failed = True
+                tried.append(pooled)
+                if not self._eject_client(pooled, ex) or not self._can_failover(tried):
+                    raise
+            except Exception:
+                failed = True
+                raise
+            finally:  # also on cancellation (e.g. losing hedged request) => in-flight count never leaks
+                self._release_client(pooled, start, failed=failed)
+
+    def _acquire_client(self, exclude: list[PooledClient]) -> PooledClient:
+        """
+        Pick client for the next request and mark request as in-flight.
+
+        Args:
+            exclude: Clients which already failed for this request.
+
+        Returns: Least-loaded healthy client. If no healthy client is available the one ejected earliest.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [c for c in self.pooled_clients if c not in exclude] or self.pooled_clients
+            healthy = [c for c in candidates if c.is_healthy(now)]
+            if healthy:
+                pooled = min(healthy, key=lambda c: (c.in_flight, c.n_requests))
+            else:
+                pooled = min(candidates, key=lambda c: c.ejected_until)
+            pooled.in_flight += 1
+            pooled.n_requests += 1
+            return pooled
+
+    def _release_client(self, pooled: PooledClient, start: float, failed: bool = False):
+        """
+        Mark request as finished and update client stats.
+
+        Args:
+            pooled: Client which handled the request.
+            start: time.monotonic() timestamp of request start.
+            failed: True if the request raised an error.
+        """
+        now = time.monotonic()
+        with self._lock:
+            pooled.in_flight -= 1
+            pooled.total_latency += now - start
+            if failed:
+                pooled.n_errors += 1
+
+    def _eject_client(self, pooled: PooledClient, error: errors.APIError) -> bool:
+        """
+        Temporarily eject client from the pool on quota / server error.
+
+        Args:
+            pooled: Client which handled the request.
+            error: Error returned by Gemini API.
+
+        Returns: True if client was ejected.
+        """
+        if error.code != QUOTA_EXCEEDED_CODE and error.code < SERVER_ERROR_MIN_CODE:
+            return False
+        with self._lock:
+            pooled.n_ejections += 1
+            pooled.ejected_until = time.monotonic() + self.ejection_time
+        logger.warning(
+            f"Ejecting Gemini client {pooled.name} for {self.ejection_time}s after error {error.code}: {error}"
+        )
+        return True
+
+    def _can_failover(self, tried: list[PooledClient]) -> bool:
+        """
+        Returns: True if request can be retried on another client.
+        """
+        return len(tried) <= self.max_failover and len(tried) < len(self.pooled_clients)
@@ -0,0 +1,272 @@
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from llmbrix.gemini_model import GeminiModel
+from llmbrix.msg import BaseMsg, ModelMsg, ToolMsg, UserMsg
+from llmbrix.serving import RequestPriority
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a rolling summary of a conversation between a user and an AI assistant. "
+    "Update the existing summary with the new conversation excerpt. Keep facts, decisions, user preferences "
+    "and open questions, drop small talk. Write at most {max_words} words, output only the summary."
+)
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+MAX_TOOL_RESULT_CHARS = 500
+
+_SHARED_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="history_compactor")
+
+
+class HistoryCompactor:
+    """
+    Folds conversation turns evicted from ChatHistory into a rolling summary, so long-range memory survives
+    while context sent to the model stays small.
+
+    Summarization is a cheap GeminiModel call running in background (off the request path). Evicted turns
+    queued while a summarization runs are folded in by the next one (in order). New summary replaces the old
+    one together with the messages it covers atomically once ready, until then the previous summary and the
+    original messages are used (see unsummarized_messages()). Failed summarization is retried with exponential
+    backoff, after max_retries failures its messages are dropped. Number of unsummarized messages is capped,
+    the oldest queued ones are dropped (with a warning) when the summarizer can't keep up.
+
+    Use one compactor per ChatHistory.
+    """
+
+    def __init__(
+        self,
+        model: GeminiModel,
+        max_summary_words: int = 200,
+        executor: Optional[Executor] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 2.0,
+        max_unsummarized_messages: int = 100,
+    ):
+        """
+        Args:
+            model: Model used for summarization, use a fast / cheap one (e.g. flash-lite).
+            max_summary_words: Soft limit on length of the summary.
+            executor: Executor running summarizations, defaults to executor shared by all compactors.
+            max_retries: Number of retries of a failed summarization before its messages are dropped.
+            retry_backoff: Delay before the first retry in seconds, doubled with every further retry.
+            max_unsummarized_messages: Maximum number of evicted messages waiting for summarization.
+        """
+        self.model = model
+        self.max_summary_words = max_summary_words
+        self.executor = executor or _SHARED_EXECUTOR
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_unsummarized_messages = max_unsummarized_messages
+        self.n_compactions = 0
+        self.n_dropped = 0
+        # (summary, summary message, evicted messages not covered by the summary), swapped as a whole => atomic
+        self._summary: tuple[Optional[str], Optional[UserMsg], tuple[BaseMsg, ...]] = (None, None, ())
+        self._pending: list[BaseMsg] = []
+        self._running = False
+        self._n_failures = 0
+        self._retry_timer: Optional[threading.Timer] = None
+        self._idle = threading.Condition()
+        self._on_update: Optional[Callable[[], None]] = None
+
+    @property
+    def state(self) -> tuple[Optional[str], Optional[UserMsg], tuple[BaseMsg, ...]]:
+        """
+        Returns: Immutable snapshot (summary, summary message, evicted messages not covered by the summary).
+        """
+        return self._summary
+
+    def subscribe(self, on_update: Callable[[], None]):
+        """
+        Register callback invoked after summary changes in background (used by ChatHistory to publish
+        its turns together with compactor state). Not invoked by submit().
+
+        Args:
+            on_update: Callback without arguments, called outside of compactor locks.
+        """
+        self._on_update = on_update
+
+    @property
+    def summary(self) -> Optional[str]:
+        """
+        Returns: Current rolling summary, None if nothing was summarized yet.
+        """
+        return self._summary[0]
+
+    def summary_msg(self) -> Optional[UserMsg]:
+        """
+        Returns: UserMsg with current summary to be placed at the beginning of chat history, None if no summary.
+        """
+        return self._summary[1]
+
+    def unsummarized_messages(self) -> list[BaseMsg]:
+        """
+        Returns: Evicted messages not folded into the summary yet (queued, in progress or failed), oldest first.
+        """
+        return list(self._summary[2])
+
+    def restore(self, summary: str):
+        """
+        Set summary restored from persistent storage (see ChatSessionStore).
+
+        Args:
+            summary: Previously computed summary.
+        """
+        with self._idle:
+            self._summary = (summary, UserMsg(text=SUMMARY_PREFIX + summary), self._summary[2])
+        self._notify_update()
+
+    def fork(self) -> "HistoryCompactor":
+        """
+        Create compactor for a forked chat history, starting from the current summary.
+
+        Returns: New HistoryCompactor with the same settings and summary.
+        """
+        forked = HistoryCompactor(
+            self.model,
+            max_summary_words=self.max_summary_words,
+            executor=self.executor,
+            max_retries=self.max_retries,
+            retry_backoff=self.retry_backoff,
+            max_unsummarized_messages=self.max_unsummarized_messages,
+        )
+        forked._summary = self._summary
+        forked._pending = list(self._summary[2])  # summarized by the fork on its first submit
+        return forked
+
+    def submit(self, messages: list[BaseMsg]):
+        """
+        Queue evicted messages for summarization, returns immediately.
+
+        Args:
+            messages: Messages of evicted conversation turn(s), oldest first.
+        """
+        with self._idle:
+            self._pending.extend(messages)
+            summary, summary_msg, unsummarized = self._summary
+            self._summary = (summary, summary_msg, unsummarized + tuple(messages))
+            self._enforce_cap()
+            if self._running or self._retry_timer is not None:  # queued messages are taken by the next run
+                return
+            self._running = True
+        self.executor.submit(self._run)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until all queued messages are summarized (or dropped after failed retries).
+
+        Args:
+            timeout: Maximum number of seconds to wait.
+
+        Returns: True if compactor is idle, False on timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._running and self._retry_timer is None, timeout=timeout)
+
+    def _run(self):
+        """
+        Summarize queued messages until the queue is empty.
+        On failure the batch is put back to the queue and retried after backoff, or dropped after max_retries.
+        """
+        while True:
+            with self._idle:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._running = False
+                    self._idle.notify_all()
+                    return
+            try:
+                summary = self._summarize(self.summary, batch)
+            except Exception as ex:
+                logger.warning(f"History compaction of {len(batch)} messages failed: {ex}")
+                summary = None
+            with self._idle:
+                batch_ids = {id(m) for m in batch}
+                remaining = tuple(m for m in self._summary[2] if id(m) not in batch_ids)
+                if summary:
+                    self._n_failures = 0
+                    self._summary = (summary, UserMsg(text=SUMMARY_PREFIX + summary), remaining)
+                    self.n_compactions += 1
+                elif self._n_failures >= self.max_retries:
+                    logger.warning(
+                        f"History compaction failed {self._n_failures + 1} times, dropping {len(batch)} messages."
+                    )
+                    self._n_failures = 0
+                    self.n_dropped += len(batch)
+                    self._summary = (self._summary[0], self._summary[1], remaining)
+                else:
+                    self._n_failures += 1
+                    self._pending = batch + self._pending
+                    delay = self.retry_backoff * 2 ** (self._n_failures - 1)
+                    self._retry_timer = threading.Timer(delay, self._retry)
+                    self._retry_timer.daemon = True
+                    self._retry_timer.start()
+                    self._running = False
+                    self._idle.notify_all()
+                    return
+            self._notify_update()
+
+    def _retry(self):
+        """
+        Restart summarization of queued messages once the retry backoff elapsed.
+        """
+        with self._idle:
+            self._retry_timer = None
+            if self._running:
+                return
+            if not self._pending:
+                self._idle.notify_all()
+                return
+            self._running = True
+        self.executor.submit(self._run)
+
+    def _enforce_cap(self):
+        """
+        Drop the oldest queued messages over max_unsummarized_messages. Lock has to be held.
+        """
+        summary, summary_msg, unsummarized = self._summary
+        n_excess = min(len(unsummarized) - self.max_unsummarized_messages, len(self._pending))
+        if n_excess <= 0:
+            return
+        dropped, self._pending = self._pending[:n_excess], self._pending[n_excess:]
+        dropped_ids = {id(m) for m in dropped}
+        self._summary = (summary, summary_msg, tuple(m for m in unsummarized if id(m) not in dropped_ids))
+        self.n_dropped += n_excess
+        logger.warning(f"Too many messages waiting for history compaction, {n_excess} oldest messages dropped.")
+
+    def _notify_update(self):
+        if self._on_update is not None:
+            try:
+                self._on_update()
+            except Exception:
+                logger.warning("Compactor update callback failed.", exc_info=True)
+
+    def _summarize(self, summary: Optional[str], messages: list[BaseMsg]) -> str:
+        """
+        Returns: Previous summary updated with the messages.
+        """
+        transcript = "\n".join(line for line in (_render(m) for m in messages) if line)
+        prompt = f"Existing summary:\n{summary or '(empty)'}\n\nNew conversation excerpt:\n{transcript}"
+        response = self.model.generate(
+            [UserMsg(text=prompt)],
+            system_instruction=SUMMARY_INSTRUCTION.format(max_words=self.max_summary_words),
+            priority=RequestPriority.BATCH,
+        )
+        return response.text.strip()
+
+
+def _render(msg: BaseMsg) -> str:
+    """
+    Returns: Compact text form of message for summarization prompt.
+    """
+    if isinstance(msg, ToolMsg):
+        response = msg.parts[0].function_response.response if msg.parts else None
+        return f"TOOL {msg.tool_name}: {str(response)[:MAX_TOOL_RESULT_CHARS]}"
+    if isinstance(msg, ModelMsg):
+        calls = ", ".join(c.name for c in msg.tool_calls)
+        return f"ASSISTANT: {msg.text}" + (f" [called tools: {calls}]" if calls else "")
+    parts = msg.parts or []
+    text = " ".join(p.text for p in parts if p.text)
+    n_attachments = sum(1 for p in parts if p.inline_data or p.file_data)
+    return f"USER: {text}" + (f" [{n_attachments} attachment(s)]" if n_attachments else "")
@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+
+from llmbrix.gemini_model import GeminiModel
+from llmbrix.msg import BaseMsg, ModelMsg
+
+logger = logging.getLogger(__name__)
+
+
+class ModelCascade:
+    """
+    Cheap-first model cascade with the same generate() interface as GeminiModel.
+
+    Request is sent to the fastest / cheapest model first and escalated to the next (bigger) model only if
+    response of the current one fails a check:
+        - empty response (no text, no tool calls, no parsed output)
+        - structured output missing or not matching the response schema
+        - confidence field of structured output below threshold
+        - custom predicate
+    Response of the last model is always returned.
+
+    => most traffic is served with low latency, only hard cases pay for the bigger model.
+    Escalations are logged, per-tier escalation rate and latency are available via stats().
+    """
+
+    def __init__(
+        self,
+        models: list[GeminiModel],
+        escalate_on_empty: bool = True,
+        escalate_on_invalid_parsed: bool = True,
+        confidence_field: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        should_escalate: Optional[Callable[[ModelMsg], bool]] = None,
+    ):
+        """
+        Args:
+            models: GeminiModel instances ordered from the cheapest / fastest to the biggest one.
+            escalate_on_empty: Escalate if model returned empty response.
+            escalate_on_invalid_parsed: Escalate if response schema was requested but .parsed is missing or
+                                        is not an instance of the schema.
+            confidence_field: Name of confidence field of the structured output (see min_confidence).
+            min_confidence: Escalate if value of confidence_field in .parsed is lower than this.
+            should_escalate: Custom predicate, escalate if it returns True for the response.
+        """
+        if not models:
+            raise ValueError("At least one model has to be provided.")
+        if (confidence_field is None) != (min_confidence is None):
+            raise ValueError("confidence_field and min_confidence have to be set together.")
+        self.models = models
+        self.escalate_on_empty = escalate_on_empty
+        self.escalate_on_invalid_parsed = escalate_on_invalid_parsed
+        self.confidence_field = confidence_field
+        self.min_confidence = min_confidence
+        self.should_escalate = should_escalate
+        self._n_requests = [0] * len(models)
+        self._n_escalations = [0] * len(models)
+        self._total_latency = [0.0] * len(models)
+        self._lock = threading.Lock()
+
+    def generate(self, messages: list[BaseMsg], **kwargs) -> ModelMsg:
+        """
+        Generate response, escalating to bigger models when checks fail.
+
+        Args:
+            messages: Chat history consisting of BaseMsg objects.
+            **kwargs: will be passed to GeminiModel.generate(), see its docs for reference.
+
+        Returns: ModelMsg from the first model whose response passed all checks (or from the last model).
+        """
+        for tier, model in enumerate(self.models):
+            start = time.monotonic()
+            msg = model.generate(messages, **kwargs)
+            if not self._finish_tier(tier, model, msg, time.monotonic() - start, kwargs.get("response_schema")):
+                return msg
+
+    async def generate_async(self, messages: list[BaseMsg], **kwargs) -> ModelMsg:
+        """
+        Async version of generate().
+
+        Args:
+            messages: Chat history consisting of BaseMsg objects.
+            **kwargs: will be passed to GeminiModel.generate_async(), see its docs for reference.
+
+        Returns: ModelMsg from the first model whose response passed all checks (or from the last model).
+        """
+        for tier, model in enumerate(self.models):
+            start = time.monotonic()
+            msg = await model.generate_async(messages, **kwargs)
+            if not self._finish_tier(tier, model, msg, time.monotonic() - start, kwargs.get("response_schema")):
+                return msg
+
+    def stats(self) -> list[dict]:
+        """
+        Returns: list with dict for each tier containing model name, number of requests, escalation rate
+                 and average latency.
+        """
+        with self._lock:
+            return [
+                {
+                    "model": model.model,
+                    "n_requests": self._n_requests[i],
+                    "escalation_rate": self._n_escalations[i] / self._n_requests[i] if self._n_requests[i] else 0.0,
+                    "avg_latency": self._total_latency[i] / self._n_requests[i] if self._n_requests[i] else None,
+                }
+                for i, model in enumerate(self.models)
+            ]
+
+    def escalation_reason(self, msg: ModelMsg, response_schema: Optional[type] = None) -> str | None:
+        """
+        Run escalation checks on a response.
+
+        Args:
+            msg: Response of the model.
+            response_schema: Response schema the structured output has to match.
+
+        Returns: str reason for escalation, None if response passed all checks.
+        """
+        if self.escalate_on_empty and not (msg.text or msg.tool_calls or msg.parsed is not None):
+            return "empty response"
+        if response_schema is not None and self.escalate_on_invalid_parsed:
+            if msg.parsed is None:
+                return "structured output missing"
+            if isinstance(response_schema, type) and issubclass(response_schema, BaseModel):
+                if not isinstance(msg.parsed, response_schema):
+                    return "structured output does not match response schema"
+        if self.confidence_field is not None:
+            parsed = msg.parsed
+            confidence = parsed.get(self.confidence_field) if isinstance(parsed, dict) else None
+            if confidence is None:
+                confidence = getattr(parsed, self.confidence_field, None)
+            if confidence is None or confidence < self.min_confidence:
+                return f"{self.confidence_field}={confidence} below {self.min_confidence}"
+        if self.should_escalate is not None and self.should_escalate(msg):
+            return "custom predicate"
+        return None
+
+    def _finish_tier(
+        self, tier: int, model: GeminiModel, msg: ModelMsg, latency: float, response_schema: Optional[type]
+    ) -> bool:
+        """
+        Record tier stats and decide about escalation.
+
+        Returns: True if request has to be escalated to the next tier.
+        """
+        reason = None
+        if tier < len(self.models) - 1:
+            reason = self.escalation_reason(msg, response_schema or model.generation_config.response_schema)
+        with self._lock:
+            self._n_requests[tier] += 1
+            self._total_latency[tier] += latency
+            if reason is not None:
+                self._n_escalations[tier] += 1
+            escalation_rate = self._n_escalations[tier] / self._n_requests[tier]
+        if reason is None:
+            logger.debug(f"Cascade served by tier {tier} ({model.model}) in {latency:.2f}s.")
+            return False
+        logger.info(
+            f"Cascade escalating from tier {tier} ({model.model}) to {self.models[tier + 1].model}: {reason}. "
+            f"Tier latency: {latency:.2f}s, tier escalation rate: {escalation_rate:.1%}."
+        )
+        return True
@@ -1,4 +1,6 @@
 from .base_msg import BaseMsg
+from .image_encoder import SHARED_IMAGE_ENCODER, ImageEncoder
+from .media_handle import MediaHandle
 from .model_msg import ModelMsg
 from .model_msg_segment import ModelMsgSegment
 from .model_msg_segment_types import ModelMsgSegmentTypes
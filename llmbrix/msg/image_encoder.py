@@ -0,0 +1,159 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import PIL.Image
+from google.genai import types
+
+LOSSLESS_MODES = ("1", "L", "LA", "P", "RGBA", "PA")
+
+
+class ImageEncoder:
+    """
+    Encodes PIL images to Gemini request parts.
+
+        - images larger than max_size are downsized (Gemini downscales them anyway, full resolution only inflates
+          request payload and encoding time)
+        - photos are encoded as JPEG with given quality, images with transparency or palette / grayscale images
+          (screenshots, diagrams) as PNG, WEBP keeps transparency
+        - multiple images are encoded in parallel in a thread pool (PIL releases GIL while encoding)
+        - encoded bytes are cached by hash of image content (pixels, mode and size) => repeated images (also
+          reloaded copies) are encoded only once, images modified in place are encoded again
+
+    Encoding is lossy, therefore opt-in: UserMsg uses encode_original() unless an encoder is passed.
+    Thread safe, share one instance (see SHARED_IMAGE_ENCODER).
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = 3072,
+        jpeg_quality: int = 85,
+        image_format: Optional[str] = None,
+        max_workers: int = 4,
+        cache_size: int = 128,
+    ):
+        """
+        Args:
+            max_size: Maximum width / height in pixels, larger images are downsized keeping aspect ratio.
+                      None => images are never resized.
+            jpeg_quality: Quality of JPEG encoding (1-95).
+            image_format: Force output format ("JPEG", "PNG", "WEBP"). None => picked automatically per image.
+            max_workers: Number of threads used to encode multiple images.
+            cache_size: Maximum number of cached encoded images, 0 disables caching.
+        """
+        self.max_size = max_size
+        self.jpeg_quality = jpeg_quality
+        self.image_format = image_format
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.n_cache_hits = 0
+        self.n_cache_misses = 0
+        self._cache: OrderedDict[bytes, types.Blob] = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def encode(self, image: PIL.Image.Image) -> types.Part:
+        """
+        Encode single image.
+
+        Args:
+            image: PIL image.
+
+        Returns: Part with inline image data.
+        """
+        key = self._cache_key(image) if self.cache_size else None
+        if key is not None:
+            with self._lock:
+                blob = self._cache.get(key)
+                if blob is not None:
+                    self._cache.move_to_end(key)
+                    self.n_cache_hits += 1
+                    return types.Part(inline_data=blob)
+                self.n_cache_misses += 1
+        blob = self._encode(image)
+        if key is not None:
+            with self._lock:
+                self._cache[key] = blob
+                self._cache.move_to_end(key)
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return types.Part(inline_data=blob)
+
+    def encode_many(self, images: list[PIL.Image.Image]) -> list[types.Part]:
+        """
+        Encode multiple images in parallel.
+
+        Args:
+            images: PIL images.
+
+        Returns: Parts with inline image data, in order of images.
+        """
+        if len(images) <= 1 or self.max_workers <= 1:
+            return [self.encode(img) for img in images]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="image_encoder")
+        return list(self._executor.map(self.encode, images))
+
+    def _encode(self, image: PIL.Image.Image) -> types.Blob:
+        """
+        Downsize and encode image.
+
+        Returns: Blob with encoded bytes and MIME type.
+        """
+        if self.max_size and max(image.size) > self.max_size:
+            image = image.copy()
+            image.thumbnail((self.max_size, self.max_size), PIL.Image.Resampling.LANCZOS)
+        image_format = self.image_format or ("PNG" if image.mode in LOSSLESS_MODES else "JPEG")
+        save_params = {}
+        if image_format == "JPEG":
+            save_params["quality"] = self.jpeg_quality
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+        elif image_format == "WEBP":
+            save_params["quality"] = self.jpeg_quality
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if _has_alpha(image) else "RGB")
+        else:
+            save_params["optimize"] = False  # optimize pass is slow and saves little
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, **save_params)
+        return types.Blob(data=buffer.getvalue(), mime_type=f"image/{image_format.lower()}")
+
+    @staticmethod
+    def _cache_key(image: PIL.Image.Image) -> bytes:
+        """
+        Returns: Hash of image content (pixels, mode and size), much cheaper than encoding the image.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{image.mode}:{image.size}".encode())
+        digest.update(image.tobytes())
+        return digest.digest()
+
+
+def encode_original(image: PIL.Image.Image) -> types.Part:
+    """
+    Convert image to part without resizing or lossy re-encoding. Pixels in memory are encoded (in-place edits are
+    kept): JPEG images are re-encoded with their original quantization tables, other images as PNG.
+
+    Args:
+        image: PIL image.
+
+    Returns: Part with inline image data.
+    """
+    buffer = io.BytesIO()
+    if image.format == "JPEG" and image.mode in ("RGB", "L", "CMYK"):
+        image.save(buffer, format="JPEG", quality="keep")
+        return types.Part(inline_data=types.Blob(data=buffer.getvalue(), mime_type="image/jpeg"))
+    image.save(buffer, format="PNG")
+    return types.Part(inline_data=types.Blob(data=buffer.getvalue(), mime_type="image/png"))
+
+
+def _has_alpha(image: PIL.Image.Image) -> bool:
+    return "A" in image.getbands() or "transparency" in image.info
+
+
+SHARED_IMAGE_ENCODER = ImageEncoder()
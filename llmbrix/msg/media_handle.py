@@ -0,0 +1,170 @@
+import io
+import mmap
+import os
+import tempfile
+import weakref
+from typing import BinaryIO, Optional
+
+import PIL.Image
+
+
+class MediaHandle:
+    """
+    Lazy, zero-copy handle to binary media (image / audio) returned by the model.
+
+    Wraps a memoryview over the original bytes, nothing is copied or decoded until requested:
+        - view() / open() give access to raw bytes without copying
+        - image() opens image lazily (PIL decodes pixels only on first pixel access)
+        - image(draft_size=...) / thumbnail() use JPEG draft mode => decoding at reduced resolution is much cheaper
+
+    Large payloads can be spilled to a temporary file (spill()), afterwards the bytes are accessed via mmap and the
+    handle no longer keeps the original bytes in memory. Temporary file is deleted with the handle.
+    """
+
+    def __init__(self, data: bytes | memoryview, mime_type: str):
+        """
+        Args:
+            data: Media bytes (not copied).
+            mime_type: MIME type of the media.
+        """
+        self.mime_type = mime_type
+        self.nbytes = len(data)
+        self._view: Optional[memoryview] = memoryview(data)
+        self._path: Optional[str] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+    @property
+    def is_spilled(self) -> bool:
+        """
+        Returns: True if media was moved to a temporary file.
+        """
+        return self._path is not None
+
+    def view(self) -> memoryview:
+        """
+        Returns: Read-only memoryview over media bytes (mmap of temporary file if spilled).
+        """
+        if self._view is None:
+            with open(self._path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.nbytes else None
+            self._view = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+            self._finalizer.detach()
+            self._finalizer = weakref.finalize(self, _release, self._path, self._mmap)
+        return self._view.toreadonly()
+
+    def tobytes(self) -> bytes:
+        """
+        Returns: Copy of media bytes.
+        """
+        return self.view().tobytes()
+
+    def open(self) -> BinaryIO:
+        """
+        Returns: Binary file-like object with media bytes. Doesn't copy bytes held in memory.
+                 For spilled media this is an open file, caller is responsible for closing it.
+        """
+        if self._view is None:
+            return open(self._path, "rb")
+        if isinstance(self._view.obj, bytes) and len(self._view.obj) == self.nbytes:
+            return io.BytesIO(self._view.obj)  # BytesIO shares buffer of bytes object until written to
+        return io.BufferedReader(_MemoryviewRaw(self._view))
+
+    def image(self, draft_size: Optional[tuple[int, int]] = None) -> PIL.Image.Image:
+        """
+        Open media as image. Pixels are decoded lazily on first access.
+
+        Args:
+            draft_size: Optional (width, height) hint, JPEG images are decoded at the smallest scale
+                        (1/2, 1/4, 1/8) still larger than this size => much faster decoding of previews.
+
+        Returns: PIL image.
+        """
+        if self._view is None:
+            with open(self._path, "rb") as f:
+                img = PIL.Image.open(io.BytesIO(f.read()))
+        else:
+            img = PIL.Image.open(self.open())
+        if draft_size is not None:
+            img.draft("RGB", draft_size)
+        return img
+
+    def thumbnail(self, size: tuple[int, int]) -> PIL.Image.Image:
+        """
+        Decode image downscaled to fit into size (aspect ratio is kept).
+
+        Args:
+            size: Maximum (width, height) of the thumbnail.
+
+        Returns: Decoded PIL image.
+        """
+        img = self.image(draft_size=size)
+        img.thumbnail(size)
+        return img
+
+    def spill(self, directory: Optional[str] = None):
+        """
+        Move media bytes to a temporary file, the handle then reads them via mmap.
+        Reference to the original bytes is dropped. Does nothing if already spilled.
+
+        Args:
+            directory: Directory of the temporary file, defaults to system temp dir.
+        """
+        if self._path is not None:
+            return
+        fd, path = tempfile.mkstemp(prefix="llmbrix_media_", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._view)
+        self._view.release()
+        self._view = None
+        self._path = path
+        self._finalizer = weakref.finalize(self, _release, path, None)
+
+    def __len__(self) -> int:
+        return self.nbytes
+
+    def __repr__(self) -> str:
+        return f"MediaHandle(mime_type={self.mime_type!r}, nbytes={self.nbytes}, spilled={self.is_spilled})"
+
+
+class _MemoryviewRaw(io.RawIOBase):
+    """
+    Raw reader over memoryview, used to read sliced buffers without copying them upfront.
+    """
+
+    def __init__(self, view: memoryview):
+        self._view = view.cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._pos : self._pos + len(buffer)]
+        n = len(chunk)
+        buffer[:n] = chunk
+        self._pos += n
+        return n
+
+
+def _release(path: str, mapped: Optional[mmap.mmap]):
+    if mapped is not None:
+        try:
+            mapped.close()
+        except BufferError:  # memoryview over mmap still referenced
+            pass
+    try:
+        os.remove(path)
+    except OSError:
+        pass
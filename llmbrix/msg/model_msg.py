@@ -1,12 +1,12 @@
-import io
 import logging
 from functools import cached_property
-from typing import Any, Optional
+from typing import Any, BinaryIO, ClassVar, Optional
 
 import PIL.Image
 from google.genai import types
 
 from llmbrix.msg.base_msg import BaseMsg
+from llmbrix.msg.media_handle import MediaHandle
 from llmbrix.msg.model_msg_segment import ModelMsgSegment
 from llmbrix.msg.model_msg_segment_types import ModelMsgSegmentTypes
 
@@ -28,7 +28,7 @@ class ModelMsg(BaseMsg):
 
     Use `.segments` property to get a list of segments in correct order to be rendered.
     Use `.text` to get concatenation of all text segments. Useful in cases where LLM is used just to output text.
-    Use `.images` to get list of PIL images.
+    Use `.images` to get list of PIL images, `.image_handles` / `.audio_handles` for lazy zero-copy media access.
 
     Note `.text` might be empty in cases where `.tool_calls` are present (model requests tool execution and waits).
 
@@ -40,8 +40,14 @@ class ModelMsg(BaseMsg):
     lazy fashion and not registered as Pydantic object attributes.
 
     Due to property caching this implementation sacrifices higher memory usage for lower CPU load at attribute access.
+
+    Inline images / audio of at least `ModelMsg.spill_threshold` bytes (disabled by default) are spilled to temporary
+    files when the message is created, see spill_media().
     """
 
+    spill_threshold: ClassVar[Optional[int]] = None
+    spill_dir: ClassVar[Optional[str]] = None
+
     parsed: Optional[Any] = None
 
     def __init__(self, parts: list[types.Part], parsed: Optional[dict] = None):
@@ -53,6 +59,8 @@ class ModelMsg(BaseMsg):
                     the value will be stored in .parsed attribute.
         """
         super().__init__(role=MODEL_ROLE_NAME, parts=parts, parsed=parsed)
+        if self.spill_threshold is not None:
+            self.spill_media(min_bytes=self.spill_threshold, directory=self.spill_dir)
 
     @classmethod
     def from_text(cls, text: str):
@@ -74,7 +82,7 @@ class ModelMsg(BaseMsg):
         Text content of message. Can be empty string if not generated by LLM (e.g. tool call is required)
         Returns: str text of message.
         """
-        return "".join(s.content for s in self.get_segments_by_type(ModelMsgSegmentTypes.TEXT))
+        return "".join(s.content for s in self._segment_index[1].get(ModelMsgSegmentTypes.TEXT, ()))
 
     @cached_property
     def thought(self) -> str:
@@ -83,7 +91,7 @@ class ModelMsg(BaseMsg):
 
         Returns: str reasoning of LLM.
         """
-        return "".join(s.content for s in self.get_segments_by_type(ModelMsgSegmentTypes.THOUGHT))
+        return "".join(s.content for s in self._segment_index[1].get(ModelMsgSegmentTypes.THOUGHT, ()))
 
     @cached_property
     def tool_calls(self) -> list[types.FunctionCall]:
@@ -92,25 +100,79 @@ class ModelMsg(BaseMsg):
 
         Returns: list of FunctionCall objects
         """
-        return [s.content for s in self.get_segments_by_type(ModelMsgSegmentTypes.TOOL_CALL)]
+        return [s.content for s in self._segment_index[1].get(ModelMsgSegmentTypes.TOOL_CALL, ())]
 
-    @cached_property
+    @property
     def images(self) -> list[PIL.Image.Image]:
         """
         List of PIL images included with LLM response.
+        Images are opened lazily on every access (not cached), pixels are decoded on first pixel access.
+        Use .image_handles for previews (draft / thumbnail decoding) or to spill large images to disk.
 
         Returns: list of PIL images.
         """
-        return [PIL.Image.open(io.BytesIO(s.content)) for s in self.get_segments_by_type(ModelMsgSegmentTypes.IMAGE)]
+        return [h.image() for h in self.image_handles]
 
-    @cached_property
-    def audio(self) -> list[tuple[io.BytesIO, str]]:
+    @property
+    def audio(self) -> list[tuple[BinaryIO, str]]:
         """
-        List of PIL images included with LLM response.
+        List of audio clips included with LLM response.
+        File-like objects share memory with the response bytes (no copies are made).
 
         Returns: list of tuples: (audio_bytes, mime_type)
         """
-        return [(io.BytesIO(s.content), s.mime_type) for s in self.get_segments_by_type(ModelMsgSegmentTypes.AUDIO)]
+        return [(h.open(), h.mime_type) for h in self.audio_handles]
+
+    @cached_property
+    def image_handles(self) -> list[MediaHandle]:
+        """
+        Lazy zero-copy handles to images included with LLM response.
+
+        Returns: list of MediaHandle objects.
+        """
+        return [MediaHandle(s.content, s.mime_type) for s in self._segment_index[1].get(ModelMsgSegmentTypes.IMAGE, ())]
+
+    @cached_property
+    def audio_handles(self) -> list[MediaHandle]:
+        """
+        Lazy zero-copy handles to audio clips included with LLM response.
+
+        Returns: list of MediaHandle objects.
+        """
+        return [MediaHandle(s.content, s.mime_type) for s in self._segment_index[1].get(ModelMsgSegmentTypes.AUDIO, ())]
+
+    def spill_media(self, min_bytes: int = 0, directory: Optional[str] = None) -> int:
+        """
+        Move inline images / audio to temporary files and drop the in-memory bytes.
+
+        Spilled payloads stay available via .image_handles / .audio_handles (and segments, read back on access),
+        in message parts they are replaced by short text placeholders => spilled media are not sent back to
+        the model with chat history and are not serialized with the message.
+
+        Args:
+            min_bytes: Payloads smaller than this number of bytes are kept in memory.
+            directory: Directory of temporary files, defaults to system temp dir.
+
+        Returns: Number of spilled payloads.
+        """
+        n_spilled = 0
+        for segment_type, handles in (
+            (ModelMsgSegmentTypes.IMAGE, self.image_handles),
+            (ModelMsgSegmentTypes.AUDIO, self.audio_handles),
+        ):
+            for segment, handle in zip(self._segment_index[1].get(segment_type, ()), handles):
+                if handle.is_spilled or handle.nbytes < min_bytes:
+                    continue
+                data = segment.content
+                handle.spill(directory=directory)
+                segment.offload(handle.tobytes)
+                for i, part in enumerate(self.parts):
+                    if part.inline_data is not None and part.inline_data.data is data:
+                        self.parts[i] = types.Part.from_text(
+                            text=f"[Media spilled to disk: {handle.mime_type}, {handle.nbytes // 1024} KB]"
+                        )
+                n_spilled += 1
+        return n_spilled
 
     @cached_property
     def segments(self) -> list[ModelMsgSegment]:
@@ -122,78 +184,77 @@ class ModelMsg(BaseMsg):
 
         Returns: list of model message segments.
         """
-        segments = []
-        for part in self.parts:
-            if part.thought:
-                if part.text:
-                    segments.append(
-                        ModelMsgSegment(type=ModelMsgSegmentTypes.THOUGHT, content=part.text, mime_type="text/plain")
-                    )
-                else:
-                    logger.warning("Received Part with thought=True with an empty text, skipping.")
-            elif part.text:
-                segments.append(
-                    ModelMsgSegment(type=ModelMsgSegmentTypes.TEXT, content=part.text, mime_type="text/plain")
-                )
-            elif part.inline_data:
-                mime = part.inline_data.mime_type or "application/octet-stream"
-                data = part.inline_data.data
-                if mime.startswith("image/"):
-                    segments.append(ModelMsgSegment(type=ModelMsgSegmentTypes.IMAGE, content=data, mime_type=mime))
-                elif mime.startswith("audio/"):
-                    segments.append(ModelMsgSegment(type=ModelMsgSegmentTypes.AUDIO, content=data, mime_type=mime))
-                else:
-                    segments.append(
-                        ModelMsgSegment(type=ModelMsgSegmentTypes.UNSUPPORTED_PART, content=data, mime_type=mime)
-                    )
-            elif part.file_data:
-                segments.append(
-                    ModelMsgSegment(
-                        type=ModelMsgSegmentTypes.FILE_URI,
-                        content=part.file_data.file_uri,
-                        mime_type=part.file_data.mime_type,
-                    )
-                )
-            elif part.executable_code:
-                segments.append(
-                    ModelMsgSegment(
-                        type=ModelMsgSegmentTypes.CODE_EXECUTABLE,
-                        content=part.executable_code.code,
-                        mime_type="text/x-python",
-                    )
-                )
-            elif part.code_execution_result:
-                segments.append(
-                    ModelMsgSegment(
-                        type=ModelMsgSegmentTypes.CODE_RESULT,
-                        content=part.code_execution_result.output,
-                        mime_type="text/plain",
-                    )
-                )
-            elif part.function_call:
-                segments.append(
-                    ModelMsgSegment(type=ModelMsgSegmentTypes.TOOL_CALL, content=part.function_call, mime_type=None)
-                )
-            else:
-                part_data = part.model_dump(exclude_none=True)
-                logger.warning("Received completely unknown Part type.")
-                segments.append(
-                    ModelMsgSegment(
-                        type=ModelMsgSegmentTypes.UNSUPPORTED_PART, content=part_data, mime_type="application/json"
-                    )
-                )
-        return segments
+        return self._segment_index[0]
 
     def get_segments_by_type(self, segment_type: ModelMsgSegmentTypes) -> list[ModelMsgSegment]:
         """
-        Get list of segments of given type.
+        Get list of segments of given type. Served from per-type index, no scan over all segments.
 
         Args:
             segment_type: Type of segments to return.
 
         Returns: list of ModelMsgSegment objects.
         """
-        return [s for s in self.segments if s.type is segment_type]
+        return list(self._segment_index[1].get(segment_type, ()))
+
+    @cached_property
+    def _segment_index(self) -> tuple[list[ModelMsgSegment], dict[ModelMsgSegmentTypes, list[ModelMsgSegment]]]:
+        """
+        Parse parts into segments in a single pass, indexing them by type.
+
+        Returns: Tuple (segments in narrative order, dict segment type => segments of the type in narrative order).
+        """
+        segments = []
+        by_type = {}
+        for part in self.parts or []:
+            segment = self._to_segment(part)
+            if segment is not None:
+                segments.append(segment)
+                by_type.setdefault(segment.type, []).append(segment)
+        return segments, by_type
+
+    @staticmethod
+    def _to_segment(part: types.Part) -> ModelMsgSegment | None:
+        """
+        Convert single part to segment.
+
+        Returns: ModelMsgSegment, None if part should be skipped.
+        """
+        if part.thought:
+            if part.text:
+                return ModelMsgSegment(type=ModelMsgSegmentTypes.THOUGHT, content=part.text, mime_type="text/plain")
+            logger.warning("Received Part with thought=True with an empty text, skipping.")
+            return None
+        if part.text:
+            return ModelMsgSegment(type=ModelMsgSegmentTypes.TEXT, content=part.text, mime_type="text/plain")
+        if part.inline_data:
+            mime = part.inline_data.mime_type or "application/octet-stream"
+            data = part.inline_data.data
+            if mime.startswith("image/"):
+                return ModelMsgSegment(type=ModelMsgSegmentTypes.IMAGE, content=data, mime_type=mime)
+            if mime.startswith("audio/"):
+                return ModelMsgSegment(type=ModelMsgSegmentTypes.AUDIO, content=data, mime_type=mime)
+            return ModelMsgSegment(type=ModelMsgSegmentTypes.UNSUPPORTED_PART, content=data, mime_type=mime)
+        if part.file_data:
+            return ModelMsgSegment(
+                type=ModelMsgSegmentTypes.FILE_URI, content=part.file_data.file_uri, mime_type=part.file_data.mime_type
+            )
+        if part.executable_code:
+            return ModelMsgSegment(
+                type=ModelMsgSegmentTypes.CODE_EXECUTABLE, content=part.executable_code.code, mime_type="text/x-python"
+            )
+        if part.code_execution_result:
+            return ModelMsgSegment(
+                type=ModelMsgSegmentTypes.CODE_RESULT, content=part.code_execution_result.output, mime_type="text/plain"
+            )
+        if part.function_call:
+            return ModelMsgSegment(type=ModelMsgSegmentTypes.TOOL_CALL, content=part.function_call, mime_type=None)
+        logger.warning("Received completely unknown Part type.")
+        return ModelMsgSegment(
+            type=ModelMsgSegmentTypes.UNSUPPORTED_PART,
+            loader=lambda: part.model_dump(exclude_none=True),
+            mime_type="application/json",
+        )
 
     def __repr__(self) -> str:
         """
@@ -202,8 +263,5 @@ class ModelMsg(BaseMsg):
         Returns: str with information of number of segments of each type present in this message.
 
         """
-        segment_counts = {}
-        for s in self.segments:
-            segment_counts[s.type] = segment_counts.get(s.type, 0) + 1
-        counts_str = ", ".join([f"{t.name}={c}" for t, c in segment_counts.items()])
+        counts_str = ", ".join([f"{t.name}={len(s)}" for t, s in self._segment_index[1].items()])
         return f"ModelMsg(segments=[{counts_str}])"
@@ -1,11 +1,64 @@
-from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable, Optional
 
 from llmbrix.msg.model_msg_segment_types import ModelMsgSegmentTypes
 
+_NOT_LOADED = object()
+
 
-@dataclass
 class ModelMsgSegment:
-    type: ModelMsgSegmentTypes
-    content: Any
-    mime_type: str | None
+    """
+    Single segment of model message (see ModelMsg.segments).
+
+    Compact object (__slots__) with lazily materialized content => content which is expensive to build
+    (e.g. dump of unsupported part) is only computed when accessed.
+    """
+
+    __slots__ = ("type", "mime_type", "_content", "_loader")
+
+    def __init__(
+        self,
+        type: ModelMsgSegmentTypes,
+        content: Any = None,
+        mime_type: str | None = None,
+        loader: Optional[Callable[[], Any]] = None,
+    ):
+        """
+        Args:
+            type: Type of the segment.
+            content: Content of the segment, ignored if loader is set.
+            mime_type: MIME type of the content.
+            loader: Optional callable producing the content on first access.
+        """
+        self.type = type
+        self.mime_type = mime_type
+        self._content = _NOT_LOADED if loader is not None else content
+        self._loader = loader
+
+    @property
+    def content(self) -> Any:
+        """
+        Returns: Content of the segment, materialized on first access.
+        """
+        if self._content is _NOT_LOADED:
+            self._content = self._loader()
+            self._loader = None
+        return self._content
+
+    def offload(self, loader: Callable[[], Any]):
+        """
+        Drop materialized content, it is re-created by loader on next access.
+
+        Args:
+            loader: Callable producing the content.
+        """
+        self._content = _NOT_LOADED
+        self._loader = loader
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ModelMsgSegment):
+            return NotImplemented
+        return self.type is other.type and self.mime_type == other.mime_type and self.content == other.content
+
+    def __repr__(self) -> str:
+        content = "<not loaded>" if self._content is _NOT_LOADED else repr(self._content)
+        return f"ModelMsgSegment(type={self.type}, content={content}, mime_type={self.mime_type!r})"
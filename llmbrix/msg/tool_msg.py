@@ -1,7 +1,8 @@
 import logging
-from typing import Any
+from typing import Any, Optional
 
 from google.genai import types
+from pydantic import PrivateAttr
 
 from llmbrix.msg.base_msg import BaseMsg
 from llmbrix.msg.model_msg import ModelMsg
@@ -19,14 +20,17 @@ class ToolMsg(BaseMsg):
 
     tool_name: str
     tool_args: dict | None = None
+    _artifacts: Optional[dict[str, Any]] = PrivateAttr(default=None)
 
-    def __init__(self, tool_call: types.FunctionCall, result: Any):
+    def __init__(self, tool_call: types.FunctionCall, result: Any, artifacts: Optional[dict[str, Any]] = None):
         """
         Args:
             tool_call: The FunctionCall object from ModelMsg.tool_calls.
                        Used to ensure the 'name' field is perfectly matched.
             result: The output of the function. Must be a dict (as per API spec).
                     If a non-dict is passed, it is wrapped in {'result': ...}.
+            artifacts: References to tool outputs not visible to LLM (ArtifactRef objects), never sent to the API
+                       nor serialized.
         """
         if not isinstance(result, dict):
             logger.warning(f"Tool result for '{tool_call.name}' is not a dict. Wrapping it under 'result' key.")
@@ -35,6 +39,14 @@ class ToolMsg(BaseMsg):
             response_dict = result
         part = types.Part.from_function_response(name=tool_call.name, response=response_dict)
         super().__init__(role=TOOL_ROLE_NAME, parts=[part], tool_name=tool_call.name, tool_args=tool_call.args)
+        self._artifacts = artifacts
+
+    @property
+    def artifacts(self) -> Optional[dict[str, Any]]:
+        """
+        Returns: Artifacts of the tool execution (e.g. ArtifactRef objects), None if tool produced none.
+        """
+        return self._artifacts
 
     @classmethod
     def from_results(cls, model_msg: ModelMsg, results: list[Any]) -> list["ToolMsg"]:
@@ -1,7 +1,9 @@
 import PIL.Image
 from google.genai import types
 
+from llmbrix.attachments.attachment_manager import AttachmentManager
 from llmbrix.msg.base_msg import BaseMsg
+from llmbrix.msg.image_encoder import ImageEncoder, encode_original
 from llmbrix.msg.user_msg_file_types import UserMsgFileTypes
 
 FILE_LIMIT = 5
@@ -21,6 +23,8 @@ class UserMsg(BaseMsg):
         files: list[tuple[bytes, UserMsgFileTypes]] | None = None,
         youtube_url: str | None = None,
         gcs_uris: list[tuple[str, UserMsgFileTypes]] | None = None,
+        image_encoder: ImageEncoder | None = None,
+        attachment_manager: AttachmentManager | None = None,
     ):
         """
         Text has to be filled.
@@ -40,6 +44,10 @@ class UserMsg(BaseMsg):
             youtube_url: URL of YouTube video
             gcs_uris: Tuple (URI, modality)
                       URI for content from GCS bucket, e.g. tuple (gs://bucket/file.pdf, Modality.PDF).
+            image_encoder: Optional encoder of images (resizing, lossy formats, parallel encoding, caching),
+                           e.g. SHARED_IMAGE_ENCODER. If not set images are sent without resizing or lossy re-encoding.
+            attachment_manager: If set, large files are uploaded via Files API (once per content) and referenced
+                                by URI instead of being sent inline with every request.
         """
         images = images or []
         files = files or []
@@ -50,11 +58,16 @@ class UserMsg(BaseMsg):
         parts = []
         if youtube_url:
             parts.append(types.Part.from_uri(file_uri=youtube_url, mime_type="video/youtube"))
-        for img in images:
-            parts.append(types.Part.from_image(img))
+        if image_encoder is not None:
+            parts.extend(image_encoder.encode_many(images))
+        else:
+            parts.extend(encode_original(img) for img in images)
         for uri, modality in gcs_uris:
             parts.append(types.Part.from_uri(file_uri=uri, mime_type=modality.value))
         for file_bytes, modality in files:
-            parts.append(types.Part.from_bytes(data=file_bytes, mime_type=modality.value))
+            if attachment_manager:
+                parts.append(attachment_manager.to_part(file_bytes, modality.value))
+            else:
+                parts.append(types.Part.from_bytes(data=file_bytes, mime_type=modality.value))
         parts.append(types.Part.from_text(text=text))
         super().__init__(role=USER_ROLE_NAME, parts=parts)
@@ -0,0 +1,174 @@
+import json
+import logging
+import threading
+from typing import Optional, Type
+
+from pydantic import BaseModel, Field, ValidationError, create_model
+
+from llmbrix.gemini_model import GeminiModel
+from llmbrix.msg import UserMsg
+from llmbrix.serving.token_estimator import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+PACKING_INSTRUCTION = (
+    "Process each of the items below independently. "
+    "Return exactly one result for every item, item_id of the result has to match the id of the item."
+)
+
+
+class PackedClassifier:
+    """
+    Structured-output classification of many items with several items packed into one generate() call.
+
+    System instruction and per-request overhead are paid once per pack instead of once per item. Response schema
+    of a pack is derived automatically: list of results, each result is response_schema extended by item_id
+    field used to map results back to items.
+
+    Number of items per pack (K) is limited by input token budget and by output tokens left in max_output_tokens
+    of the model. K adapts to the responses: it is halved when a pack comes back incomplete (typically truncated
+    output) and grows back by one item after every complete pack.
+    Items with missing or malformed results are retried individually.
+
+    Thread safe, K is shared (and adapted) by concurrent classify() calls.
+    """
+
+    def __init__(
+        self,
+        model: GeminiModel,
+        response_schema: Type[BaseModel],
+        max_items_per_request: int = 20,
+        max_input_tokens: int = 8000,
+        output_tokens_per_item: int = 200,
+    ):
+        """
+        Args:
+            model: GeminiModel used for generation.
+            response_schema: Pydantic model of result for a single item.
+            max_items_per_request: Upper limit on number of items packed into one request.
+            max_input_tokens: Budget of input tokens (estimated) of items packed into one request.
+            output_tokens_per_item: Expected number of output tokens of one result, used together with
+                                    max_output_tokens of the model to limit number of items per request.
+        """
+        if "item_id" in response_schema.model_fields:
+            raise ValueError("response_schema can't contain field 'item_id', it is reserved for packing.")
+        self.model = model
+        self.response_schema = response_schema
+        self.max_items_per_request = max_items_per_request
+        self.max_input_tokens = max_input_tokens
+        self.output_tokens_per_item = output_tokens_per_item
+        max_output_tokens = model.generation_config.max_output_tokens
+        if max_output_tokens:
+            self.max_items_per_request = max(1, min(max_items_per_request, max_output_tokens // output_tokens_per_item))
+        self.items_per_request = self.max_items_per_request
+        self.n_requests = 0
+        self.n_retries = 0
+        self._lock = threading.Lock()
+        self.item_schema = create_model(
+            f"Packed{response_schema.__name__}",
+            __base__=response_schema,
+            item_id=(int, Field(description="Id of the item this result belongs to.")),
+        )
+        self.pack_schema = create_model(f"Packed{response_schema.__name__}List", results=(list[self.item_schema], ...))
+
+    def classify(self, items: list[str], system_instruction: Optional[str] = None) -> list[BaseModel | None]:
+        """
+        Classify items, several items per generate() call.
+
+        Args:
+            items: Text items to be classified.
+            system_instruction: System instruction describing the task for a single item.
+
+        Returns: List of response_schema instances in order of items. None if item failed even when retried alone.
+        """
+        results: list[BaseModel | None] = [None] * len(items)
+        failed = []
+        start = 0
+        while start < len(items):
+            with self._lock:
+                items_per_request = self.items_per_request
+            pack = self._next_pack(items, start, items_per_request)
+            parsed = self._classify_pack(items, pack, system_instruction)
+            missing = [i for i in pack if i not in parsed]
+            for i, result in parsed.items():
+                results[i] = result
+            failed.extend(missing)
+            with self._lock:
+                if missing:
+                    self.items_per_request = min(self.items_per_request, max(1, len(pack) // 2))
+                    logger.info(
+                        f"Packed request returned {len(pack) - len(missing)}/{len(pack)} results, "
+                        f"reducing items per request to {self.items_per_request}."
+                    )
+                elif len(pack) == items_per_request:
+                    self.items_per_request = min(self.max_items_per_request, self.items_per_request + 1)
+            start += len(pack)
+        for i in failed:
+            results[i] = self._classify_single(items[i], system_instruction)
+        return results
+
+    def _next_pack(self, items: list[str], start: int, items_per_request: int) -> list[int]:
+        """
+        Returns: Indexes of items for the next request, limited by items per request and input token budget.
+        """
+        pack = [start]
+        n_tokens = len(items[start]) // CHARS_PER_TOKEN
+        for i in range(start + 1, min(len(items), start + items_per_request)):
+            n_tokens += len(items[i]) // CHARS_PER_TOKEN
+            if n_tokens > self.max_input_tokens:
+                break
+            pack.append(i)
+        return pack
+
+    def _classify_pack(
+        self, items: list[str], pack: list[int], system_instruction: Optional[str]
+    ) -> dict[int, BaseModel]:
+        """
+        Send one packed request. Results parsed by the model are used directly, response text is parsed only
+        when the model didn't parse it (then valid results are salvaged one by one).
+
+        Returns: dict item index => parsed result, contains only items with valid results.
+        """
+        text = "\n".join([PACKING_INSTRUCTION] + [f'<item id="{i}">\n{items[i]}\n</item>' for i in pack])
+        with self._lock:
+            self.n_requests += 1
+        msg = self.model.generate(
+            [UserMsg(text=text)], system_instruction=system_instruction, response_schema=self.pack_schema
+        )
+        if isinstance(msg.parsed, self.pack_schema):
+            raw_results = msg.parsed.results
+        else:
+            try:
+                raw_results = json.loads(msg.text).get("results", [])
+            except (ValueError, AttributeError):
+                logger.warning("Packed request returned malformed JSON, items will be retried individually.")
+                return {}
+        parsed = {}
+        for raw in raw_results if isinstance(raw_results, list) else []:
+            if isinstance(raw, self.item_schema):
+                item = raw
+            else:
+                try:
+                    item = self.item_schema.model_validate(raw)
+                except ValidationError:
+                    continue
+            if item.item_id in pack and item.item_id not in parsed:
+                fields = {name: getattr(item, name) for name in self.response_schema.model_fields}
+                parsed[item.item_id] = self.response_schema.model_construct(**fields)
+        return parsed
+
+    def _classify_single(self, item: str, system_instruction: Optional[str]) -> BaseModel | None:
+        """
+        Retry single item without packing.
+
+        Returns: Parsed result or None if model failed to produce valid result.
+        """
+        with self._lock:
+            self.n_retries += 1
+        msg = self.model.generate(
+            [UserMsg(text=item)], system_instruction=system_instruction, response_schema=self.response_schema
+        )
+        if isinstance(msg.parsed, self.response_schema):
+            return msg.parsed
+        logger.warning("Item failed to classify even when sent individually.")
+        return None
@@ -0,0 +1,12 @@
+from .circuit_breaker import CircuitBreaker
+from .circuit_breaker_state import CircuitBreakerState
+from .circuit_open_error import CircuitOpenError
+from .client_registry import SHARED_CLIENT_REGISTRY, ClientRegistry
+from .latency_histogram import LatencyHistogram
+from .pooled_client import PooledClient
+from .request_coalescer import RequestCoalescer
+from .request_hedger import RequestHedger
+from .request_priority import RequestPriority
+from .request_scheduler import RequestScheduler
+from .token_bucket import TokenBucket
+from .token_estimator import estimate_input_tokens
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from google.genai import errors
+
+from llmbrix.msg import ModelMsg
+from llmbrix.serving.circuit_breaker_state import CircuitBreakerState
+from llmbrix.serving.circuit_open_error import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+QUOTA_EXCEEDED_CODE = 429
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker around Gemini backend.
+
+    Tracks outcomes of the most recent calls. Once failure rate or slow call rate exceeds its threshold the circuit
+    opens and requests fail fast with CircuitOpenError (or get fallback_msg if set) instead of waiting for a full
+    timeout on a degraded backend. After open_duration the circuit becomes half-open and lets through a limited
+    number of probe requests, the circuit closes if all of them succeed, otherwise opens again.
+
+    Failures are server errors, quota errors (429), timeouts and connection errors. Other client errors (4xx)
+    are caused by the request itself and do not count.
+
+    Thread safe. Use stats() to expose state to health checks.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.8,
+        slow_call_duration: float = 30.0,
+        window: int = 20,
+        min_calls: int = 10,
+        open_duration: float = 30.0,
+        probe_requests: int = 2,
+        fallback_msg: Optional[ModelMsg] = None,
+    ):
+        """
+        Args:
+            failure_rate_threshold: Circuit opens when ratio of failed calls in window reaches this value.
+            slow_call_rate_threshold: Circuit opens when ratio of slow calls in window reaches this value.
+            slow_call_duration: Calls taking longer than this number of seconds are considered slow.
+            window: Number of most recent calls the rates are computed from.
+            min_calls: Minimum number of calls in window before the circuit can open.
+            open_duration: Number of seconds circuit stays open before probe requests are let through.
+            probe_requests: Number of successful probe requests needed in half-open state to close the circuit.
+            fallback_msg: If set, this message is returned instead of raising CircuitOpenError while circuit is open.
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.min_calls = min_calls
+        self.open_duration = open_duration
+        self.probe_requests = probe_requests
+        self.fallback_msg = fallback_msg
+        self.n_rejected = 0
+        self._state = CircuitBreakerState.CLOSED
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=window)  # (failed, slow)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._half_open_id = 0  # identifies current half-open period, probes of previous periods are ignored
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitBreakerState:
+        """
+        Returns: Current state of the circuit.
+        """
+        with self._lock:
+            self._update_state(time.monotonic())
+            return self._state
+
+    def acquire_permission(self) -> Optional[int]:
+        """
+        Check if request can be sent. Every granted permission has to be followed by
+        record_success() or record_error() call with the returned probe id (also when the call is cancelled).
+
+        Returns: Probe id if request was admitted as a half-open probe, None if admitted while circuit is closed.
+
+        Raises:
+            CircuitOpenError: if circuit is open or all half-open probe slots are taken.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._update_state(now)
+            if self._state is CircuitBreakerState.CLOSED:
+                return None
+            if self._state is CircuitBreakerState.HALF_OPEN and self._probes_in_flight < self.probe_requests:
+                self._probes_in_flight += 1
+                return self._half_open_id
+            self.n_rejected += 1
+            retry_after = max(0.0, self._opened_at + self.open_duration - now)
+        raise CircuitOpenError(retry_after=retry_after)
+
+    def record_success(self, latency: float, probe: Optional[int] = None):
+        """
+        Record successful call.
+
+        Args:
+            latency: Duration of the call in seconds.
+            probe: Value returned by acquire_permission().
+        """
+        self._record(failed=False, slow=latency > self.slow_call_duration, probe=probe)
+
+    def record_error(self, ex: BaseException, latency: Optional[float] = None, probe: Optional[int] = None):
+        """
+        Record failed call. Errors not caused by the backend (including cancellation) only release the permission.
+
+        Args:
+            ex: Exception raised by the call.
+            latency: Duration of the call in seconds. None if request failed before being sent.
+            probe: Value returned by acquire_permission().
+        """
+        if latency is None or not self.is_backend_failure(ex):
+            with self._lock:
+                if self._is_current_probe(probe):
+                    self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            return
+        self._record(failed=True, slow=latency > self.slow_call_duration, probe=probe)
+
+    def stats(self) -> dict:
+        """
+        Returns: dict with state of the circuit and failure / slow call rates, suitable for health checks.
+        """
+        with self._lock:
+            self._update_state(time.monotonic())
+            n = len(self._outcomes)
+            return {
+                "state": self._state.value,
+                "n_calls": n,
+                "failure_rate": sum(f for f, _ in self._outcomes) / n if n else 0.0,
+                "slow_call_rate": sum(s for _, s in self._outcomes) / n if n else 0.0,
+                "n_rejected": self.n_rejected,
+            }
+
+    @staticmethod
+    def is_backend_failure(ex: BaseException) -> bool:
+        """
+        Returns: True if exception indicates degraded backend (server, quota, timeout or connection error).
+        """
+        if not isinstance(ex, Exception):  # cancellation, KeyboardInterrupt, ...
+            return False
+        if isinstance(ex, errors.ClientError):
+            return ex.code == QUOTA_EXCEEDED_CODE
+        return not isinstance(ex, (ValueError, TypeError))
+
+    def _record(self, failed: bool, slow: bool, probe: Optional[int]):
+        with self._lock:
+            if probe is not None or self._state is CircuitBreakerState.HALF_OPEN:
+                # only probes of the current half-open period decide about closing the circuit,
+                # late outcomes of calls admitted while closed (or in earlier periods) are ignored
+                if not self._is_current_probe(probe):
+                    return
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed or slow:
+                    self._open(time.monotonic())
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.probe_requests:
+                        logger.info("Circuit breaker closed, Gemini backend recovered.")
+                        self._state = CircuitBreakerState.CLOSED
+                        self._outcomes.clear()
+                return
+            if self._state is CircuitBreakerState.OPEN:
+                return
+            self._outcomes.append((failed, slow))
+            n = len(self._outcomes)
+            if n < self.min_calls:
+                return
+            failure_rate = sum(f for f, _ in self._outcomes) / n
+            slow_call_rate = sum(s for _, s in self._outcomes) / n
+            if failure_rate >= self.failure_rate_threshold or slow_call_rate >= self.slow_call_rate_threshold:
+                logger.warning(
+                    f"Circuit breaker opened for {self.open_duration}s. "
+                    f"Failure rate: {failure_rate:.2f}, slow call rate: {slow_call_rate:.2f}."
+                )
+                self._open(time.monotonic())
+
+    def _is_current_probe(self, probe: Optional[int]) -> bool:
+        """
+        Lock has to be held.
+        """
+        return probe is not None and self._state is CircuitBreakerState.HALF_OPEN and probe == self._half_open_id
+
+    def _open(self, now: float):
+        self._state = CircuitBreakerState.OPEN
+        self._opened_at = now
+
+    def _update_state(self, now: float):
+        """
+        Move from OPEN to HALF_OPEN once open duration elapsed. Lock has to be held.
+        """
+        if self._state is CircuitBreakerState.OPEN and now - self._opened_at >= self.open_duration:
+            self._state = CircuitBreakerState.HALF_OPEN
+            self._half_open_id += 1
+            self._probes_in_flight = 0
+            self._probe_successes = 0
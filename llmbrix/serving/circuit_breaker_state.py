@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class CircuitBreakerState(Enum):
+    """
+    State of circuit breaker protecting the Gemini backend.
+    """
+
+    CLOSED = "closed"  # backend healthy, requests pass through
+    OPEN = "open"  # backend degraded, requests fail fast
+    HALF_OPEN = "half_open"  # open duration elapsed, limited number of probe requests is let through
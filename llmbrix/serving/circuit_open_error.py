@@ -0,0 +1,12 @@
+class CircuitOpenError(RuntimeError):
+    """
+    Raised when request is rejected without being sent because circuit breaker is open.
+    """
+
+    def __init__(self, retry_after: float):
+        """
+        Args:
+            retry_after: Number of seconds until circuit breaker lets probe requests through again.
+        """
+        super().__init__(f"Circuit breaker is open, Gemini backend is degraded. Retry after {retry_after:.1f}s.")
+        self.retry_after = retry_after
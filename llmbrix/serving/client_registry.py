@@ -0,0 +1,107 @@
+import importlib.util
+import os
+import threading
+from typing import Any, Optional
+
+import httpx
+from google.genai import Client, types
+
+MAX_CONNECTIONS = 200
+MAX_KEEPALIVE_CONNECTIONS = 50
+KEEPALIVE_EXPIRY_SECONDS = 120.0
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of Gemini API clients.
+
+    Clients are shared by all callers using the same credentials / options => one HTTP connection pool per
+    credentials instead of one per GeminiModel instance, warm TLS connections are reused across models.
+    Connection pool is tuned for many concurrent requests and long keep-alive (httpx default expiry is 5 seconds,
+    which would drop warmed-up connections between user requests).
+
+    Thread safe.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY_SECONDS,
+    ):
+        """
+        Args:
+            max_connections: Maximum number of concurrent connections per client.
+            max_keepalive_connections: Maximum number of idle connections kept open per client.
+            keepalive_expiry: Number of seconds idle connection is kept open.
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._clients: dict[tuple, Client] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        api_key: Optional[str] = None,
+        vertexai: Optional[bool] = None,
+        project: Optional[str] = None,
+        location: Optional[str] = None,
+        credentials: Optional[Any] = None,
+    ) -> Client:
+        """
+        Get shared client for given credentials, client is created on first use.
+        Arguments have same meaning as in google.genai.Client, missing values are read from env vars by the SDK.
+
+        Args:
+            api_key: Gemini API key. Defaults to GOOGLE_API_KEY env var.
+            vertexai: Use Vertex AI API instead of Gemini Developer API.
+            project: GCP project (Vertex AI only).
+            location: GCP location (Vertex AI only).
+            credentials: google.auth credentials object (Vertex AI only). Clients are shared per credentials object.
+
+        Returns: Shared Client instance.
+        """
+        key = (
+            api_key or os.environ.get("GOOGLE_API_KEY"),
+            vertexai,
+            project,
+            location,
+            id(credentials) if credentials is not None else None,
+        )
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = Client(
+                    api_key=api_key,
+                    vertexai=vertexai,
+                    project=project,
+                    location=location,
+                    credentials=credentials,
+                    http_options=self._http_options(),
+                )
+                self._clients[key] = client
+            return client
+
+    def clear(self):
+        """
+        Forget all registered clients. Clients already handed out keep working.
+        """
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def _http_options(self) -> types.HttpOptions:
+        """
+        HTTP options with tuned connection pool.
+        Async pool is tuned only if SDK uses httpx for async requests (aiohttp is not installed).
+        """
+        async_client_args = None if importlib.util.find_spec("aiohttp") else {"limits": self.limits}
+        return types.HttpOptions(client_args={"limits": self.limits}, async_client_args=async_client_args)
+
+
+SHARED_CLIENT_REGISTRY = ClientRegistry()
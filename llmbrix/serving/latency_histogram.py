@@ -0,0 +1,69 @@
+import bisect
+import threading
+from collections import deque
+
+MIN_LATENCY_SECONDS = 0.001
+MAX_LATENCY_SECONDS = 600.0
+BUCKET_GROWTH_FACTOR = 1.2
+
+
+class LatencyHistogram:
+    """
+    Live histogram of latencies over a sliding window of the most recent samples.
+
+    Latencies are counted into exponentially growing buckets (~20 % wide), percentiles are therefore
+    approximate (reported as upper bound of the bucket) but cost O(number of buckets) regardless of window size.
+
+    Thread safe.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: Number of most recent samples the histogram is computed from.
+        """
+        bounds = [MIN_LATENCY_SECONDS]
+        while bounds[-1] < MAX_LATENCY_SECONDS:
+            bounds.append(bounds[-1] * BUCKET_GROWTH_FACTOR)
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._samples: deque[int] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        """
+        Add latency sample, the oldest sample is forgotten once window is full.
+
+        Args:
+            latency: Latency in seconds.
+        """
+        idx = bisect.bisect_left(self._bounds, latency)
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                self._counts[self._samples[0]] -= 1
+            self._samples.append(idx)
+            self._counts[idx] += 1
+
+    def percentile(self, q: float) -> float | None:
+        """
+        Approximate percentile of recorded latencies.
+
+        Args:
+            q: Percentile in range (0, 1], e.g. 0.95 for p95.
+
+        Returns: Latency in seconds, None if no samples were recorded yet.
+        """
+        with self._lock:
+            n = len(self._samples)
+            if n == 0:
+                return None
+            rank = q * n
+            seen = 0
+            for idx, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank:
+                    return self._bounds[min(idx, len(self._bounds) - 1)]
+        return self._bounds[-1]
+
+    def __len__(self) -> int:
+        return len(self._samples)
@@ -0,0 +1,52 @@
+from google.genai import Client
+
+
+class PooledClient:
+    """
+    Gemini API client which is part of a client pool (see GeminiModelPool).
+    Keeps track of load, health and usage statistics of the client.
+
+    Not thread safe, synchronization is left to the owner of the pool.
+    """
+
+    def __init__(self, client: Client, name: str):
+        """
+        Args:
+            client: Client object from google-genai SDK.
+            name: Human-readable name of the client used in logs and stats.
+        """
+        self.client = client
+        self.name = name
+        self.in_flight = 0
+        self.n_requests = 0
+        self.n_errors = 0
+        self.n_ejections = 0
+        self.total_latency = 0.0
+        self.ejected_until = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        """
+        Args:
+            now: Current time.monotonic() timestamp.
+
+        Returns: False if client is temporarily ejected from the pool.
+        """
+        return self.ejected_until <= now
+
+    def stats(self, now: float) -> dict:
+        """
+        Args:
+            now: Current time.monotonic() timestamp.
+
+        Returns: dict with usage statistics of this client.
+        """
+        n_finished = self.n_requests - self.in_flight
+        return {
+            "name": self.name,
+            "healthy": self.is_healthy(now),
+            "in_flight": self.in_flight,
+            "n_requests": self.n_requests,
+            "n_errors": self.n_errors,
+            "n_ejections": self.n_ejections,
+            "avg_latency": self.total_latency / n_finished if n_finished else None,
+        }
@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, TypeVar
+
+from google.genai import types
+
+T = TypeVar("T")
+
+
+class RequestCoalescer:
+    """
+    Coalesces identical in-flight requests => only the first caller (leader) sends the request,
+    callers arriving while it is in flight wait for and share the leader's response.
+
+    Requests are identical if they have the same model, generation config and contents (compared by hash).
+    By default only deterministic configs (temperature == 0) are coalesced, sharing responses of sampled
+    generations would silently remove the variance callers might rely on.
+
+    Nothing is cached - once the leader's request finishes, next identical request is sent again.
+
+    Thread safe, supports both sync (threads) and async (asyncio) callers.
+    Async requests are coalesced only with other async requests running in the same event loop.
+    """
+
+    def __init__(self, require_deterministic: bool = True):
+        """
+        Args:
+            require_deterministic: If True only requests with temperature == 0 are coalesced.
+        """
+        self.require_deterministic = require_deterministic
+        self.n_requests = 0
+        self.n_coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        self._inflight_async: dict[tuple[int, str], asyncio.Task] = {}
+
+    def request_key(self, model: str, config: types.GenerateContentConfig, contents: list[types.Content]) -> str | None:
+        """
+        Compute key identifying the request.
+
+        Args:
+            model: Model name.
+            config: Generation config of the request.
+            contents: Messages sent to the model.
+
+        Returns: str hash of the request, None if request cannot be coalesced.
+        """
+        if self.require_deterministic and config.temperature != 0:
+            return None
+        hasher = hashlib.sha256(model.encode())
+        try:
+            hasher.update(_dumps(config.model_dump(exclude_none=True)))
+            for content in contents:
+                hasher.update(_dumps(content.model_dump(exclude_none=True)))
+        except TypeError:
+            return None
+        return hasher.hexdigest()
+
+    def call(self, key: str | None, fn: Callable[[], T]) -> T:
+        """
+        Execute request or join identical request which is already in flight.
+
+        Args:
+            key: Request key from request_key(). None => request is executed without coalescing.
+            fn: Function sending the request.
+
+        Returns: Result of fn, possibly shared with other callers.
+        """
+        if key is None:
+            return fn()
+        with self._lock:
+            self.n_requests += 1
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.n_coalesced += 1
+        if not is_leader:
+            return future.result()
+        try:
+            future.set_result(fn())
+        except BaseException as ex:
+            future.set_exception(ex)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    async def acall(self, key: str | None, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async version of call().
+
+        Args:
+            key: Request key from request_key(). None => request is executed without coalescing.
+            fn: Function returning awaitable which sends the request.
+
+        Returns: Result of awaited fn, possibly shared with other callers.
+        """
+        if key is None:
+            return await fn()
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            self.n_requests += 1
+            task = self._inflight_async.get(loop_key)
+            if task is None:
+                task = self._inflight_async[loop_key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._forget_async(loop_key))
+            else:
+                self.n_coalesced += 1
+        # shield => cancellation of one caller does not cancel the request shared with others
+        return await asyncio.shield(task)
+
+    def _forget_async(self, loop_key: tuple[int, str]):
+        with self._lock:
+            self._inflight_async.pop(loop_key, None)
+
+
+def _dumps(obj: Any) -> bytes:
+    """
+    Serialize object for hashing. Binary data is replaced by its digest, classes by their qualified name.
+    """
+    return json.dumps(obj, sort_keys=True, default=_encode_unknown).encode()
+
+
+def _encode_unknown(obj: Any) -> str:
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(obj).hexdigest()
+    if isinstance(obj, type):
+        return f"{obj.__module__}.{obj.__qualname__}:{id(obj)}"
+    if hasattr(obj, "value") and isinstance(obj.value, (str, int)):
+        return str(obj.value)
+    raise TypeError(f"Object of type {type(obj).__name__} cannot be hashed as part of request.")
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from llmbrix.serving.latency_histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RequestHedger:
+    """
+    Cuts tail latency by hedging slow requests.
+
+    If a request has not returned after a delay equal to the chosen latency percentile (tracked from a live latency
+    histogram), an identical duplicate request is fired. The first successful result wins, the other request is
+    discarded (sync) or cancelled (async).
+
+    Extra load is capped by a budget: each request earns `max_extra_ratio` hedge credits, each hedge costs 1 credit.
+    E.g. max_extra_ratio=0.1 => at most ~10 % of additional requests are sent in the long run.
+
+    Thread safe. Sync requests which can't be hedged (no latency data or no credit) run on the caller thread,
+    otherwise primary and hedge request get a dedicated thread each => concurrency is not capped by a pool and
+    hedge delay never includes time spent waiting for a free worker. Async requests (see acall()) run as tasks
+    in the caller's event loop, there the losing request is always cancelled.
+
+    Pass can_hedge to call() / acall() to take quota for the hedge request (e.g. RequestScheduler.try_acquire),
+    the hedge is skipped when it returns False.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        max_extra_ratio: float = 0.1,
+        max_burst: int = 10,
+        min_samples: int = 20,
+        window: int = 1000,
+    ):
+        """
+        Args:
+            percentile: Latency percentile after which the hedge request is fired, e.g. 0.95 for p95.
+            min_delay: Minimum delay in seconds before hedge request is fired.
+            max_extra_ratio: Maximum ratio of hedge requests to all requests.
+            max_burst: Maximum number of hedge credits that can be saved up for bursts of slow requests.
+            min_samples: No hedging happens until this many latencies were observed.
+            window: Number of most recent latencies the percentile is computed from.
+        """
+        if not 0 < percentile < 1:
+            raise ValueError(f"percentile has to be in range (0, 1), got {percentile}.")
+        if max_extra_ratio < 0:
+            raise ValueError(f"max_extra_ratio cannot be negative, got {max_extra_ratio}.")
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_extra_ratio = max_extra_ratio
+        self.max_burst = max_burst
+        self.min_samples = min_samples
+        self.latency_histogram = LatencyHistogram(window=window)
+        self.n_requests = 0
+        self.n_hedges = 0
+        self.n_hedge_wins = 0
+        self._credits = 0.0
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable[[], T], can_hedge: Optional[Callable[[], bool]] = None) -> T:
+        """
+        Execute request, fire a hedge request if it takes too long.
+
+        Args:
+            fn: Function sending the request. Must be safe to be called twice (idempotent request).
+            can_hedge: Called right before hedge request is fired, hedge is skipped if it returns False.
+                       Use it to acquire quota for the hedge request.
+
+        Returns: Result of the first successful call. If all calls fail exception of the last failed one is raised.
+        """
+        with self._lock:
+            self.n_requests += 1
+            self._credits = min(self.max_burst, self._credits + self.max_extra_ratio)
+            has_credit = self._credits >= 1
+        delay = self.hedge_delay()
+        if delay is None or not has_credit:
+            start = time.monotonic()
+            result = fn()
+            self.latency_histogram.record(time.monotonic() - start)
+            return result
+        primary = self._start_thread(fn)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._spend_credit(can_hedge):
+            return primary.result()
+        logger.debug("Request exceeded hedge delay of %.3fs, sending hedge request.", delay)
+        pending = {primary, self._start_thread(fn)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:  # loser keeps running on its thread, its result is discarded
+                    if future is not primary:
+                        with self._lock:
+                            self.n_hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], can_hedge: Optional[Callable[[], bool]] = None) -> T:
+        """
+        Async version of call().
+
+        Args:
+            fn: Function returning awaitable which sends the request. Must be safe to be called twice.
+            can_hedge: Called right before hedge request is fired, hedge is skipped if it returns False.
+
+        Returns: Result of the first successful call. If all calls fail exception of the last failed one is raised.
+        """
+        with self._lock:
+            self.n_requests += 1
+            self._credits = min(self.max_burst, self._credits + self.max_extra_ratio)
+        delay = self.hedge_delay()
+        if delay is None:
+            start = time.monotonic()
+            result = await fn()
+            self.latency_histogram.record(time.monotonic() - start)
+            return result
+        primary = self._create_task(fn)
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._spend_credit(can_hedge):
+            return await primary
+        logger.debug("Request exceeded hedge delay of %.3fs, sending hedge request.", delay)
+        pending = {primary, self._create_task(fn)}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if task is not primary:
+                        with self._lock:
+                            self.n_hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    def hedge_delay(self) -> float | None:
+        """
+        Returns: Current delay in seconds after which a request is hedged. None if not enough latencies observed.
+        """
+        if len(self.latency_histogram) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latency_histogram.percentile(self.percentile))
+
+    def _spend_credit(self, can_hedge: Optional[Callable[[], bool]]) -> bool:
+        """
+        Take one hedge credit and (if can_hedge is set) quota for the hedge request.
+
+        Returns: True if hedge request can be fired.
+        """
+        with self._lock:
+            if self._credits < 1:
+                return False
+            self._credits -= 1
+        if can_hedge is not None and not can_hedge():
+            with self._lock:
+                self._credits = min(self.max_burst, self._credits + 1)
+            return False
+        with self._lock:
+            self.n_hedges += 1
+        return True
+
+    def _start_thread(self, fn: Callable[[], T]) -> Future:
+        """
+        Run fn on a new daemon thread, latency of successful calls is recorded into the histogram.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            start = time.monotonic()
+            try:
+                result = fn()
+            except BaseException as ex:
+                future.set_exception(ex)
+                return
+            self.latency_histogram.record(time.monotonic() - start)
+            future.set_result(result)
+
+        threading.Thread(target=run, name="llmbrix-hedge", daemon=True).start()
+        return future
+
+    def _create_task(self, fn: Callable[[], Awaitable[T]]) -> asyncio.Task:
+        """
+        Start fn as asyncio task, latency of successful calls is recorded into the histogram.
+        """
+        start = time.monotonic()
+
+        def record_latency(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is None:
+                self.latency_histogram.record(time.monotonic() - start)
+
+        task = asyncio.ensure_future(fn())
+        task.add_done_callback(record_latency)
+        return task
@@ -0,0 +1,11 @@
+from enum import IntEnum
+
+
+class RequestPriority(IntEnum):
+    """
+    Priority class of a request to the Gemini API.
+    Lower value means higher priority when requests wait for quota.
+    """
+
+    INTERACTIVE = 0  # live user waiting for the response (e.g. ToolAgent.chat)
+    BATCH = 1  # bulk / offline work, consumes only spare capacity
@@ -0,0 +1,147 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional
+
+from llmbrix.serving.request_priority import RequestPriority
+from llmbrix.serving.token_bucket import TokenBucket
+
+QUOTA_PERIOD_SECONDS = 60.0
+
+
+class RequestScheduler:
+    """
+    Client-side scheduler for requests sharing one Gemini API quota.
+
+    Token-buckets both requests per minute (RPM) and input tokens per minute (TPM).
+    Waiting requests are served strictly by priority class (then FIFO) => interactive requests always jump ahead
+    of queued batch requests. Additionally, a fraction of each bucket is reserved for interactive traffic, batch
+    requests only consume capacity above this reserve. This way batch jobs soak up spare quota while live users
+    still find tokens available when they arrive.
+
+    Thread safe, one instance is meant to be shared by all GeminiModel instances using the same quota.
+    """
+
+    def __init__(
+        self,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+        batch_reserve: float = 0.2,
+        max_wait: Optional[float] = None,
+    ):
+        """
+        Args:
+            rpm_limit: Requests per minute limit. None => requests are not limited.
+            tpm_limit: Input tokens per minute limit. None => tokens are not limited.
+            batch_reserve: Fraction [0, 1) of RPM / TPM capacity batch requests are not allowed to consume.
+            max_wait: Maximum number of seconds a request can wait in the queue.
+                      TimeoutError is raised when exceeded. None => wait indefinitely.
+        """
+        if rpm_limit is None and tpm_limit is None:
+            raise ValueError("At least one of rpm_limit, tpm_limit has to be set.")
+        if not 0 <= batch_reserve < 1:
+            raise ValueError(f"batch_reserve has to be in range [0, 1), got {batch_reserve}.")
+        now = time.monotonic()
+        self._rpm = TokenBucket(rpm_limit, QUOTA_PERIOD_SECONDS, now) if rpm_limit else None
+        self._tpm = TokenBucket(tpm_limit, QUOTA_PERIOD_SECONDS, now) if tpm_limit else None
+        self.batch_reserve = batch_reserve
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._queue: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    def acquire(self, estimated_tokens: int, priority: RequestPriority = RequestPriority.INTERACTIVE):
+        """
+        Block until request can be sent without exceeding the quota, then consume its share of the quota.
+
+        Args:
+            estimated_tokens: Estimated number of input tokens of the request.
+            priority: Priority class of the request.
+        """
+        ticket = (int(priority), next(self._seq))
+        deadline = None if self.max_wait is None else time.monotonic() + self.max_wait
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            self._cond.notify_all()
+            try:
+                while True:
+                    timeout = None
+                    if self._queue[0] == ticket:
+                        timeout = self._wait_time(estimated_tokens, priority)
+                        if timeout == 0:
+                            self._consume(1, estimated_tokens)
+                            return
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(f"Request waited for quota for more than {self.max_wait} seconds.")
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+                    self._cond.wait(timeout=timeout)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def try_acquire(self, estimated_tokens: int, priority: RequestPriority = RequestPriority.INTERACTIVE) -> bool:
+        """
+        Non-blocking acquire(), used for optional requests (e.g. hedge requests). Never jumps ahead of waiting
+        requests.
+
+        Args:
+            estimated_tokens: Estimated number of input tokens of the request.
+            priority: Priority class of the request.
+
+        Returns: True if quota was consumed, False if requests are waiting or quota is short.
+        """
+        with self._cond:
+            if self._queue or self._wait_time(estimated_tokens, priority) > 0:
+                return False
+            self._consume(1, estimated_tokens)
+            return True
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """
+        Correct TPM bucket with real token count once the response arrives.
+
+        Args:
+            estimated_tokens: Estimate used when acquire() was called.
+            actual_tokens: Real number of input tokens reported by the API. None => no correction.
+        """
+        if self._tpm is None or actual_tokens is None:
+            return
+        with self._cond:
+            self._tpm.refill(time.monotonic())
+            self._tpm.consume(actual_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    @property
+    def queue_length(self) -> int:
+        """
+        Returns: Number of requests currently waiting for quota.
+        """
+        with self._cond:
+            return len(self._queue)
+
+    def _wait_time(self, estimated_tokens: int, priority: RequestPriority) -> float:
+        """
+        Compute how long the request has to wait for both RPM and TPM buckets. Lock has to be held.
+        """
+        now = time.monotonic()
+        wait = 0.0
+        for bucket, amount in ((self._rpm, 1), (self._tpm, estimated_tokens)):
+            if bucket is None:
+                continue
+            bucket.refill(now)
+            reserve = bucket.capacity * self.batch_reserve if priority == RequestPriority.BATCH else 0.0
+            wait = max(wait, bucket.wait_time(amount, reserve=reserve))
+        return wait
+
+    def _consume(self, n_requests: int, n_tokens: int):
+        """
+        Consume quota from both buckets. Lock has to be held.
+        """
+        if self._rpm is not None:
+            self._rpm.consume(n_requests)
+        if self._tpm is not None:
+            self._tpm.consume(n_tokens)
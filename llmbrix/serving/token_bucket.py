@@ -0,0 +1,60 @@
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+    Bucket holds up to `capacity` tokens and is refilled continuously with `capacity` tokens per `period` seconds.
+
+    Not thread safe, synchronization is left to the owner (see RequestScheduler).
+    """
+
+    def __init__(self, capacity: float, period: float, now: float):
+        """
+        Args:
+            capacity: Maximum number of tokens in the bucket (e.g. requests per minute limit).
+            period: Number of seconds in which the bucket gets completely refilled (e.g. 60 for per minute limits).
+            now: Current timestamp in seconds, bucket starts full.
+        """
+        if capacity <= 0:
+            raise ValueError(f"Token bucket capacity must be positive, got {capacity}.")
+        if period <= 0:
+            raise ValueError(f"Token bucket period must be positive, got {period}.")
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.level = capacity
+        self._last_refill = now
+
+    def refill(self, now: float):
+        """
+        Add tokens accumulated since last refill.
+
+        Args:
+            now: Current timestamp in seconds.
+        """
+        elapsed = max(0.0, now - self._last_refill)
+        self.level = min(self.capacity, self.level + elapsed * self.refill_rate)
+        self._last_refill = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        """
+        Compute how long one has to wait until `amount` tokens can be consumed.
+        Call refill() first to get up-to-date result.
+
+        Args:
+            amount: Number of tokens to be consumed. Amounts over capacity are clamped to capacity.
+            reserve: Number of tokens which have to stay in the bucket after consumption.
+
+        Returns: Number of seconds to wait, 0 if tokens are available right now.
+        """
+        needed = min(amount, self.capacity - reserve) + reserve
+        missing = needed - self.level
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_rate
+
+    def consume(self, amount: float):
+        """
+        Remove tokens from the bucket. Level can go negative (debt), in such case refill pays the debt first.
+
+        Args:
+            amount: Number of tokens to remove. Negative amount returns tokens back (up to capacity).
+        """
+        self.level = min(self.capacity, self.level - min(amount, self.capacity))
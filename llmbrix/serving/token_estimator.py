@@ -0,0 +1,34 @@
+import json
+
+from google.genai import types
+
+CHARS_PER_TOKEN = 4
+ATTACHMENT_TOKENS = 258  # Gemini bills a standard image (and one PDF page) as 258 input tokens
+
+
+def estimate_input_tokens(contents: list[types.Content], system_instruction: str | None = None) -> int:
+    """
+    Cheap local estimate of number of input tokens a request will consume.
+    No API call is made (unlike BaseMsg.count_tokens()), precision is traded for zero latency.
+
+    Text is estimated as ~4 characters per token, every binary / URI attachment as one standard image.
+
+    Args:
+        contents: Messages (Content objects) to be sent to the model.
+        system_instruction: System instruction sent along with the messages.
+
+    Returns: Estimated number of input tokens, at least 1.
+    """
+    n_chars = len(system_instruction) if isinstance(system_instruction, str) else 0
+    n_attachments = 0
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                n_chars += len(part.text)
+            elif part.inline_data or part.file_data:
+                n_attachments += 1
+            elif part.function_call:
+                n_chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}))
+            elif part.function_response:
+                n_chars += len(json.dumps(part.function_response.response or {}, default=str))
+    return max(1, n_chars // CHARS_PER_TOKEN + n_attachments * ATTACHMENT_TOKENS)
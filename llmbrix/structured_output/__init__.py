@@ -0,0 +1,2 @@
+from .compiled_schema import CompiledSchema
+from .schema_cache import SchemaCache
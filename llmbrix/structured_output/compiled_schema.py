@@ -0,0 +1,112 @@
+import enum
+import json
+import types
+import typing
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter
+
+
+class CompiledSchema:
+    """
+    Response schema converted once and reused for every request.
+
+    Holds JSON schema sent to Gemini API (as response_json_schema, passed to the API without per-request conversion)
+    and TypeAdapter used to validate structured outputs.
+    """
+
+    def __init__(self, schema: Any):
+        """
+        Args:
+            schema: Response schema type, e.g. pydantic model class, list[Model] or enum.
+        """
+        self.schema = schema
+        self.type_adapter = TypeAdapter(schema)
+        self.json_schema = self.type_adapter.json_schema()
+        self.is_model = isinstance(schema, type) and issubclass(schema, BaseModel)
+
+    def parse_json(self, text: str, validate: bool = True) -> Any:
+        """
+        Parse raw JSON text of structured output.
+
+        Args:
+            text: JSON text returned by the model.
+            validate: If False the output is trusted and not validated, see parse_python().
+
+        Returns: Parsed structured output.
+
+        Raises:
+            ValueError: if text is not valid JSON or (with validation) doesn't match the schema.
+        """
+        if validate:
+            return self.type_adapter.validate_json(text)
+        return self.parse_python(json.loads(text), validate=False)
+
+    def parse_python(self, obj: Any, validate: bool = True) -> Any:
+        """
+        Parse structured output already decoded from JSON.
+
+        Args:
+            obj: Decoded JSON (dict, list, ...).
+            validate: If False the output is trusted and not validated. Pydantic models (also nested ones, inside
+                      lists, dicts and optionals) are built with model_construct(), enums are looked up by value,
+                      other values are returned as decoded JSON (no type coercion).
+
+        Returns: Parsed structured output.
+
+        Raises:
+            ValueError: if validation is on and obj doesn't match the schema.
+        """
+        if validate:
+            return self.type_adapter.validate_python(obj)
+        return _construct(self.schema, obj)
+
+
+def _construct(annotation: Any, obj: Any) -> Any:
+    """
+    Build value of given type from decoded JSON without validation.
+
+    Returns: obj with pydantic models and enums of the annotation constructed, other values unchanged.
+    """
+    if obj is None:
+        return None
+    origin = typing.get_origin(annotation)
+    if origin is typing.Annotated:
+        return _construct(typing.get_args(annotation)[0], obj)
+    if origin in (typing.Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _construct(args[0], obj) if len(args) == 1 else _construct_union(args, obj)
+    if origin in (list, tuple, set, frozenset) and isinstance(obj, list):
+        args = typing.get_args(annotation)
+        if origin is tuple and args and args[-1] is not Ellipsis:
+            return tuple(_construct(a, v) for a, v in zip(args, obj))
+        return origin(_construct(args[0], v) for v in obj) if args else origin(obj)
+    if origin is dict and isinstance(obj, dict):
+        args = typing.get_args(annotation)
+        return {k: _construct(args[1], v) for k, v in obj.items()} if args else obj
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(obj, dict):
+        values = {}
+        for name, field in annotation.model_fields.items():
+            key = field.alias if field.alias and field.alias in obj else name
+            if key in obj:
+                values[name] = _construct(field.annotation, obj[key])
+        return annotation.model_construct(**values)
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        try:
+            return annotation(obj)
+        except ValueError:
+            return obj
+    return obj
+
+
+def _construct_union(args: list[Any], obj: Any) -> Any:
+    """
+    Build value of union type: dicts become the first model of the union with all required fields present.
+    """
+    if isinstance(obj, dict):
+        for arg in args:
+            if isinstance(arg, type) and issubclass(arg, BaseModel):
+                required = [f.alias or n for n, f in arg.model_fields.items() if f.is_required()]
+                if all(k in obj for k in required):
+                    return _construct(arg, obj)
+    return obj
@@ -0,0 +1,97 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.genai import types
+
+from llmbrix.structured_output.compiled_schema import CompiledSchema
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaCache:
+    """
+    Cache of compiled response schemas for fast structured outputs.
+
+    Without it every request with response_schema converts the schema class to Gemini Schema inside the SDK and
+    builds a validator for the response. With the cache the JSON schema and TypeAdapter are built once per schema
+    class, the request carries the ready JSON schema and the response text is validated by the cached TypeAdapter.
+
+    Set validate=False for trusted schemas to skip validation of responses entirely.
+    Thread safe, share one instance between models (see GeminiModel schema_cache parameter).
+    """
+
+    def __init__(self, validate: bool = True, max_size: int = 256):
+        """
+        Args:
+            validate: If False structured outputs are not validated, see CompiledSchema.parse_python().
+            max_size: Maximum number of cached schemas, least recently used ones are evicted.
+        """
+        self.validate = validate
+        self.max_size = max_size
+        self._schemas: OrderedDict[Any, CompiledSchema] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, schema: Any) -> Optional[CompiledSchema]:
+        """
+        Args:
+            schema: Response schema type.
+
+        Returns: Compiled schema, None if schema can't be compiled (e.g. dict or types.Schema instance).
+        """
+        if not isinstance(schema, type) and not hasattr(schema, "__origin__"):
+            return None
+        with self._lock:
+            compiled = self._schemas.get(schema)
+            if compiled is not None:
+                self._schemas.move_to_end(schema)
+                return compiled
+        try:
+            compiled = CompiledSchema(schema)
+        except Exception as ex:
+            logger.warning(f"Response schema {schema} can't be compiled, using SDK conversion: {ex}")
+            return None
+        with self._lock:
+            self._schemas[schema] = compiled
+            if len(self._schemas) > self.max_size:
+                self._schemas.popitem(last=False)
+        return compiled
+
+    def prepare_config(
+        self, generation_config: types.GenerateContentConfig
+    ) -> tuple[types.GenerateContentConfig, Optional[CompiledSchema]]:
+        """
+        Replace response_schema of generation config by its cached JSON schema.
+
+        Args:
+            generation_config: Generation config of a request.
+
+        Returns: Tuple (generation config to be sent, compiled schema or None if config has no compilable schema).
+        """
+        compiled = self.get(generation_config.response_schema) if generation_config.response_schema else None
+        if compiled is None:
+            return generation_config, None
+        generation_config = generation_config.model_copy(
+            update={"response_schema": None, "response_json_schema": compiled.json_schema}
+        )
+        return generation_config, compiled
+
+    def parse(self, compiled: CompiledSchema, response: types.GenerateContentResponse) -> Any:
+        """
+        Parse structured output of a response.
+
+        Args:
+            compiled: Compiled schema of the request.
+            response: Raw response from Gemini API.
+
+        Returns: Parsed structured output, None if response is not valid JSON / doesn't match the schema.
+        """
+        try:
+            if response.parsed is not None:  # SDK already decoded JSON of response_json_schema response
+                return compiled.parse_python(response.parsed, validate=self.validate)
+            if response.text:
+                return compiled.parse_json(response.text, validate=self.validate)
+        except ValueError as ex:
+            logger.warning(f"Structured output doesn't match response schema: {ex}")
+        return None
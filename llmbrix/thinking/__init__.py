@@ -0,0 +1,4 @@
+from .adaptive_thinking_policy import AdaptiveThinkingPolicy
+from .request_features import RequestFeatures
+from .thinking_decision import ThinkingDecision
+from .thinking_policy import ThinkingPolicy
@@ -0,0 +1,132 @@
+import random
+import threading
+from typing import Callable, Optional
+
+from llmbrix.msg import ModelMsg
+from llmbrix.thinking.request_features import RequestFeatures
+from llmbrix.thinking.thinking_decision import ThinkingDecision
+from llmbrix.thinking.thinking_policy import ThinkingPolicy
+
+DEFAULT_ARMS = [
+    ThinkingDecision(thinking_budget=0),
+    ThinkingDecision(thinking_budget=1024),
+    ThinkingDecision(thinking_budget=4096),
+]
+TOKENS_PER_COMPLEXITY_POINT = 4000
+
+
+class AdaptiveThinkingPolicy(ThinkingPolicy):
+    """
+    Picks thinking settings per request and learns from observed quality and latency.
+
+    Requests are sorted into complexity buckets (by a heuristic over request features or a custom classifier).
+    For every bucket the policy keeps a running reward of each candidate setting ("arm"),
+    reward = quality - latency_weight * latency, and picks the best one (epsilon-greedy exploration).
+    Initially bucket N uses arm N => trivial requests start with the lightest thinking, hard ones with the heaviest.
+
+    Learning requires quality_fn. Without it the policy cannot tell a fast bad answer from a slow good one
+    (a latency-only reward would push every bucket to the lightest arm), so rewards are never updated and
+    buckets keep their initial arms.
+
+    max_output_tokens of the chosen arm is increased by its thinking budget, since thinking tokens count into
+    output tokens and would otherwise truncate the answer.
+    """
+
+    def __init__(
+        self,
+        arms: Optional[list[ThinkingDecision]] = None,
+        answer_tokens: Optional[int] = None,
+        latency_weight: float = 0.02,
+        epsilon: float = 0.05,
+        learning_rate: float = 0.1,
+        quality_fn: Optional[Callable[[ModelMsg], float]] = None,
+        classifier: Optional[Callable[[RequestFeatures], int]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            arms: Candidate thinking settings ordered from the lightest to the heaviest.
+                  Defaults to thinking budgets 0, 1024 and 4096 (Gemini 2.5), use thinking_level for Gemini 3.
+            answer_tokens: Output tokens reserved for the answer itself on top of the thinking budget.
+                           None => max_output_tokens is not changed by the policy.
+            latency_weight: Reward penalty per second of latency.
+            epsilon: Probability of trying a random arm instead of the best one.
+            learning_rate: Weight of new observation in the running reward (exponential moving average).
+            quality_fn: Scores response quality in range [0, 1] (e.g. an evaluator or user feedback signal).
+                        None => policy doesn't learn from observations.
+            classifier: Maps request features to complexity bucket in range [0, len(arms)).
+                        Defaults to a heuristic over input size, attachments, tools and structured output.
+            seed: Random seed for exploration.
+        """
+        self.arms = arms or DEFAULT_ARMS
+        self.answer_tokens = answer_tokens
+        self.latency_weight = latency_weight
+        self.epsilon = epsilon
+        self.learning_rate = learning_rate
+        self.quality_fn = quality_fn
+        self.classifier = classifier or _heuristic_complexity
+        # rewards[bucket][arm], bucket i starts with preference for arm i
+        n = len(self.arms)
+        self._rewards = [[1.0 if arm == min(bucket, n - 1) else 0.0 for arm in range(n)] for bucket in range(n)]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def decide(self, features: RequestFeatures) -> ThinkingDecision:
+        """
+        Choose thinking settings for a request, see ThinkingPolicy.decide().
+        """
+        bucket = self._bucket(features)
+        with self._lock:
+            if self._random.random() < self.epsilon:
+                arm = self._random.randrange(len(self.arms))
+            else:
+                rewards = self._rewards[bucket]
+                arm = max(range(len(rewards)), key=rewards.__getitem__)
+        decision = self.arms[arm]
+        if self.answer_tokens is not None:
+            decision = ThinkingDecision(
+                thinking_budget=decision.thinking_budget,
+                thinking_level=decision.thinking_level,
+                max_output_tokens=self.answer_tokens + max(0, decision.thinking_budget or 0),
+            )
+        return decision
+
+    def observe(self, features: RequestFeatures, decision: ThinkingDecision, latency: float, response: ModelMsg):
+        """
+        Update running reward of the applied arm, see ThinkingPolicy.observe().
+        """
+        if self.quality_fn is None:
+            return
+        arm = self._arm_index(decision)
+        if arm is None:
+            return
+        reward = self.quality_fn(response) - self.latency_weight * latency
+        bucket = self._bucket(features)
+        with self._lock:
+            rewards = self._rewards[bucket]
+            rewards[arm] += self.learning_rate * (reward - rewards[arm])
+
+    def rewards(self) -> list[list[float]]:
+        """
+        Returns: Copy of running rewards, indexed [complexity bucket][arm].
+        """
+        with self._lock:
+            return [list(r) for r in self._rewards]
+
+    def _bucket(self, features: RequestFeatures) -> int:
+        return min(max(int(self.classifier(features)), 0), len(self.arms) - 1)
+
+    def _arm_index(self, decision: ThinkingDecision) -> int | None:
+        for i, arm in enumerate(self.arms):
+            if arm.thinking_budget == decision.thinking_budget and arm.thinking_level == decision.thinking_level:
+                return i
+        return None
+
+
+def _heuristic_complexity(features: RequestFeatures) -> int:
+    """
+    Rough complexity score: size of the input, attachments, tools and structured output make request harder.
+    """
+    score = features.estimated_tokens / TOKENS_PER_COMPLEXITY_POINT + features.n_attachments
+    score += 0.5 * features.has_tools + 0.5 * features.has_response_schema
+    return int(score)
@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+
+from google.genai import types
+
+from llmbrix.serving import estimate_input_tokens
+
+
+@dataclass(frozen=True)
+class RequestFeatures:
+    """
+    Cheap features of a generate() request used by ThinkingPolicy to pick thinking settings.
+    """
+
+    n_messages: int
+    n_attachments: int
+    estimated_tokens: int
+    has_tools: bool
+    has_response_schema: bool
+
+    @classmethod
+    def from_request(cls, messages: list[types.Content], config: types.GenerateContentConfig):
+        """
+        Extract features from request messages and generation config.
+
+        Args:
+            messages: Messages to be sent to the model.
+            config: Generation config of the request.
+
+        Returns: RequestFeatures instance.
+        """
+        n_attachments = sum(1 for m in messages for p in m.parts or [] if p.inline_data or p.file_data)
+        system_instruction = config.system_instruction if isinstance(config.system_instruction, str) else None
+        return cls(
+            n_messages=len(messages),
+            n_attachments=n_attachments,
+            estimated_tokens=estimate_input_tokens(messages, system_instruction),
+            has_tools=bool(config.tools),
+            has_response_schema=config.response_schema is not None,
+        )
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+from google.genai import types
+
+
+@dataclass(frozen=True)
+class ThinkingDecision:
+    """
+    Thinking settings chosen for a single request by a ThinkingPolicy.
+    None values keep the setting from GeminiModel constructor.
+    """
+
+    thinking_budget: int | None = None  # Gemini 2.5 models
+    thinking_level: types.ThinkingLevel | None = None  # Gemini 3 models
+    max_output_tokens: int | None = None  # note thinking tokens count into output tokens
@@ -0,0 +1,36 @@
+from abc import ABC, abstractmethod
+
+from llmbrix.msg import ModelMsg
+from llmbrix.thinking.request_features import RequestFeatures
+from llmbrix.thinking.thinking_decision import ThinkingDecision
+
+
+class ThinkingPolicy(ABC):
+    """
+    Base class for policies choosing thinking settings (thinking budget / level, max output tokens)
+    for each GeminiModel.generate() call.
+    """
+
+    @abstractmethod
+    def decide(self, features: RequestFeatures) -> ThinkingDecision:
+        """
+        Choose thinking settings for a request.
+
+        Args:
+            features: Features of the request.
+
+        Returns: ThinkingDecision to be applied to the request.
+        """
+        raise NotImplementedError()
+
+    def observe(self, features: RequestFeatures, decision: ThinkingDecision, latency: float, response: ModelMsg):
+        """
+        Feedback about the outcome of a request, called by GeminiModel once the response arrives.
+        Override to let the policy learn from observed quality / latency. Does nothing by default.
+
+        Args:
+            features: Features of the request.
+            decision: Thinking settings applied to the request.
+            latency: Duration of the request in seconds.
+            response: Response of the model.
+        """
@@ -2,10 +2,11 @@ from typing import Iterator, Optional
 
 import PIL.Image
 
+from llmbrix.artifacts import ArtifactStore
 from llmbrix.chat_history import ChatHistory
 from llmbrix.gemini_model import GeminiModel
 from llmbrix.msg import BaseMsg, ModelMsg, UserMsg, UserMsgFileTypes
-from llmbrix.tool_calling import BaseTool, ToolExecutor
+from llmbrix.tool_calling import BaseTool, ResultCompactionPolicy, ToolExecutor
 
 
 class ToolAgent:
@@ -22,6 +23,8 @@ class ToolAgent:
         loop_limit: int = 3,
         tool_timeout: int = 120,
         max_workers: int = 4,
+        result_compaction: Optional[ResultCompactionPolicy] = None,
+        artifact_store: Optional[ArtifactStore] = None,
     ):
         """
         Args:
@@ -32,6 +35,9 @@ class ToolAgent:
             loop_limit: Maximum number of iterations LLM can do when tool calling. 1 iteration = 1 call of LLM.
             tool_timeout: Maximum timeout to set for single tool execution.
             max_workers: Number of threads to use for tool execution.
+            result_compaction: Compaction policy for large tool results, see ToolExecutor.
+                               If set, paging tool for compacted results is added to the tools.
+            artifact_store: Store receiving tool artifacts, ToolMsg.artifacts then contain ArtifactRef objects.
         """
         self.gemini_model = gemini_model
         self.system_instruction = system_instruction
@@ -39,7 +45,15 @@ class ToolAgent:
         self.tool_executor = None
         self.tools = tools
         if tools:
-            self.tool_executor = ToolExecutor(tools=tools, max_workers=max_workers, timeout=tool_timeout)
+            self.tool_executor = ToolExecutor(
+                tools=tools,
+                max_workers=max_workers,
+                timeout=tool_timeout,
+                result_compaction=result_compaction,
+                artifact_store=artifact_store,
+            )
+            if self.tool_executor.paging_tool:
+                self.tools = tools + [self.tool_executor.paging_tool]
         if loop_limit < 1:
             raise ValueError("Loop limit must be greater than 0")
         self.loop_limit = loop_limit
@@ -108,10 +122,11 @@ class ToolAgent:
                 )
         else:
             user_msg = UserMsg(text=user_input, images=images, files=files, youtube_url=youtube_url, gcs_uris=gcs_uris)
-        if self.chat_history:
+        if self.chat_history is not None:
+            turn_seq = self.chat_history.begin_turn()
             messages_hist = self.chat_history.get()
         else:
-            messages_hist = []
+            turn_seq, messages_hist = None, []
         yield user_msg
         new_messages: list[BaseMsg] = [user_msg]
         iteration = 1
@@ -132,4 +147,4 @@ class ToolAgent:
             else:
                 break
         if self.chat_history is not None:
-            self.chat_history.insert_batch(new_messages)
+            self.chat_history.insert_batch(new_messages, turn_seq=turn_seq)
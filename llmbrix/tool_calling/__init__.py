@@ -1,5 +1,10 @@
 from .base_tool import BaseTool
+from .lazy_debug_trace import LazyDebugTrace
+from .read_tool_result_tool import ReadToolResultTool
+from .result_compaction_policy import ResultCompactionPolicy
+from .tool_args_validator import ToolArgsValidator
 from .tool_executor import ToolExecutor
 from .tool_output import ToolOutput
 from .tool_param import ToolParam
 from .tool_param_types import ToolParamTypes
+from .tool_result_store import ToolResultStore
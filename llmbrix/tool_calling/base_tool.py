@@ -3,6 +3,7 @@ from typing import Any, Dict, List
 
 from google.genai import types
 
+from llmbrix.tool_calling.tool_args_validator import ToolArgsValidator
 from llmbrix.tool_calling.tool_output import ToolOutput
 from llmbrix.tool_calling.tool_param import ToolParam
 
@@ -34,11 +35,19 @@ class BaseTool(ABC, types.Tool):
             },
         )
         super().__init__(function_declarations=[func_declaration], **kwargs)
+        self._args_validator = ToolArgsValidator(tool_name=name, params=params)
 
     @property
     def name(self):
         return self.function_declarations[0].name
 
+    @property
+    def args_validator(self) -> ToolArgsValidator:
+        """
+        Returns: Validator of call arguments compiled from tool params, used by ToolExecutor before execution.
+        """
+        return self._args_validator
+
     @abstractmethod
     def execute(self, **kwargs) -> ToolOutput:
         """
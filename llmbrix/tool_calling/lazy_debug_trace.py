@@ -0,0 +1,50 @@
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Iterator, Optional
+
+
+class LazyDebugTrace(Mapping):
+    """
+    Debug trace computed only when accessed for the first time.
+    Behaves as a read-only dict, use it as ToolOutput.debug_trace when building the trace is expensive
+    (dumping requests, formatting stack traces) and the trace is rarely read.
+    """
+
+    def __init__(self, factory: Callable[[], dict[str, Any]]):
+        """
+        Args:
+            factory: Function building the trace, called at most once.
+        """
+        self._factory: Optional[Callable[[], dict[str, Any]]] = factory
+        self._data: Optional[dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_computed(self) -> bool:
+        """
+        Returns: True if the trace was already built.
+        """
+        return self._data is not None
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns: The trace as a dict (built on first call).
+        """
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._factory()
+                    self._factory = None
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self.to_dict()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def __repr__(self) -> str:
+        return repr(self._data) if self._data is not None else "LazyDebugTrace(<not computed>)"
@@ -0,0 +1,58 @@
+from llmbrix.tool_calling.base_tool import BaseTool
+from llmbrix.tool_calling.tool_output import ToolOutput
+from llmbrix.tool_calling.tool_param import ToolParam
+from llmbrix.tool_calling.tool_param_types import ToolParamTypes
+from llmbrix.tool_calling.tool_result_store import ToolResultStore
+
+TOOL_NAME = "read_tool_result"
+TOOL_DESC = (
+    "Reads a part of a large tool result which was truncated. "
+    "Use result_handle from the truncated result and offset (in characters) to continue reading."
+)
+
+
+class ReadToolResultTool(BaseTool):
+    """
+    Paging tool over results stored in ToolResultStore.
+    Registered automatically by ToolExecutor when result compaction is enabled.
+    """
+
+    def __init__(self, store: ToolResultStore, page_chars: int = 4000, name: str = TOOL_NAME, desc: str = TOOL_DESC):
+        """
+        Args:
+            store: Store containing full tool results.
+            page_chars: Maximum number of characters returned in one call.
+            name: Name of the tool.
+            desc: Description of the tool.
+        """
+        params = [
+            ToolParam(name="result_handle", description="Handle of the truncated result.", type=ToolParamTypes.STRING),
+            ToolParam(
+                name="offset",
+                description="Character offset to start reading from (next_offset of the previous read).",
+                type=ToolParamTypes.INTEGER,
+                required=False,
+            ),
+        ]
+        super().__init__(name=name, description=desc, params=params)
+        self._store = store
+        self._page_chars = page_chars
+
+    def execute(self, result_handle: str, offset: int = 0, **kwargs) -> ToolOutput:
+        text = self._store.get(result_handle)
+        if text is None:
+            return ToolOutput(
+                success=False,
+                result={"error": f'Result "{result_handle}" is not available (unknown handle or expired).'},
+            )
+        offset = max(0, int(offset))
+        end = min(len(text), offset + self._page_chars)
+        return ToolOutput(
+            success=True,
+            result={
+                "content": text[offset:end],
+                "offset": offset,
+                "next_offset": end if end < len(text) else None,
+                "total_chars": len(text),
+            },
+        )
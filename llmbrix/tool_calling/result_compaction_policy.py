@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class ResultCompactionPolicy:
+    """
+    Thresholds for compaction of large tool results, see ToolExecutor result_compaction parameter.
+    Result larger than max_chars (as JSON) is moved to ToolResultStore, the model gets a preview (or summary)
+    and a handle which can be paged through with the read_tool_result tool.
+    """
+
+    max_chars: int = 8000  # results up to this size (JSON characters) are sent to the model unchanged
+    preview_chars: int = 2000  # size of truncated result sent instead of the full one
+    summarizer: Optional[Callable[[str], str]] = None  # replaces preview by summary of full result JSON
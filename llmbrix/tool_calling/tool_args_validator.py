@@ -0,0 +1,67 @@
+from typing import Any, NotRequired, Optional
+
+from pydantic import ConfigDict, TypeAdapter, ValidationError
+from typing_extensions import TypedDict
+
+from llmbrix.tool_calling.tool_param import ToolParam
+from llmbrix.tool_calling.tool_param_types import ToolParamTypes
+
+PARAM_PYTHON_TYPES = {
+    ToolParamTypes.STRING: str,
+    ToolParamTypes.NUMBER: float,
+    ToolParamTypes.INTEGER: int,
+    ToolParamTypes.BOOLEAN: bool,
+    ToolParamTypes.ARRAY: list,
+}
+
+
+class ToolArgsValidator:
+    """
+    Validator of tool call arguments compiled once from tool parameters (ToolParam list).
+
+    Validation runs in pydantic-core (microseconds per call) and coerces values the model commonly sends in a
+    slightly different form, e.g. 3.0 for integer parameter or "true" for boolean one.
+    Missing required arguments, wrong types and unknown arguments are reported in a message intended for the LLM.
+    """
+
+    def __init__(self, tool_name: str, params: list[ToolParam]):
+        """
+        Args:
+            tool_name: Name of the tool (used in error messages).
+            params: Parameters of the tool.
+        """
+        self.tool_name = tool_name
+        fields = {}
+        for param in params:
+            python_type = PARAM_PYTHON_TYPES[param.type]
+            if param.type == ToolParamTypes.ARRAY:
+                python_type = list[PARAM_PYTHON_TYPES[param.items_type]] if param.items_type else list[Any]
+            fields[param.name] = python_type if param.required else NotRequired[python_type]
+        args_type = TypedDict(f"{tool_name}_args", fields)
+        args_type.__pydantic_config__ = ConfigDict(extra="forbid")
+        self._adapter = TypeAdapter(args_type)
+
+    def validate(self, args: Optional[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Check and coerce tool call arguments.
+
+        Args:
+            args: Arguments from FunctionCall.args (None => no arguments).
+
+        Returns: Validated arguments, optional arguments which were not passed are not included.
+
+        Raises: ValueError with LLM-friendly description of all problems found.
+        """
+        try:
+            return self._adapter.validate_python(args or {})
+        except ValidationError as ex:
+            problems = []
+            for error in ex.errors(include_url=False):
+                name = ".".join(str(loc) for loc in error["loc"])
+                if error["type"] == "missing":
+                    problems.append(f'missing required argument "{name}"')
+                elif error["type"] == "extra_forbidden":
+                    problems.append(f'unknown argument "{name}"')
+                else:
+                    problems.append(f'argument "{name}": {error["msg"]} (got {error["input"]!r})')
+            raise ValueError(f'Invalid arguments for tool "{self.tool_name}": ' + "; ".join(problems) + ".") from None
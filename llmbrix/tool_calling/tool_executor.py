@@ -1,13 +1,21 @@
+import json
 import logging
+import random
 import traceback
 from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
-from typing import Any, Iterator
+from typing import Any, Iterator, Optional
 
 from google.genai import types
 
+from llmbrix.artifacts import ArtifactRef, ArtifactStore
 from llmbrix.msg import ToolMsg
 from llmbrix.tool_calling.base_tool import BaseTool
+from llmbrix.tool_calling.lazy_debug_trace import LazyDebugTrace
+from llmbrix.tool_calling.read_tool_result_tool import ReadToolResultTool
+from llmbrix.tool_calling.result_compaction_policy import ResultCompactionPolicy
+from llmbrix.tool_calling.tool_args_validator import ToolArgsValidator
 from llmbrix.tool_calling.tool_output import ToolOutput
+from llmbrix.tool_calling.tool_result_store import ToolResultStore
 
 logger = logging.getLogger(__name__)
 
@@ -15,14 +23,39 @@ logger = logging.getLogger(__name__)
 class ToolExecutor:
     """
     Executes required tool calls via multi-threading and handles potential errors in LLM-friendly way.
+
+    Debug traces of error outputs are built lazily (LazyDebugTrace) and logging is lazy => errors nobody inspects
+    are cheap. Stack traces can be sampled, see diagnostics_sample_rate.
+
+    Large results can be compacted: full result is kept in ToolResultStore and the model gets a truncated (or
+    summarized) version with a handle. Paging tool (read_tool_result) is registered automatically in such case,
+    it has to be declared to the model together with other tools (see paging_tool attribute).
     """
 
-    def __init__(self, tools: list[BaseTool], max_workers: int = 4, timeout: int | None = 120):
+    def __init__(
+        self,
+        tools: list[BaseTool],
+        max_workers: int = 4,
+        timeout: int | None = 120,
+        result_compaction: Optional[ResultCompactionPolicy] = None,
+        tool_result_compaction: Optional[dict[str, Optional[ResultCompactionPolicy]]] = None,
+        result_store: Optional[ToolResultStore] = None,
+        artifact_store: Optional[ArtifactStore] = None,
+        diagnostics_sample_rate: float = 1.0,
+    ):
         """
         Args:
             tools: List of tools to execute.
             max_workers: Number of threads to use.
             timeout: Timeout in seconds. If timeout is reached tool result for the LLM will mention timeout error.
+            result_compaction: Default compaction policy of successful tool results. None => results are not compacted.
+            tool_result_compaction: Per-tool overrides of result_compaction, tool name => policy.
+                                    None value disables compaction for the tool.
+            result_store: Store for full results of compacted tool outputs. Created automatically if needed.
+            artifact_store: If set, artifacts of tool outputs are moved to this store (in worker threads) and
+                            ToolMsg.artifacts contain ArtifactRef objects instead of the artifact values.
+            diagnostics_sample_rate: Fraction of tool exceptions for which stack trace is logged and kept in
+                                     debug trace. Lower it to reduce CPU cost of error storms.
         """
         names = [t.name for t in tools]
         if len(names) != len(set(names)):
@@ -30,6 +63,18 @@ class ToolExecutor:
         self.tool_index = {t.name: t for t in tools}
         self.max_workers = max_workers
         self.timeout = timeout
+        self.result_compaction = result_compaction
+        self.tool_result_compaction = tool_result_compaction or {}
+        self.artifact_store = artifact_store
+        self.diagnostics_sample_rate = diagnostics_sample_rate
+        self.result_store = None
+        self.paging_tool = None
+        if result_compaction or any(self.tool_result_compaction.values()):
+            self.result_store = result_store or ToolResultStore()
+            self.paging_tool = ReadToolResultTool(store=self.result_store)
+            if self.paging_tool.name in self.tool_index:
+                raise ValueError(f'Tool name "{self.paging_tool.name}" is reserved for paging of compacted results.')
+            self.tool_index[self.paging_tool.name] = self.paging_tool
 
     def execute(self, tool_requests: list[types.FunctionCall]) -> list[ToolMsg]:
         """
@@ -63,11 +108,51 @@ class ToolExecutor:
         for tool_call, tool_output in self._execute_tool_calls(tool_requests=tool_requests):
             yield tool_output.to_tool_msg(tool_call=tool_call)
 
+    def _compact_result(self, req: types.FunctionCall, tool_output: ToolOutput) -> ToolOutput:
+        """
+        Replace large successful result by its preview (or summary) and a handle to the full result in result store.
+        Runs in the worker thread together with the tool call (summarizer may be slow).
+
+        Args:
+            req: Tool call request from LLM
+            tool_output: Tool call output
+
+        Returns: Tool call output with result small enough to be sent to the model.
+        """
+        policy = self.tool_result_compaction.get(req.name, self.result_compaction)
+        if policy is None or not tool_output.success or tool_output.result is None or self.paging_tool is None:
+            return tool_output
+        if req.name == self.paging_tool.name:
+            return tool_output
+        text = json.dumps(tool_output.result, ensure_ascii=False, default=str)
+        if len(text) <= policy.max_chars:
+            return tool_output
+        handle = self.result_store.put(text)
+        compacted = None
+        if policy.summarizer:
+            try:
+                compacted = {"summary": policy.summarizer(text)}
+            except Exception:
+                logger.warning('Summarizer of tool "%s" result failed, using preview.', req.name, exc_info=True)
+        if compacted is None:
+            compacted = {"truncated_result": text[: policy.preview_chars]}
+        compacted.update(
+            {
+                "result_handle": handle,
+                "total_chars": len(text),
+                "note": f'Result is too large and was shortened. Call "{self.paging_tool.name}" '
+                f"with result_handle to read the full result page by page.",
+            }
+        )
+        logger.debug('Result of tool "%s" compacted from %d characters, handle %s.', req.name, len(text), handle)
+        return tool_output.model_copy(update={"result": compacted})
+
     def _execute_tool_calls(
         self, tool_requests: list[types.FunctionCall]
     ) -> Iterator[tuple[types.FunctionCall, ToolOutput]]:
         """
         Execute list of tool requests. Yields ToolOutput objects.
+        Calls of unknown tools and calls with invalid arguments are answered right away, without using a worker.
 
         Args:
             tool_requests: List of tool call requests from LLM.
@@ -75,10 +160,16 @@ class ToolExecutor:
         Returns: Generator of tool outputs. Order is not preserved.
         """
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            tasks = {
-                executor.submit(self._execute_single_tool_call, tool_call): tool_call for tool_call in tool_requests
-            }
-
+            tasks = {}
+            rejected = []
+            for tool_call in tool_requests:
+                args, error_output = self._validate_tool_call(tool_call)
+                if error_output is not None:
+                    rejected.append((tool_call, error_output))
+                else:
+                    tasks[executor.submit(self._execute_single_tool_call, tool_call, args)] = tool_call
+
+            yield from rejected
             for future in as_completed(tasks):
                 req = tasks[future]
                 try:
@@ -88,25 +179,74 @@ class ToolExecutor:
                 except Exception as ex:
                     yield req, self._handle_tool_execution_error(req=req, ex=ex)
 
-    def _execute_single_tool_call(self, req: types.FunctionCall) -> ToolOutput:
+    def _validate_tool_call(self, req: types.FunctionCall) -> tuple[dict[str, Any] | None, ToolOutput | None]:
         """
-        Execute one single tool call.
+        Check tool call before it is dispatched to a worker thread: tool has to exist and arguments have to match
+        compiled schema of the tool (see BaseTool.args_validator).
 
         Args:
             req: Tool call request from LLM
 
-        Returns: Tool call output
+        Returns: Tuple (validated arguments, None) for valid call, (None, error tool output) otherwise.
         """
         tool = self.tool_index.get(req.name, None)
         if tool is None:
-            return self._handle_unknown_tool(req=req)
+            return None, self._handle_unknown_tool(req=req)
         args = req.args if isinstance(req.args, dict) else {}
+        validator = getattr(tool, "args_validator", None)
+        if isinstance(validator, ToolArgsValidator):
+            try:
+                args = validator.validate(args)
+            except ValueError as ex:
+                return None, self._handle_invalid_args(req=req, ex=ex)
+        return args, None
+
+    def _execute_single_tool_call(self, req: types.FunctionCall, args: dict[str, Any]) -> ToolOutput:
+        """
+        Execute one single tool call.
+
+        Args:
+            req: Tool call request from LLM
+            args: Validated arguments of the call.
+
+        Returns: Tool call output
+        """
+        tool = self.tool_index[req.name]
         tool_output = tool.execute(**args)
         if not isinstance(tool_output, ToolOutput):
             return self._handle_incorrect_output_type(req=req, tool_output=tool_output)
         if not isinstance(tool_output.result, dict) or tool_output.result == {}:
             return self._handle_empty_tool_result(req=req)
-        return tool_output
+        if self.artifact_store is not None and tool_output.artifacts:
+            tool_output = tool_output.model_copy(
+                update={"artifacts": self._offload_artifacts(req, tool_output.artifacts)}
+            )
+        return self._compact_result(req, tool_output)
+
+    def _offload_artifacts(self, req: types.FunctionCall, artifacts: dict[str, Any]) -> dict[str, Any]:
+        """
+        Move artifacts to artifact store. Artifact which can't be stored (e.g. is not picklable) is kept in memory,
+        failure of the store never turns successful tool call into a failed one.
+
+        Args:
+            req: Tool call request from LLM
+            artifacts: Artifacts of the tool output.
+
+        Returns: Artifact name => ArtifactRef (or the original value if it couldn't be stored).
+        """
+        offloaded = {}
+        for name, value in artifacts.items():
+            try:
+                offloaded[name] = value if isinstance(value, ArtifactRef) else self.artifact_store.put(value)
+            except Exception:
+                logger.warning(
+                    'Artifact "%s" of tool "%s" could not be stored, keeping it in memory.',
+                    name,
+                    req.name,
+                    exc_info=True,
+                )
+                offloaded[name] = value
+        return offloaded
 
     def _handle_unknown_tool(self, req: types.FunctionCall) -> ToolOutput:
         """
@@ -117,14 +257,37 @@ class ToolExecutor:
 
         Returns: Tool call output informing LLM about the error
         """
-        logger.error(f'LLM tool "{req.name}" not found.')
+        logger.error('LLM tool "%s" not found.', req.name)
         return ToolOutput(
             success=False,
             result={
                 "error": f'Tool named "{req.name}" not found. Names of available tools : '
                 f'{list(self.tool_index.keys())}"'
             },
-            debug_trace={"error": "Tool not found.", "tool_request": req.model_dump(mode="json")},
+            debug_trace=LazyDebugTrace(lambda: {"error": "Tool not found.", "tool_request": _dump_request(req)}),
+        )
+
+    @staticmethod
+    def _handle_invalid_args(req: types.FunctionCall, ex: ValueError) -> ToolOutput:
+        """
+        Compose tool output when arguments of the tool call don't match the tool parameters.
+
+        Args:
+            req: Tool call request from LLM
+            ex: Error raised by ToolArgsValidator describing the problems.
+
+        Returns: Tool call output informing LLM about the error
+        """
+        logger.warning("%s Tool args: %s", ex, req.args)
+        return ToolOutput(
+            success=False,
+            result={
+                "error": str(ex),
+                "hint": "Fix the arguments according to the tool definition and call the tool again.",
+            },
+            debug_trace=LazyDebugTrace(
+                lambda: {"error": "Invalid tool arguments.", "details": str(ex), "tool_request": _dump_request(req)}
+            ),
         )
 
     @staticmethod
@@ -137,14 +300,13 @@ class ToolExecutor:
 
         Returns: Tool call output informing LLM about the error
         """
-        logger.error(
-            f'LLM tool "{req.name}" returned empty result. '
-            f'Tool request: {req.model_dump(mode="json", include={"name", "args"})}'
-        )
+        logger.error('LLM tool "%s" returned empty result. Tool args: %s', req.name, req.args)
         return ToolOutput(
             success=False,
             result={"error": f'Tool "{req.name}" returned empty result.'},
-            debug_trace={"error": "Tool returned empty result.", "tool_request": req.model_dump(mode="json")},
+            debug_trace=LazyDebugTrace(
+                lambda: {"error": "Tool returned empty result.", "tool_request": _dump_request(req)}
+            ),
         )
 
     @staticmethod
@@ -159,23 +321,25 @@ class ToolExecutor:
         Returns: Tool call output informing LLM about the error
         """
         actual_type = type(tool_output).__name__
-        logger.error(f'Tool "{req.name}" violated contract: expected ToolOutput, got {actual_type}.')
+        logger.error('Tool "%s" violated contract: expected ToolOutput, got %s.', req.name, actual_type)
         return ToolOutput(
             success=False,
             result={"error": f'Internal error: Tool "{req.name}" returned an invalid data format.'},
-            debug_trace={
-                "error": "Incorrect output type from tool implementation.",
-                "expected_type": "ToolOutput",
-                "received_type": actual_type,
-                "received_value": str(tool_output),
-                "tool_request": req.model_dump(mode="json"),
-            },
+            debug_trace=LazyDebugTrace(
+                lambda: {
+                    "error": "Incorrect output type from tool implementation.",
+                    "expected_type": "ToolOutput",
+                    "received_type": actual_type,
+                    "received_value": str(tool_output),
+                    "tool_request": _dump_request(req),
+                }
+            ),
         )
 
-    @staticmethod
-    def _handle_tool_execution_error(req: types.FunctionCall, ex: Exception) -> ToolOutput:
+    def _handle_tool_execution_error(self, req: types.FunctionCall, ex: Exception) -> ToolOutput:
         """
-        Prepare tool output for situation where tool raised exception during execute() function call
+        Prepare tool output for situation where tool raised exception during execute() function call.
+        Stack trace is logged and kept in debug trace only for sampled errors (see diagnostics_sample_rate).
 
         Args:
             req: Tool call request from LLM
@@ -183,10 +347,24 @@ class ToolExecutor:
 
         Returns: Tool call output informing LLM about the error
         """
+        sampled = self._sample_diagnostics()
         logger.error(
-            f"Exception raised during tool execution. "
-            f'Tool request: {req.model_dump(mode="json", include={"name", "args"})}',
-            exc_info=ex,
+            'Exception raised during execution of tool "%s": %r. Tool args: %s',
+            req.name,
+            ex,
+            req.args,
+            exc_info=ex if sampled else None,
+        )
+        # only strings are kept => exception traceback (and locals of its frames) can be released right away
+        stack_trace = "".join(traceback.format_exception(ex)) if sampled else None
+        exception = f"{type(ex).__name__}: {ex}"
+        debug_trace = LazyDebugTrace(
+            lambda: {
+                "error": "Exception during tool execution.",
+                "tool_request": _dump_request(req),
+                "exception": exception,
+                "stack_trace": stack_trace,
+            }
         )
         return ToolOutput(
             success=False,
@@ -197,11 +375,7 @@ class ToolExecutor:
                 "hint": "Refer to the tool definition and ensure all "
                 "required arguments are present and correctly typed.",
             },
-            debug_trace={
-                "error": "Exception during tool execution.",
-                "tool_request": req.model_dump(mode="json"),
-                "stack_trace": traceback.format_exc(),
-            },
+            debug_trace=debug_trace,
         )
 
     def _handle_timeout_error(self, req: types.FunctionCall) -> ToolOutput:
@@ -214,19 +388,25 @@ class ToolExecutor:
         Returns: Tool call output informing LLM about the error
 
         """
-        logger.error(
-            f'Tool "{req.name}" timed out after {self.timeout} seconds. '
-            f'Tool request: {req.model_dump(mode="json", include={"name", "args"})}'
-        )
+        logger.error('Tool "%s" timed out after %s seconds. Tool args: %s', req.name, self.timeout, req.args)
+        timeout = self.timeout
         return ToolOutput(
             success=False,
             result={
                 "error": f'Tool "{req.name}" timed out.',
                 "details": f"The execution exceeded the maximum allowed time of {self.timeout}s.",
             },
-            debug_trace={
-                "error": "TimeoutError",
-                "timeout_limit": self.timeout,
-                "tool_request": req.model_dump(mode="json"),
-            },
+            debug_trace=LazyDebugTrace(
+                lambda: {"error": "TimeoutError", "timeout_limit": timeout, "tool_request": _dump_request(req)}
+            ),
         )
+
+    def _sample_diagnostics(self) -> bool:
+        """
+        Returns: True if expensive diagnostics (stack traces) should be collected for the current error.
+        """
+        return self.diagnostics_sample_rate >= 1.0 or random.random() < self.diagnostics_sample_rate
+
+
+def _dump_request(req: types.FunctionCall) -> dict[str, Any]:
+    return req.model_dump(mode="json")
@@ -1,9 +1,11 @@
 from typing import Any, Optional
 
 from google.genai import types
-from pydantic import BaseModel, JsonValue
+from pydantic import BaseModel, ConfigDict, JsonValue, field_serializer
 
+from llmbrix.artifacts import ArtifactRef
 from llmbrix.msg.tool_msg import ToolMsg
+from llmbrix.tool_calling.lazy_debug_trace import LazyDebugTrace
 
 
 class ToolOutput(BaseModel):
@@ -12,17 +14,32 @@ class ToolOutput(BaseModel):
     Contains outputs visible and invisible to LLM, other information and offers way to easily convert to ToolMsg.
     """
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     success: bool  # Set to True if tool execution ok. Set to False in order to indicate tool execution failed.
     result: dict[str, JsonValue]  # output from tool execution visible to LLM, must be JSON serializable dict
-    artifacts: Optional[dict[str, Any]] = None  # outputs not visible to LLM (e.g. generated plotly plot)
-    debug_trace: Optional[dict[str, Any]] = None  # include details for application developers to be able to debug
+    artifacts: Optional[dict[str, Any]] = None  # outputs not visible to LLM (e.g. generated plot or ArtifactRef)
+    # include details for application developers to be able to debug, use LazyDebugTrace if expensive to build
+    debug_trace: Optional[LazyDebugTrace | dict[str, Any]] = None
+
+    @field_serializer("debug_trace")
+    def _serialize_debug_trace(
+        self, debug_trace: Optional[LazyDebugTrace | dict[str, Any]]
+    ) -> Optional[dict[str, Any]]:
+        """
+        Lazy debug trace is built when the output is serialized => dumps always contain a plain dict.
+        """
+        return debug_trace.to_dict() if isinstance(debug_trace, LazyDebugTrace) else debug_trace
 
     def to_tool_msg(self, tool_call: types.FunctionCall) -> ToolMsg:
         """
         Converts this tool execution output into a ToolMsg.
+        Only artifacts stored in an ArtifactStore (ArtifactRef values) are attached to ToolMsg, other artifact values
+        are not => messages kept in chat history never pin artifact payloads in memory.
 
         Args:
             tool_call: FunctionCall tool call request related to this tool execution output.
         Returns: ToolMsg
         """
-        return ToolMsg(tool_call=tool_call, result=self.result.copy())
+        refs = {k: v for k, v in (self.artifacts or {}).items() if isinstance(v, ArtifactRef)}
+        return ToolMsg(tool_call=tool_call, result=self.result.copy(), artifacts=refs or None)
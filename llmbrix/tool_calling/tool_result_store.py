@@ -0,0 +1,67 @@
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+
+class ToolResultStore:
+    """
+    Out-of-band storage of full tool results which were compacted before sending them to the model.
+    Results are stored as JSON text under short random handles.
+
+    Bounded by total number of characters, least recently used results are evicted first.
+    Thread safe.
+    """
+
+    def __init__(self, max_chars: int = 50_000_000):
+        """
+        Args:
+            max_chars: Maximum total size of stored results in characters.
+        """
+        self.max_chars = max_chars
+        self._results: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        """
+        Store full result.
+
+        Args:
+            text: Result serialized to JSON.
+
+        Returns: Handle of the stored result.
+        """
+        handle = uuid.uuid4().hex[:16]
+        with self._lock:
+            self._results[handle] = text
+            self._size += len(text)
+            while self._size > self.max_chars and len(self._results) > 1:
+                _, evicted = self._results.popitem(last=False)
+                self._size -= len(evicted)
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        """
+        Args:
+            handle: Handle returned by put().
+
+        Returns: Full result JSON, None if handle is unknown or was evicted.
+        """
+        with self._lock:
+            text = self._results.get(handle)
+            if text is not None:
+                self._results.move_to_end(handle)
+            return text
+
+    def delete(self, handle: str):
+        """
+        Remove stored result (no-op for unknown handle).
+
+        Args:
+            handle: Handle returned by put().
+        """
+        with self._lock:
+            text = self._results.pop(handle, None)
+            if text is not None:
+                self._size -= len(text)
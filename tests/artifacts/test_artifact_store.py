@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from llmbrix.artifacts import (
+    ArtifactRef,
+    InMemoryArtifactStore,
+    MmapArtifactStore,
+    TempDirArtifactStore,
+)
+
+STORES = [InMemoryArtifactStore, TempDirArtifactStore, MmapArtifactStore]
+
+
+@pytest.mark.parametrize("store_cls", STORES)
+def test_bytes_and_objects_roundtrip(store_cls):
+    store = store_cls()
+    png = store.put(b"\x89PNG" + b"x" * 1000, mime_type="image/png")
+    plot = store.put({"data": [1, 2, 3], "layout": {"title": "plot"}})
+    assert png.mime_type == "image/png" and png.nbytes == 1004
+    assert png.get() == b"\x89PNG" + b"x" * 1000
+    assert bytes(png.view()[:4]) == b"\x89PNG"
+    with png.open() as f:
+        assert f.read(4) == b"\x89PNG"
+    assert plot.pickled and plot.get() == {"data": [1, 2, 3], "layout": {"title": "plot"}}
+    assert store.put(b"").get() == b""
+
+
+@pytest.mark.parametrize("store_cls", STORES)
+def test_delete(store_cls):
+    store = store_cls()
+    ref = store.put(b"data")
+    store.delete(ref)
+    store.delete(ref)
+    with pytest.raises(KeyError):
+        ref.get()
+    with pytest.raises(KeyError):
+        ref.open()
+
+
+@pytest.mark.parametrize("store_cls", STORES)
+def test_oldest_artifacts_evicted_over_budget(store_cls):
+    store = store_cls(max_bytes=250)
+    refs = [store.put(bytes([i]) * 100) for i in range(3)]
+    assert store.nbytes == 200
+    with pytest.raises(KeyError):
+        refs[0].get()
+    assert refs[2].get() == b"\x02" * 100
+
+
+def test_offload_keeps_existing_refs():
+    store = InMemoryArtifactStore()
+    ref = store.put(b"plot")
+    offloaded = store.offload({"existing": ref, "table": [[1, 2], [3, 4]]})
+    assert offloaded["existing"] is ref
+    assert isinstance(offloaded["table"], ArtifactRef)
+    assert offloaded["table"].get() == [[1, 2], [3, 4]]
+
+
+def test_temp_dir_removed_with_store():
+    store = TempDirArtifactStore()
+    store.put(b"data")
+    directory = store.directory
+    del store
+    assert not os.path.exists(directory)
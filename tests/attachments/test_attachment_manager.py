@@ -0,0 +1,108 @@
+import datetime
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from google.genai import types
+
+from llmbrix.attachments import AttachmentManager
+from llmbrix.msg import UserMsg, UserMsgFileTypes
+
+
+def make_client(expires_in=48 * 3600, states=(types.FileState.ACTIVE,)):
+    client = MagicMock()
+    expiration = datetime.datetime.fromtimestamp(time.time() + expires_in, tz=datetime.timezone.utc)
+
+    def make_file(state):
+        return types.File(
+            name="files/1", uri="https://files/1", mime_type="application/pdf", state=state, expiration_time=expiration
+        )
+
+    client.files.upload.return_value = make_file(states[0])
+    client.files.get.side_effect = [make_file(s) for s in states[1:]]
+    return client
+
+
+def test_large_attachment_is_uploaded_once():
+    client = make_client()
+    manager = AttachmentManager(client, min_size=10)
+    first = UserMsg(text="a", files=[(b"x" * 100, UserMsgFileTypes.PDF)], attachment_manager=manager)
+    second = UserMsg(text="b", files=[(b"x" * 100, UserMsgFileTypes.PDF)], attachment_manager=manager)
+    assert first.parts[0].file_data.file_uri == "https://files/1"
+    assert second.parts[0].file_data.file_uri == "https://files/1"
+    assert client.files.upload.call_count == 1
+    assert manager.n_dedupe_hits == 1
+
+
+def test_small_attachment_stays_inline():
+    client = make_client()
+    msg = UserMsg(text="a", files=[(b"x", UserMsgFileTypes.PDF)], attachment_manager=AttachmentManager(client))
+    assert msg.parts[0].inline_data.data == b"x"
+    client.files.upload.assert_not_called()
+
+
+def test_expiring_file_is_uploaded_again():
+    client = make_client(expires_in=60)
+    manager = AttachmentManager(client, min_size=1, expiry_margin=3600)
+    manager.upload(b"data", "application/pdf")
+    manager.upload(b"data", "application/pdf")
+    assert client.files.upload.call_count == 2
+
+
+def test_waits_for_processing():
+    client = make_client(states=(types.FileState.PROCESSING, types.FileState.ACTIVE))
+    manager = AttachmentManager(client, min_size=1, poll_interval=0)
+    assert manager.upload(b"data", "application/pdf").uri == "https://files/1"
+
+    client = make_client(states=(types.FileState.PROCESSING, types.FileState.FAILED))
+    with pytest.raises(RuntimeError):
+        AttachmentManager(client, min_size=1, poll_interval=0).upload(b"data", "application/pdf")
+
+
+def test_offload_replaces_inline_parts_in_place():
+    client = make_client()
+    msg = UserMsg(text="a", files=[(b"x" * 100, UserMsgFileTypes.PDF), (b"y", UserMsgFileTypes.PDF)])
+    assert AttachmentManager(client, min_size=10).offload(msg) is msg
+    assert msg.parts[0].file_data.file_uri == "https://files/1"
+    assert msg.parts[1].inline_data.data == b"y"
+    assert msg.parts[2].text == "a"
+
+
+def test_expiring_uri_in_history_is_refreshed():
+    client = make_client(expires_in=60)
+    manager = AttachmentManager(client, min_size=10, expiry_margin=3600, keep_sources=True)
+    msg = UserMsg(text="a", files=[(b"x" * 100, UserMsgFileTypes.PDF)], attachment_manager=manager)
+    assert manager._key_locks == {}
+    client.files.upload.return_value = types.File(
+        name="files/2", uri="https://files/2", mime_type="application/pdf", state=types.FileState.ACTIVE
+    )
+    assert manager.needs_refresh([msg])
+    assert manager.refresh([msg]) == 1
+    assert msg.parts[0].file_data.file_uri == "https://files/2"
+    assert client.files.upload.call_args.kwargs["file"].read() == b"x" * 100
+    assert not manager.needs_refresh([msg])
+    assert manager.refresh([msg]) == 0
+
+
+def test_expiring_uri_without_source_is_kept():
+    client = make_client(expires_in=60)
+    manager = AttachmentManager(client, min_size=10)
+    msg = UserMsg(text="a", files=[(b"x" * 100, UserMsgFileTypes.PDF)], attachment_manager=manager)
+    assert manager.refresh([msg]) == 0
+    assert msg.parts[0].file_data.file_uri == "https://files/1"
+
+
+def test_kept_sources_are_bounded_and_deleted_on_purge(tmp_path):
+    client = make_client(expires_in=-1)
+    manager = AttachmentManager(client, min_size=1, keep_sources=True, source_dir=str(tmp_path), max_source_bytes=10)
+    manager.upload(b"a" * 4, "application/pdf")
+    manager.upload(b"b" * 4, "application/pdf")
+    manager.upload(b"a" * 4, "application/pdf")  # makes "a" the most recently used
+    manager.upload(b"c" * 4, "application/pdf")
+    kept = sorted(open(path, "rb").read() for path, _ in manager._sources.values())
+    assert kept == [b"aaaa", b"cccc"]
+    assert len(list(tmp_path.rglob("*"))) == 3  # temporary directory + 2 sources
+
+    assert manager.purge_expired() == 3
+    assert manager._sources == {}
+    assert len(list(tmp_path.rglob("*"))) == 1
@@ -0,0 +1,96 @@
+from unittest.mock import MagicMock
+
+import pytest
+from google.genai import types
+from pydantic import BaseModel
+
+from llmbrix.batch import BatchJobManifest, LocalBatches
+from llmbrix.gemini_model import GeminiModel
+from llmbrix.msg import UserMsg
+
+
+class Sentiment(BaseModel):
+    label: str
+
+
+def make_response(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+@pytest.fixture
+def model():
+    client = MagicMock()
+
+    def generate_content(model, contents, config):
+        text = contents[-1].parts[0].text
+        if text == "fail":
+            raise RuntimeError("boom")
+        return make_response(f'{{"label": "{text}"}}')
+
+    client.models.generate_content.side_effect = generate_content
+    model = GeminiModel(gemini_client=client)
+    model.batches = LocalBatches(client.models, running_polls=1)
+    return model
+
+
+def test_submit_poll_collect(model):
+    requests = [[UserMsg(text="positive")], [UserMsg(text="fail")], [UserMsg(text="negative")]]
+    manifest = model.submit_batch(requests, response_schema=Sentiment)
+    assert manifest.state == "JOB_STATE_PENDING"
+    assert model.poll(manifest) == "JOB_STATE_RUNNING"
+    assert model.poll(manifest, wait=True, poll_interval=0) == "JOB_STATE_SUCCEEDED"
+
+    results = model.collect(manifest, response_schema=Sentiment)
+    assert results[0].parsed == Sentiment(label="positive")
+    assert results[1] is None
+    assert results[2].parsed == Sentiment(label="negative")
+
+
+def test_collect_unfinished_job_raises(model):
+    manifest = model.submit_batch([[UserMsg(text="positive")]])
+    with pytest.raises(RuntimeError):
+        model.collect(manifest)
+
+
+def test_submit_batch_resumes_from_manifest(model, tmp_path):
+    path = str(tmp_path / "job.json")
+    manifest = model.submit_batch([[UserMsg(text="positive")]], manifest_path=path)
+    resumed = model.submit_batch([[UserMsg(text="positive")]], manifest_path=path)
+    assert resumed.job_name == manifest.job_name
+    assert len(model.batches._jobs) == 1
+
+    model.poll(resumed, wait=True, poll_interval=0)
+    assert BatchJobManifest.load(path).state == "JOB_STATE_SUCCEEDED"
+    assert model.collect(BatchJobManifest.load(path))[0].text == '{"label": "positive"}'
+
+
+def test_submit_batch_resubmits_failed_job(model, tmp_path):
+    path = str(tmp_path / "job.json")
+    manifest = model.submit_batch([[UserMsg(text="positive")]], manifest_path=path)
+    manifest.state = "JOB_STATE_EXPIRED"
+    manifest.save()
+    assert model.submit_batch([[UserMsg(text="positive")]], manifest_path=path).job_name != manifest.job_name
+
+
+def test_collect_in_new_process_uses_schema_from_manifest(model, tmp_path):
+    path = str(tmp_path / "job.json")
+    manifest = model.submit_batch([[UserMsg(text="positive")]], response_schema=Sentiment, manifest_path=path)
+    model.poll(manifest, wait=True, poll_interval=0)
+
+    restarted = GeminiModel(gemini_client=MagicMock())
+    restarted.batches = model.batches
+    loaded = BatchJobManifest.load(path)
+    assert loaded.response_json_schema == Sentiment.model_json_schema()
+    assert restarted.collect(loaded)[0].parsed == Sentiment(label="positive")
+
+
+def test_collect_falls_back_to_json_schema_for_unimportable_class(model):
+    class LocalSentiment(BaseModel):
+        label: str
+
+    manifest = model.submit_batch([[UserMsg(text="positive")]], response_schema=LocalSentiment)
+    model.poll(manifest, wait=True, poll_interval=0)
+    assert manifest.response_schema_ref is None
+    assert model.collect(manifest)[0].parsed == {"label": "positive"}
@@ -0,0 +1,60 @@
+from google.genai import types
+from pydantic import BaseModel
+
+from llmbrix.codec import MsgCodec, MsgLogReader, MsgLogWriter
+from llmbrix.msg import ModelMsg, ToolMsg, UserMsg, UserMsgFileTypes
+
+
+class Answer(BaseModel):
+    value: int
+
+
+def make_messages():
+    call = types.FunctionCall(name="get_weather", args={"city": "Prague"}, id="call-1")
+    return [
+        UserMsg(text="hi", files=[(b"\x00\x01binary", UserMsgFileTypes.PDF)], youtube_url="https://youtu.be/x"),
+        ModelMsg(
+            parts=[
+                types.Part(text="thinking", thought=True),
+                types.Part(function_call=call, thought_signature=b"sig"),
+                types.Part(video_metadata=types.VideoMetadata(fps=2)),
+            ]
+        ),
+        ToolMsg(tool_call=call, result={"temp": 20}),
+        ModelMsg(parts=[types.Part(text='{"value": 1}')], parsed=Answer(value=1)),
+    ]
+
+
+def assert_roundtrip(decoded):
+    original = make_messages()
+    assert [type(m) for m in decoded] == [type(m) for m in original]
+    for d, o in zip(decoded, original):
+        assert d.role == o.role
+        assert [p.model_dump(exclude_none=True) for p in d.parts] == [p.model_dump(exclude_none=True) for p in o.parts]
+    assert decoded[2].tool_name == "get_weather"
+    assert decoded[2].tool_args == {"city": "Prague"}
+    assert decoded[3].parsed == {"value": 1}
+    assert decoded[1].tool_calls[0].name == "get_weather"
+
+
+def test_dumps_loads_roundtrip():
+    data = MsgCodec.dumps(make_messages())
+    assert b"\x00\x01binary" in data
+    assert_roundtrip(MsgCodec.loads(data))
+
+
+def test_plain_text_part_is_bare_string():
+    line = MsgCodec.encode(ModelMsg.from_text("hello"), write_blob=None)
+    assert line == '{"t":"m","p":["hello"]}'
+
+
+def test_log_append_and_streaming_read(tmp_path):
+    path = str(tmp_path / "conversation.log")
+    messages = make_messages()
+    with MsgLogWriter(path) as writer:
+        writer.append(messages[:2])
+    with MsgLogWriter(path) as writer:
+        writer.append(messages[2:])
+    with open(path, "ab") as f:
+        f.write(b'{"t":"u","p":["interrupted')
+    assert_roundtrip(list(MsgLogReader(path)))
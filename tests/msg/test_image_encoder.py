@@ -0,0 +1,66 @@
+import io
+
+import PIL.Image
+import PIL.ImageDraw
+
+from llmbrix.msg import ImageEncoder, UserMsg
+
+
+def decode(part):
+    return PIL.Image.open(io.BytesIO(part.inline_data.data))
+
+
+def test_large_image_is_downsized():
+    part = ImageEncoder(max_size=100).encode(PIL.Image.new("RGB", (400, 200), color="red"))
+    assert part.inline_data.mime_type == "image/jpeg"
+    assert decode(part).size == (100, 50)
+
+
+def test_format_picked_by_image_mode():
+    encoder = ImageEncoder()
+    assert encoder.encode(PIL.Image.new("RGBA", (10, 10))).inline_data.mime_type == "image/png"
+    assert encoder.encode(PIL.Image.new("RGB", (10, 10))).inline_data.mime_type == "image/jpeg"
+    forced = ImageEncoder(image_format="WEBP").encode(PIL.Image.new("RGBA", (10, 10)))
+    assert forced.inline_data.mime_type == "image/webp"
+    assert decode(forced).mode == "RGBA"
+
+
+def test_repeated_images_are_cached():
+    encoder = ImageEncoder(cache_size=1)
+    red, blue = PIL.Image.new("RGB", (10, 10), "red"), PIL.Image.new("RGB", (10, 10), "blue")
+    assert encoder.encode(red).inline_data.data == encoder.encode(red).inline_data.data
+    encoder.encode(blue)
+    encoder.encode(red.copy())
+    assert (encoder.n_cache_hits, encoder.n_cache_misses) == (1, 3)
+    red.paste("green", (0, 0, 5, 5))
+    encoder.encode(red)
+    assert encoder.n_cache_misses == 4
+
+
+def test_user_msg_uses_encoder_and_keeps_order():
+    images = [PIL.Image.new("RGB", (20, 10), color) for color in ("red", "green", "blue")]
+    msg = UserMsg(text="compare", images=images, image_encoder=ImageEncoder(max_size=10))
+    assert [decode(p).size for p in msg.parts[:3]] == [(10, 5)] * 3
+    assert [decode(p).getpixel((2, 2))[1] > 100 for p in msg.parts[:3]] == [False, True, False]
+    assert msg.parts[3].text == "compare"
+
+
+def test_user_msg_without_encoder_keeps_images_lossless(tmp_path):
+    path = tmp_path / "photo.jpg"
+    PIL.Image.new("RGB", (4000, 10), "red").save(path, format="JPEG")
+    screenshot = PIL.Image.new("RGB", (4000, 10), "blue")
+    msg = UserMsg(text="describe", images=[PIL.Image.open(path), screenshot])
+    assert msg.parts[0].inline_data.mime_type == "image/jpeg"
+    assert decode(msg.parts[0]).size == (4000, 10)
+    assert msg.parts[1].inline_data.mime_type == "image/png"
+    assert decode(msg.parts[1]).size == (4000, 10)
+
+
+def test_user_msg_without_encoder_keeps_in_place_edits(tmp_path):
+    path = tmp_path / "diagram.png"
+    PIL.Image.new("RGB", (20, 20), "white").save(path, format="PNG")
+    image = PIL.Image.open(path)
+    PIL.ImageDraw.Draw(image).rectangle((0, 0, 9, 9), fill="black")
+    part = UserMsg(text="describe", images=[image]).parts[0]
+    assert part.inline_data.mime_type == "image/png"
+    assert decode(part).getpixel((2, 2)) == (0, 0, 0)
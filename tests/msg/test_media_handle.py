@@ -0,0 +1,86 @@
+import io
+import os
+
+import PIL.Image
+from google.genai import types
+
+from llmbrix.msg import MediaHandle, ModelMsg
+
+
+def make_jpeg(size=(64, 48)):
+    buffer = io.BytesIO()
+    PIL.Image.new("RGB", size, color="red").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_handle_is_zero_copy():
+    data = b"abcdef"
+    handle = MediaHandle(data, "audio/wav")
+    assert handle.view().obj is data
+    assert handle.open().read() == data
+    assert MediaHandle(memoryview(data)[1:4], "audio/wav").open().read() == b"bcd"
+
+
+def test_thumbnail_uses_draft_decoding():
+    handle = MediaHandle(make_jpeg((640, 480)), "image/jpeg")
+    assert handle.image().size == (640, 480)
+    thumbnail = handle.thumbnail((80, 80))
+    assert max(thumbnail.size) <= 80
+
+
+def test_spill_to_temp_file(tmp_path):
+    data = make_jpeg()
+    handle = MediaHandle(data, "image/jpeg")
+    handle.spill(directory=str(tmp_path))
+    assert handle.is_spilled
+    assert len(os.listdir(tmp_path)) == 1
+    assert handle.tobytes() == data
+    assert handle.image().size == (64, 48)
+    del handle
+    assert os.listdir(tmp_path) == []
+
+
+def test_model_msg_media_handles():
+    jpeg = make_jpeg()
+    msg = ModelMsg(
+        parts=[
+            types.Part(inline_data=types.Blob(data=jpeg, mime_type="image/jpeg")),
+            types.Part(inline_data=types.Blob(data=b"wav", mime_type="audio/wav")),
+        ]
+    )
+    assert msg.image_handles[0].nbytes == len(jpeg)
+    assert msg.images[0].size == (64, 48)
+    assert msg.images[0] is not msg.images[0]
+    audio, mime_type = msg.audio[0]
+    assert audio.read() == b"wav" and mime_type == "audio/wav"
+
+
+def test_model_msg_spill_media_drops_inline_bytes(tmp_path):
+    jpeg = make_jpeg()
+    msg = ModelMsg(
+        parts=[types.Part.from_text(text="hi"), types.Part(inline_data=types.Blob(data=jpeg, mime_type="image/jpeg"))]
+    )
+    assert msg.spill_media(directory=str(tmp_path)) == 1
+    assert all(part.inline_data is None for part in msg.parts)
+    assert msg.parts[1].text.startswith("[Media spilled to disk: image/jpeg")
+    assert msg.image_handles[0].is_spilled
+    assert msg.images[0].size == (64, 48)
+    assert msg.segments[1].content == jpeg
+    assert msg.text == "hi"
+    assert msg.spill_media(directory=str(tmp_path)) == 0
+
+
+def test_model_msg_spill_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(ModelMsg, "spill_threshold", 100)
+    monkeypatch.setattr(ModelMsg, "spill_dir", str(tmp_path))
+    jpeg = make_jpeg()
+    msg = ModelMsg(
+        parts=[
+            types.Part(inline_data=types.Blob(data=jpeg, mime_type="image/jpeg")),
+            types.Part(inline_data=types.Blob(data=b"wav", mime_type="audio/wav")),
+        ]
+    )
+    assert msg.image_handles[0].is_spilled
+    assert not msg.audio_handles[0].is_spilled
+    assert msg.parts[1].inline_data.data == b"wav"
+    assert len(os.listdir(tmp_path)) == 1
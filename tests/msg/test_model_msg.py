@@ -57,3 +57,28 @@ def test_model_msg_structured_output_validation():
     dump = msg.model_dump()
     print(dump)
     assert dump["parsed"]["answer"] == "The capital is Paris"
+
+
+def test_model_segments_indexed_by_type():
+    parts = [
+        types.Part(text="a"),
+        types.Part(function_call=types.FunctionCall(name="f", args={})),
+        types.Part(text="b"),
+    ]
+    msg = ModelMsg(parts=parts)
+    assert [s.content for s in msg.get_segments_by_type(ModelMsgSegmentTypes.TEXT)] == ["a", "b"]
+    assert msg.get_segments_by_type(ModelMsgSegmentTypes.IMAGE) == []
+    assert [s.type for s in msg.segments] == [
+        ModelMsgSegmentTypes.TEXT,
+        ModelMsgSegmentTypes.TOOL_CALL,
+        ModelMsgSegmentTypes.TEXT,
+    ]
+    assert repr(msg) == "ModelMsg(segments=[TEXT=2, TOOL_CALL=1])"
+
+
+def test_model_unsupported_part_content_is_lazy():
+    msg = ModelMsg(parts=[types.Part(video_metadata=types.VideoMetadata(fps=60))])
+    segment = msg.segments[0]
+    assert "not loaded" in repr(segment)
+    assert segment.content == {"video_metadata": {"fps": 60.0}}
+    assert not hasattr(segment, "__dict__")
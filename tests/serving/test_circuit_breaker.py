@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+from google.genai import errors
+
+from llmbrix.serving import CircuitBreaker, CircuitBreakerState, CircuitOpenError
+
+SERVER_ERROR = errors.ServerError(503, {"error": {"code": 503, "message": "unavailable", "status": "UNAVAILABLE"}})
+BAD_REQUEST = errors.ClientError(400, {"error": {"code": 400, "message": "bad", "status": "INVALID_ARGUMENT"}})
+
+
+def make_breaker(**kwargs):
+    params = dict(window=4, min_calls=4, open_duration=0.05, probe_requests=1)
+    params.update(kwargs)
+    return CircuitBreaker(**params)
+
+
+def fail(breaker, n, ex=SERVER_ERROR):
+    for _ in range(n):
+        probe = breaker.acquire_permission()
+        breaker.record_error(ex, latency=0.01, probe=probe)
+
+
+def test_opens_on_failure_rate_and_fails_fast():
+    breaker = make_breaker()
+    fail(breaker, 3)
+    assert breaker.state is CircuitBreakerState.CLOSED  # min_calls not reached yet
+    fail(breaker, 1)
+    assert breaker.state is CircuitBreakerState.OPEN
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.acquire_permission()
+    assert exc_info.value.retry_after > 0
+    assert breaker.stats()["n_rejected"] == 1
+
+
+def test_opens_on_slow_calls():
+    breaker = make_breaker(slow_call_duration=1.0, slow_call_rate_threshold=0.5)
+    for latency in [5.0, 5.0, 0.1, 0.1]:
+        breaker.acquire_permission()
+        breaker.record_success(latency)
+    assert breaker.state is CircuitBreakerState.OPEN
+
+
+def test_client_errors_do_not_count():
+    breaker = make_breaker()
+    fail(breaker, 10, ex=BAD_REQUEST)
+    assert breaker.state is CircuitBreakerState.CLOSED
+    assert breaker.stats()["n_calls"] == 0
+
+
+def test_half_open_probe_closes_circuit():
+    breaker = make_breaker()
+    fail(breaker, 4)
+    time.sleep(0.06)
+    assert breaker.state is CircuitBreakerState.HALF_OPEN
+    probe = breaker.acquire_permission()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire_permission()  # only 1 probe allowed in flight
+    breaker.record_success(0.01, probe=probe)
+    assert breaker.state is CircuitBreakerState.CLOSED
+    assert breaker.stats()["failure_rate"] == 0.0
+
+
+def test_failed_probe_reopens_circuit():
+    breaker = make_breaker()
+    fail(breaker, 4)
+    time.sleep(0.06)
+    fail(breaker, 1)
+    assert breaker.state is CircuitBreakerState.OPEN
+
+
+def test_error_before_request_sent_releases_probe():
+    breaker = make_breaker()
+    fail(breaker, 4)
+    time.sleep(0.06)
+    probe = breaker.acquire_permission()
+    breaker.record_error(TimeoutError("quota wait"), latency=None, probe=probe)
+    breaker.acquire_permission()
+
+
+def test_cancelled_probe_releases_slot():
+    breaker = make_breaker()
+    fail(breaker, 4)
+    time.sleep(0.06)
+    probe = breaker.acquire_permission()
+    breaker.record_error(asyncio.CancelledError(), latency=0.01, probe=probe)
+    assert breaker.state is CircuitBreakerState.HALF_OPEN
+    breaker.acquire_permission()
+
+
+def test_calls_admitted_while_closed_do_not_count_as_probes():
+    breaker = make_breaker()
+    late = breaker.acquire_permission()
+    fail(breaker, 4)
+    time.sleep(0.06)
+    probe = breaker.acquire_permission()
+    breaker.record_success(0.01, probe=late)
+    assert breaker.state is CircuitBreakerState.HALF_OPEN
+    breaker.record_success(0.01, probe=probe)
+    assert breaker.state is CircuitBreakerState.CLOSED
@@ -0,0 +1,31 @@
+from llmbrix.serving import ClientRegistry
+
+
+def test_clients_shared_per_credentials():
+    registry = ClientRegistry()
+    client = registry.get(api_key="key-a")
+    assert registry.get(api_key="key-a") is client
+    assert registry.get(api_key="key-b") is not client
+    assert len(registry) == 2
+
+
+def test_env_api_key_shares_client_with_explicit_key(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "env-key")
+    registry = ClientRegistry()
+    assert registry.get() is registry.get(api_key="env-key")
+
+
+def test_clear():
+    registry = ClientRegistry()
+    client = registry.get(api_key="key")
+    registry.clear()
+    assert len(registry) == 0
+    assert registry.get(api_key="key") is not client
+
+
+def test_connection_pool_is_tuned():
+    registry = ClientRegistry(max_connections=7, max_keepalive_connections=3, keepalive_expiry=30)
+    options = registry._http_options()
+    assert options.client_args["limits"].max_connections == 7
+    assert options.client_args["limits"].max_keepalive_connections == 3
+    assert options.client_args["limits"].keepalive_expiry == 30
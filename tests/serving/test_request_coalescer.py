@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from google.genai import types
+from pydantic import BaseModel
+
+from llmbrix.msg import UserMsg, UserMsgFileTypes
+from llmbrix.serving import RequestCoalescer
+
+CONFIG = types.GenerateContentConfig(temperature=0.0)
+
+
+def test_request_key_identical_requests():
+    coalescer = RequestCoalescer()
+    key_a = coalescer.request_key("m", CONFIG, [UserMsg(text="hi")])
+    key_b = coalescer.request_key("m", CONFIG, [UserMsg(text="hi")])
+    assert key_a is not None and key_a == key_b
+    assert key_a != coalescer.request_key("m", CONFIG, [UserMsg(text="hello")])
+    assert key_a != coalescer.request_key("other", CONFIG, [UserMsg(text="hi")])
+
+
+def test_request_key_non_deterministic_config():
+    coalescer = RequestCoalescer()
+    config = types.GenerateContentConfig(temperature=0.7)
+    assert coalescer.request_key("m", config, [UserMsg(text="hi")]) is None
+    assert RequestCoalescer(require_deterministic=False).request_key("m", config, [UserMsg(text="hi")]) is not None
+
+
+def test_request_key_response_schema_and_binary_data():
+    class Schema(BaseModel):
+        answer: str
+
+    coalescer = RequestCoalescer()
+    config = CONFIG.model_copy(update={"response_schema": Schema})
+    msg_a = UserMsg(text="hi", files=[(b"audio a", UserMsgFileTypes.AUDIO_MP3)])
+    msg_b = UserMsg(text="hi", files=[(b"audio b", UserMsgFileTypes.AUDIO_MP3)])
+    assert coalescer.request_key("m", config, [msg_a]) != coalescer.request_key("m", CONFIG, [msg_a])
+    assert coalescer.request_key("m", CONFIG, [msg_a]) != coalescer.request_key("m", CONFIG, [msg_b])
+
+
+def test_sync_callers_share_one_request():
+    coalescer = RequestCoalescer()
+    calls = []
+    results = []
+
+    def request():
+        calls.append(None)
+        time.sleep(0.1)
+        return "response"
+
+    threads = [threading.Thread(target=lambda: results.append(coalescer.call("key", request))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["response"] * 5
+    assert len(calls) == 1
+    assert coalescer.n_coalesced == 4
+    assert coalescer.call("key", lambda: "next") == "next"  # nothing is cached
+
+
+def test_sync_error_propagates_to_all_callers():
+    coalescer = RequestCoalescer()
+
+    def request():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        coalescer.call("key", request)
+    assert coalescer.call("key", lambda: "ok") == "ok"
+
+
+def test_async_callers_share_one_request():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def request():
+        calls.append(None)
+        await asyncio.sleep(0.05)
+        return "response"
+
+    async def main():
+        return await asyncio.gather(*[coalescer.acall("key", request) for _ in range(5)])
+
+    assert asyncio.run(main()) == ["response"] * 5
+    assert len(calls) == 1
+    assert coalescer.n_coalesced == 4
+
+
+def test_key_none_skips_coalescing():
+    coalescer = RequestCoalescer()
+    assert coalescer.call(None, lambda: 1) == 1
+    assert coalescer.n_requests == 0
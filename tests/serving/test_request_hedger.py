@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llmbrix.serving import LatencyHistogram, RequestHedger
+
+
+def test_histogram_percentile():
+    histogram = LatencyHistogram(window=100)
+    assert histogram.percentile(0.5) is None
+    for _ in range(90):
+        histogram.record(0.1)
+    for _ in range(10):
+        histogram.record(5.0)
+    assert histogram.percentile(0.5) == pytest.approx(0.1, rel=0.2)
+    assert histogram.percentile(0.99) == pytest.approx(5.0, rel=0.2)
+
+
+def test_histogram_sliding_window_forgets_old_samples():
+    histogram = LatencyHistogram(window=10)
+    for _ in range(10):
+        histogram.record(5.0)
+    for _ in range(10):
+        histogram.record(0.01)
+    assert len(histogram) == 10
+    assert histogram.percentile(0.99) == pytest.approx(0.01, rel=0.2)
+
+
+def warmed_up_hedger(**kwargs):
+    hedger = RequestHedger(min_samples=5, min_delay=0.01, **kwargs)
+    for _ in range(5):
+        hedger.latency_histogram.record(0.01)
+    return hedger
+
+
+def test_no_hedging_before_min_samples():
+    hedger = RequestHedger(min_samples=5)
+    assert hedger.hedge_delay() is None
+    assert hedger.call(lambda: "ok") == "ok"
+    assert hedger.n_hedges == 0
+    assert len(hedger.latency_histogram) == 1
+
+
+def test_slow_request_is_hedged_and_fastest_wins():
+    hedger = warmed_up_hedger(max_extra_ratio=1.0)
+    calls = []
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            calls.append(None)
+            n = len(calls)
+        if n == 1:
+            time.sleep(1.0)
+            return "slow"
+        return "fast"
+
+    start = time.monotonic()
+    assert hedger.call(request) == "fast"
+    assert time.monotonic() - start < 0.5
+    assert hedger.n_hedges == 1
+    assert hedger.n_hedge_wins == 1
+
+
+def test_hedge_budget_caps_extra_requests():
+    hedger = warmed_up_hedger(max_extra_ratio=0.0)
+    assert hedger.call(lambda: time.sleep(0.05) or "primary") == "primary"
+    assert hedger.n_hedges == 0
+
+
+def test_failed_hedge_falls_back_to_primary():
+    hedger = warmed_up_hedger(max_extra_ratio=1.0)
+    calls = []
+
+    def request():
+        calls.append(None)
+        if len(calls) == 1:
+            time.sleep(0.1)
+            return "primary"
+        raise RuntimeError("hedge failed")
+
+    assert hedger.call(request) == "primary"
+
+
+def test_all_failed_raises():
+    hedger = warmed_up_hedger(max_extra_ratio=1.0)
+
+    def request():
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        hedger.call(request)
+
+
+def test_async_slow_request_is_hedged():
+    hedger = warmed_up_hedger(max_extra_ratio=1.0)
+    calls = []
+
+    async def request():
+        calls.append(None)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+            return "slow"
+        return "fast"
+
+    assert asyncio.run(hedger.acall(request)) == "fast"
+    assert hedger.n_hedge_wins == 1
+
+
+def test_hedge_skipped_when_quota_is_short():
+    hedger = warmed_up_hedger(max_extra_ratio=1.0)
+    calls = []
+
+    def request():
+        calls.append(None)
+        time.sleep(0.05)
+        return "primary"
+
+    assert hedger.call(request, can_hedge=lambda: False) == "primary"
+    assert len(calls) == 1
+    assert hedger.n_hedges == 0
+
+
+def test_concurrency_not_capped_by_pool():
+    hedger = warmed_up_hedger(max_extra_ratio=0.0)
+    barrier = threading.Barrier(20, timeout=5)
+    results = []
+
+    def request():
+        barrier.wait()
+        return "ok"
+
+    threads = [threading.Thread(target=lambda: results.append(hedger.call(request))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["ok"] * 20
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+from google.genai import types
+
+from llmbrix.msg import ModelMsg, UserMsg
+from llmbrix.serving import RequestPriority, RequestScheduler, TokenBucket, estimate_input_tokens
+
+
+def test_token_bucket_refill_and_consume():
+    bucket = TokenBucket(capacity=60, period=60, now=0.0)
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    bucket.refill(now=30.0)
+    assert bucket.level == pytest.approx(30)
+    assert bucket.wait_time(30) == 0.0
+
+
+def test_token_bucket_reserve_and_clamping():
+    bucket = TokenBucket(capacity=100, period=1, now=0.0)
+    bucket.consume(10)
+    assert bucket.wait_time(75, reserve=20) > 0
+    assert bucket.wait_time(70, reserve=20) == 0.0
+    bucket.refill(now=1.0)
+    assert bucket.wait_time(10_000) == 0.0  # larger than capacity => clamped, never deadlocks
+
+
+def test_token_bucket_refund_capped_at_capacity():
+    bucket = TokenBucket(capacity=10, period=1, now=0.0)
+    bucket.consume(-5)
+    assert bucket.level == 10
+
+
+def test_scheduler_requires_limit():
+    with pytest.raises(ValueError):
+        RequestScheduler()
+
+
+def test_scheduler_max_wait_timeout():
+    scheduler = RequestScheduler(rpm_limit=1, max_wait=0.05)
+    scheduler.acquire(estimated_tokens=1)
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(estimated_tokens=1)
+    assert scheduler.queue_length == 0
+
+
+def test_batch_cannot_consume_interactive_reserve():
+    scheduler = RequestScheduler(tpm_limit=1000, batch_reserve=0.5, max_wait=0.05)
+    scheduler.acquire(estimated_tokens=500, priority=RequestPriority.BATCH)
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(estimated_tokens=100, priority=RequestPriority.BATCH)
+    scheduler.acquire(estimated_tokens=400, priority=RequestPriority.INTERACTIVE)
+
+
+def test_interactive_jumps_ahead_of_waiting_batch():
+    scheduler = RequestScheduler(tpm_limit=60_000, batch_reserve=0.0)
+    scheduler.acquire(estimated_tokens=60_000)  # drain bucket, refill rate is 1000 tokens / s
+    finished = []
+
+    def run(priority):
+        scheduler.acquire(estimated_tokens=150, priority=priority)
+        finished.append(priority)
+
+    batch = threading.Thread(target=run, args=(RequestPriority.BATCH,))
+    interactive = threading.Thread(target=run, args=(RequestPriority.INTERACTIVE,))
+    batch.start()
+    time.sleep(0.02)
+    interactive.start()
+    batch.join(timeout=5)
+    interactive.join(timeout=5)
+    assert finished == [RequestPriority.INTERACTIVE, RequestPriority.BATCH]
+
+
+def test_record_usage_corrects_estimate():
+    scheduler = RequestScheduler(tpm_limit=1000, max_wait=0.05)
+    scheduler.acquire(estimated_tokens=100)
+    scheduler.record_usage(estimated_tokens=100, actual_tokens=1000)
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(estimated_tokens=100)
+
+
+def test_estimate_input_tokens():
+    messages = [
+        UserMsg(text="a" * 400),
+        ModelMsg(parts=[types.Part(inline_data=types.Blob(data=b"img", mime_type="image/png"))]),
+    ]
+    assert estimate_input_tokens(messages, system_instruction="b" * 40) == 110 + 258
+    assert estimate_input_tokens([]) == 1
+
+
+def test_try_acquire_does_not_wait():
+    scheduler = RequestScheduler(rpm_limit=1)
+    assert scheduler.try_acquire(10)
+    assert not scheduler.try_acquire(10)
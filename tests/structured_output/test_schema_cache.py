@@ -0,0 +1,85 @@
+import enum
+from typing import Optional
+
+from google.genai import types
+from pydantic import BaseModel
+
+from llmbrix.structured_output import SchemaCache
+
+
+class Inner(BaseModel):
+    value: int
+
+
+class Outer(BaseModel):
+    label: str
+    inner: Inner
+
+
+def make_response(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+def test_schema_is_compiled_once():
+    cache = SchemaCache()
+    assert cache.get(Outer) is cache.get(Outer)
+    assert len(cache._schemas) == 1
+    assert cache.get({"type": "object"}) is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SchemaCache(max_size=2)
+    cache.get(Inner)
+    cache.get(Outer)
+    cache.get(Inner)
+    cache.get(list[Inner])
+    assert len(cache._schemas) == 2
+    assert Outer not in cache._schemas
+
+
+def test_prepare_config_replaces_schema_by_json_schema():
+    cache = SchemaCache()
+    config = types.GenerateContentConfig(response_schema=Outer, response_mime_type="application/json")
+    prepared, compiled = cache.prepare_config(config)
+    assert prepared.response_schema is None
+    assert prepared.response_json_schema == Outer.model_json_schema()
+    assert compiled.schema is Outer
+    assert cache.prepare_config(types.GenerateContentConfig()) == (types.GenerateContentConfig(), None)
+
+
+def test_parse_validates_response():
+    cache = SchemaCache()
+    compiled = cache.get(Outer)
+    parsed = cache.parse(compiled, make_response('{"label": "a", "inner": {"value": 1}}'))
+    assert parsed == Outer(label="a", inner=Inner(value=1))
+    assert cache.parse(compiled, make_response('{"label": "a"}')) is None
+    assert cache.parse(compiled, make_response("not json")) is None
+
+
+def test_parse_without_validation():
+    cache = SchemaCache(validate=False)
+    parsed = cache.parse(cache.get(Outer), make_response('{"label": "a", "inner": {"value": 1}}'))
+    assert isinstance(parsed, Outer)
+    assert isinstance(parsed.inner, Inner) and parsed.inner.value == 1
+    [item] = cache.get(list[Inner]).parse_json('[{"value": 1}]', validate=False)
+    assert isinstance(item, Inner) and item.value == 1
+
+
+def test_parse_without_validation_builds_nested_containers():
+    class Color(enum.Enum):
+        RED = "red"
+
+    class Nested(BaseModel):
+        items: list[Inner]
+        by_name: dict[str, Inner]
+        optional: Optional[Inner] = None
+        color: Color
+
+    text = '{"items": [{"value": 1}], "by_name": {"a": {"value": 2}}, "optional": {"value": 3}, "color": "red"}'
+    parsed = SchemaCache(validate=False).get(Nested).parse_json(text, validate=False)
+    assert parsed.items[0].value == 1
+    assert parsed.by_name["a"].value == 2
+    assert parsed.optional.value == 3
+    assert parsed.color is Color.RED
@@ -1,8 +1,11 @@
+import threading
+
 import pytest
 from google.genai import types
 
+from llmbrix.attachments import AttachmentAgingPolicy
 from llmbrix.chat_history import ChatHistory
-from llmbrix.msg import ModelMsg, ToolMsg, UserMsg
+from llmbrix.msg import ModelMsg, ToolMsg, UserMsg, UserMsgFileTypes
 
 
 def create_user_msg(text="hi"):
@@ -91,3 +94,102 @@ def test_multiple_model_responses_in_turn():
 
     assert history.count_conversation_turns() == 1
     assert len(history) == 3
+
+
+def test_attachment_aging_replaces_old_attachments():
+    history = ChatHistory(max_turns=5, attachment_aging=AttachmentAgingPolicy(max_age_turns=2, archive_originals=True))
+    original = UserMsg(text="look", files=[(b"x" * 2048, UserMsgFileTypes.PDF)])
+    history.insert_batch([original, create_model_msg(), create_user_msg("U2")])
+    assert history.get()[0].parts[0].inline_data.data == b"x" * 2048
+
+    history.insert(create_user_msg("U3"))
+    assert history.wait_for_aging(timeout=5)
+    aged = history.get()[0]
+    assert aged.parts[0].text == "[Attachment omitted: application/pdf, 2 KB]"
+    assert aged.parts[1].text == "look"
+    assert original.parts[0].inline_data is not None
+    assert history.archived_attachments()[0].tobytes() == b"x" * 2048
+
+
+def test_attachment_aging_uses_summarizer():
+    policy = AttachmentAgingPolicy(max_age_turns=0, summarizer=lambda part: "a red square")
+    history = ChatHistory(attachment_aging=policy)
+    history.insert(UserMsg(text="hi", gcs_uris=[("gs://bucket/img.png", UserMsgFileTypes.IMAGE_PNG)]))
+    assert history.wait_for_aging(timeout=5)
+    assert history.get()[0].parts[0].text == "[Attachment image/png: a red square]"
+
+
+def test_fork_shares_turns_and_copies_on_write():
+    history = ChatHistory(max_turns=3)
+    history.insert_batch([create_user_msg("U1"), create_model_msg("M1")])
+    fork = history.fork()
+    assert fork._conv_turns is history._conv_turns
+
+    fork.insert(create_model_msg("M1 alternative"))
+    history.insert(create_user_msg("U2"))
+    assert [m.parts[0].text for m in history.get()] == ["U1", "M1", "U2"]
+    assert [m.parts[0].text for m in fork.get()] == ["U1", "M1", "M1 alternative"]
+    assert fork._conv_turns[0].user_msg is history._conv_turns[0].user_msg
+
+    fork.pop()
+    assert len(history) == 3
+
+
+def test_overlapping_turns_ordered_by_begin_turn():
+    history = ChatHistory(max_turns=5)
+    first, second = history.begin_turn(), history.begin_turn()
+    history.insert_batch([create_user_msg("second"), create_model_msg("answer 2")], turn_seq=second)
+    history.insert_batch([create_user_msg("first"), create_model_msg("answer 1")], turn_seq=first)
+    history.insert(create_user_msg("third"))
+    assert [m.parts[0].text for m in history.get()] == ["first", "answer 1", "second", "answer 2", "third"]
+
+
+def test_concurrent_writers_publish_whole_turns():
+    history = ChatHistory(max_turns=1000)
+
+    def write(worker):
+        for i in range(50):
+            history.insert_batch([create_user_msg(f"{worker}-{i}"), create_model_msg(), create_tool_msg()])
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        assert len(history.get()) % 3 == 0
+    for t in threads:
+        t.join()
+    assert history.count_conversation_turns() == 200
+    assert all(len(turn) == 3 for turn in history._conv_turns)
+
+
+def test_followups_attached_to_turn_by_seq():
+    history = ChatHistory(max_turns=2)
+    first = history.begin_turn()
+    history.insert(create_user_msg("first"), turn_seq=first)
+    history.insert(create_user_msg("second"))
+    history.insert_batch([create_model_msg("answer 1")], turn_seq=first)
+    assert [len(turn) for turn in history._conv_turns] == [2, 1]
+    history.insert(create_user_msg("third"))
+    history.insert(create_model_msg("late answer 1"), turn_seq=first)
+    assert history.count_messages() == 2
+    with pytest.raises(ValueError):
+        history.insert(create_model_msg(), turn_seq=history.begin_turn())
+
+
+def test_attachment_aging_runs_off_insert_path():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_summarizer(part):
+        started.set()
+        release.wait(timeout=5)
+        return "a red square"
+
+    history = ChatHistory(attachment_aging=AttachmentAgingPolicy(max_age_turns=0, summarizer=slow_summarizer))
+    history.insert(UserMsg(text="hi", gcs_uris=[("gs://bucket/img.png", UserMsgFileTypes.IMAGE_PNG)]))
+    assert started.wait(timeout=5)
+    history.insert(create_model_msg())
+    assert history.get()[0].parts[0].file_data is not None
+    release.set()
+    assert history.wait_for_aging(timeout=5)
+    assert history.get()[0].parts[0].text == "[Attachment image/png: a red square]"
+    assert len(history) == 2
@@ -0,0 +1,107 @@
+import sqlite3
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from google.genai import types
+
+from llmbrix.chat_history import ChatHistory
+from llmbrix.chat_session_store import ChatSessionStore
+from llmbrix.history_compactor import HistoryCompactor
+from llmbrix.msg import ModelMsg, ToolMsg, UserMsg, UserMsgFileTypes
+
+
+def fill(history, text):
+    history.insert(UserMsg(text=text, files=[(b"x" * 1000, UserMsgFileTypes.PDF)]))
+    history.insert(ModelMsg.from_text(f"re: {text}"))
+
+
+def test_sessions_are_spilled_and_reloaded(tmp_path):
+    store = ChatSessionStore(str(tmp_path / "sessions.db"), max_bytes=2000)
+    for session_id in ("a", "b", "c"):
+        with store.session(session_id) as history:
+            fill(history, session_id)
+    stats = store.stats()
+    assert stats["n_created"] == 3
+    assert stats["n_spills"] >= 1
+    assert stats["resident_bytes"] <= 2000
+
+    with store.session("a") as history:
+        messages = history.get()
+    assert messages[0].parts[0].inline_data.data == b"x" * 1000
+    assert messages[0].parts[1].text == "a"
+    assert messages[1].text == "re: a"
+    assert store.stats()["n_loads"] == 1
+
+
+def test_flush_and_persistence_across_stores(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = ChatSessionStore(path)
+    with store.session("a") as history:
+        fill(history, "a")
+    with store.session("a"):
+        pass
+    assert store.stats()["n_hits"] == 1
+    store.flush()
+    assert store.stats()["n_resident"] == 0
+
+    with ChatSessionStore(path).session("a") as history:
+        assert len(history) == 2
+
+
+def test_tool_messages_and_summary_roundtrip():
+    store = ChatSessionStore(":memory:", history_factory=lambda: ChatHistory(compactor=HistoryCompactor(MagicMock())))
+    with store.session("a") as history:
+        history.compactor.restore("user is Bob")
+        history.insert(UserMsg(text="weather?"))
+        history.insert(ToolMsg(tool_call=types.FunctionCall(name="weather", args={}), result={"temp": 20}))
+    store.flush()
+    with store.session("a") as history:
+        assert history.compactor.summary == "user is Bob"
+        tool_msg = history.get()[2]
+        assert isinstance(tool_msg, ToolMsg)
+        assert tool_msg.parts[0].function_response.response == {"temp": 20}
+
+
+def test_concurrent_access_to_session_is_serialized():
+    store = ChatSessionStore(":memory:", max_bytes=0)
+
+    def worker(i):
+        with store.session("shared") as history:
+            history.insert(UserMsg(text=str(i)))
+            history.insert(ModelMsg.from_text(str(i)))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with store.session("shared") as history:
+        messages = history.get()
+    assert [m.parts[0].text for m in messages[::2]] == [m.parts[0].text for m in messages[1::2]]
+
+
+def test_session_locks_are_dropped_on_spill_and_delete():
+    store = ChatSessionStore(":memory:", max_bytes=0)
+    for session_id in ("a", "b", "c"):
+        with store.session(session_id) as history:
+            fill(history, session_id)
+    assert store._session_locks == {}
+    store.max_bytes = 10**9
+    with store.session("a"):
+        pass
+    assert list(store._session_locks) == ["a"]
+    store.delete("a")
+    assert store._session_locks == {}
+    with store.session("a") as history:
+        assert len(history) == 0
+
+
+def test_newer_schema_version_is_rejected(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA user_version = 99")
+    db.commit()
+    db.close()
+    with pytest.raises(ValueError):
+        ChatSessionStore(path)
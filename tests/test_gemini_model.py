@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from google.genai import types
+from pydantic import BaseModel
+
+from llmbrix.gemini_model import GeminiModel
+from llmbrix.msg import ModelMsg, UserMsg
+from llmbrix.serving import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RequestCoalescer,
+    RequestHedger,
+    RequestPriority,
+)
+from llmbrix.structured_output import SchemaCache
+from llmbrix.thinking import AdaptiveThinkingPolicy
+
+
+def make_response(text="hello", prompt_tokens=10):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=prompt_tokens),
+    )
+
+
+@pytest.fixture
+def gemini_client_mock():
+    client = MagicMock()
+    client.models.generate_content.return_value = make_response()
+    return client
+
+
+def test_generate_returns_model_msg(gemini_client_mock):
+    model = GeminiModel(gemini_client=gemini_client_mock)
+    msg = model.generate([UserMsg(text="hi")])
+    assert msg.text == "hello"
+    assert gemini_client_mock.models.generate_content.call_count == 1
+
+
+def test_generate_empty_response(gemini_client_mock):
+    gemini_client_mock.models.generate_content.return_value = types.GenerateContentResponse(candidates=[])
+    model = GeminiModel(gemini_client=gemini_client_mock)
+    assert model.generate([UserMsg(text="hi")]).parts == []
+
+
+def test_generate_goes_through_request_scheduler(gemini_client_mock):
+    scheduler = MagicMock()
+    model = GeminiModel(gemini_client=gemini_client_mock, request_scheduler=scheduler)
+    model.generate([UserMsg(text="a" * 40)], priority=RequestPriority.BATCH)
+    scheduler.acquire.assert_called_once_with(10, priority=RequestPriority.BATCH)
+    scheduler.record_usage.assert_called_once_with(10, 10)
+
+
+def test_generate_goes_through_request_hedger(gemini_client_mock):
+    hedger = RequestHedger()
+    model = GeminiModel(gemini_client=gemini_client_mock, request_hedger=hedger)
+    assert model.generate([UserMsg(text="hi")]).text == "hello"
+    assert hedger.n_requests == 1
+    assert len(hedger.latency_histogram) == 1
+
+
+def test_generate_async(gemini_client_mock):
+    gemini_client_mock.aio.models.generate_content = AsyncMock(return_value=make_response("async hello"))
+    model = GeminiModel(gemini_client=gemini_client_mock)
+    msg = asyncio.run(model.generate_async([UserMsg(text="hi")]))
+    assert msg.text == "async hello"
+
+
+def test_generate_coalesces_identical_requests(gemini_client_mock):
+    def slow_response(**kwargs):
+        time.sleep(0.1)
+        return make_response()
+
+    gemini_client_mock.models.generate_content.side_effect = slow_response
+    model = GeminiModel(gemini_client=gemini_client_mock, request_coalescer=RequestCoalescer())
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(model.generate([UserMsg(text="canned")]))) for _ in range(3)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [m.text for m in results] == ["hello"] * 3
+    assert gemini_client_mock.models.generate_content.call_count == 1
+
+
+def test_models_without_client_share_connection_pool(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    assert GeminiModel().gemini_client is GeminiModel(model="gemini-2.5-flash").gemini_client
+    assert GeminiModel.from_gemini_api_key("test-key").gemini_client is GeminiModel().gemini_client
+
+
+def test_warmup(gemini_client_mock):
+    model = GeminiModel(gemini_client=gemini_client_mock)
+    model.warmup(connections=3)
+    assert gemini_client_mock.models.get.call_count == 3
+    gemini_client_mock.models.get.assert_called_with(model=model.model)
+    gemini_client_mock.aio.models.get = AsyncMock()
+    asyncio.run(model.warmup_async(connections=2))
+    assert gemini_client_mock.aio.models.get.await_count == 2
+
+
+def test_circuit_breaker_fails_fast(gemini_client_mock):
+    gemini_client_mock.models.generate_content.side_effect = ConnectionError("backend down")
+    model = GeminiModel(gemini_client=gemini_client_mock, circuit_breaker=CircuitBreaker(window=2, min_calls=2))
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            model.generate([UserMsg(text="hi")])
+    with pytest.raises(CircuitOpenError):
+        model.generate([UserMsg(text="hi")])
+    assert gemini_client_mock.models.generate_content.call_count == 2
+
+
+def test_circuit_breaker_fallback_msg(gemini_client_mock):
+    gemini_client_mock.models.generate_content.side_effect = ConnectionError("backend down")
+    fallback = ModelMsg.from_text("We are experiencing issues, try again later.")
+    breaker = CircuitBreaker(window=1, min_calls=1, fallback_msg=fallback)
+    model = GeminiModel(gemini_client=gemini_client_mock, circuit_breaker=breaker)
+    with pytest.raises(ConnectionError):
+        model.generate([UserMsg(text="hi")])
+    assert model.generate([UserMsg(text="hi")]).text == fallback.text
+    assert asyncio.run(model.generate_async([UserMsg(text="hi")])).text == fallback.text
+
+
+def test_thinking_policy_applied_and_observed(gemini_client_mock):
+    policy = AdaptiveThinkingPolicy(epsilon=0.0, answer_tokens=1000, learning_rate=1.0, quality_fn=lambda r: 1.0)
+    model = GeminiModel(gemini_client=gemini_client_mock, thinking_policy=policy)
+    model.generate([UserMsg(text="hi")])
+    config = gemini_client_mock.models.generate_content.call_args.kwargs["config"]
+    assert config.thinking_config.thinking_budget == 0
+    assert config.max_output_tokens == 1000
+    assert policy.rewards()[0][0] > 0.9
+
+
+def test_thinking_policy_budget_replaces_constructor_level(gemini_client_mock):
+    policy = AdaptiveThinkingPolicy(epsilon=0.0)
+    model = GeminiModel(
+        gemini_client=gemini_client_mock, thinking_level=types.ThinkingLevel.HIGH, thinking_policy=policy
+    )
+    model.generate([UserMsg(text="hi")])
+    config = gemini_client_mock.models.generate_content.call_args.kwargs["config"]
+    assert config.thinking_config.thinking_budget == 0
+    assert config.thinking_config.thinking_level is None
+
+
+def test_explicit_thinking_config_bypasses_policy(gemini_client_mock):
+    policy = AdaptiveThinkingPolicy(epsilon=0.0)
+    model = GeminiModel(gemini_client=gemini_client_mock, thinking_policy=policy)
+    model.generate([UserMsg(text="hi")], thinking_config=types.ThinkingConfig(thinking_budget=77))
+    config = gemini_client_mock.models.generate_content.call_args.kwargs["config"]
+    assert config.thinking_config.thinking_budget == 77
+
+
+def test_generate_with_schema_cache(gemini_client_mock):
+    class Answer(BaseModel):
+        value: int
+
+    gemini_client_mock.models.generate_content.return_value = make_response('{"value": 42}')
+    model = GeminiModel(gemini_client=gemini_client_mock, schema_cache=SchemaCache())
+    msg = model.generate([UserMsg(text="hi")], response_schema=Answer)
+    assert msg.parsed == Answer(value=42)
+    config = gemini_client_mock.models.generate_content.call_args.kwargs["config"]
+    assert config.response_schema is None
+    assert config.response_json_schema == Answer.model_json_schema()
+
+
+def test_cancelled_request_releases_circuit_breaker_probe(gemini_client_mock):
+    breaker = CircuitBreaker(window=1, min_calls=1, open_duration=0.0, probe_requests=1)
+    breaker.record_error(ConnectionError("down"), latency=0.01)
+    gemini_client_mock.aio.models.generate_content = AsyncMock(side_effect=asyncio.CancelledError())
+    model = GeminiModel(gemini_client=gemini_client_mock, circuit_breaker=breaker)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(model.generate_async([UserMsg(text="hi")]))
+    gemini_client_mock.aio.models.generate_content = AsyncMock(return_value=make_response())
+    assert asyncio.run(model.generate_async([UserMsg(text="hi")])).text == "hello"
+
+
+def test_expiring_attachments_refreshed_before_request(gemini_client_mock):
+    manager = MagicMock()
+    manager.needs_refresh.return_value = True
+    model = GeminiModel(gemini_client=gemini_client_mock, attachment_manager=manager)
+    messages = [UserMsg(text="hi")]
+    model.generate(messages)
+    manager.refresh.assert_called_once_with(messages)
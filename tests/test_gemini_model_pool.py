@@ -0,0 +1,110 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from google.genai import errors, types
+
+from llmbrix.gemini_model_pool import GeminiModelPool
+from llmbrix.msg import UserMsg
+
+
+def make_response(text="hello"):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+def make_client(text="hello"):
+    client = MagicMock()
+    client.models.generate_content.return_value = make_response(text)
+    return client
+
+
+QUOTA_ERROR = errors.ClientError(429, {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+BAD_REQUEST = errors.ClientError(400, {"error": {"code": 400, "message": "bad", "status": "INVALID_ARGUMENT"}})
+
+
+def test_requires_clients():
+    with pytest.raises(ValueError):
+        GeminiModelPool(gemini_clients=[])
+
+
+def test_requests_spread_across_clients():
+    clients = [make_client("a"), make_client("b")]
+    pool = GeminiModelPool(gemini_clients=clients)
+    texts = [pool.generate([UserMsg(text="hi")]).text for _ in range(4)]
+    assert sorted(texts) == ["a", "a", "b", "b"]
+    assert [s["n_requests"] for s in pool.stats()] == [2, 2]
+    assert all(s["in_flight"] == 0 for s in pool.stats())
+
+
+def test_quota_error_ejects_client_and_fails_over():
+    failing, healthy = make_client(), make_client("ok")
+    failing.models.generate_content.side_effect = QUOTA_ERROR
+    pool = GeminiModelPool(gemini_clients=[failing, healthy], ejection_time=60)
+    assert pool.generate([UserMsg(text="hi")]).text == "ok"
+    assert pool.generate([UserMsg(text="hi")]).text == "ok"
+    assert failing.models.generate_content.call_count == 1
+    stats = pool.stats()
+    assert stats[0]["healthy"] is False
+    assert stats[0]["n_ejections"] == 1
+    assert stats[1]["n_requests"] == 2
+
+
+def test_client_error_is_not_retried():
+    failing, healthy = make_client(), make_client()
+    failing.models.generate_content.side_effect = BAD_REQUEST
+    pool = GeminiModelPool(gemini_clients=[failing, healthy])
+    with pytest.raises(errors.ClientError):
+        pool.generate([UserMsg(text="hi")])
+    assert healthy.models.generate_content.call_count == 0
+    assert pool.stats()[0]["healthy"] is True
+
+
+def test_all_clients_failing_raises():
+    clients = [make_client(), make_client()]
+    for c in clients:
+        c.models.generate_content.side_effect = QUOTA_ERROR
+    pool = GeminiModelPool(gemini_clients=clients)
+    with pytest.raises(errors.ClientError):
+        pool.generate([UserMsg(text="hi")])
+    # all clients ejected => pool is still usable, client ejected earliest is used as last resort
+    clients[0].models.generate_content.side_effect = None
+    assert pool.generate([UserMsg(text="hi")]).text == "hello"
+
+
+def test_async_failover():
+    failing, healthy = make_client(), make_client()
+    failing.aio.models.generate_content = AsyncMock(side_effect=QUOTA_ERROR)
+    healthy.aio.models.generate_content = AsyncMock(return_value=make_response("async ok"))
+    pool = GeminiModelPool(gemini_clients=[failing, healthy])
+    assert asyncio.run(pool.generate_async([UserMsg(text="hi")])).text == "async ok"
+
+
+def test_cancelled_request_releases_client():
+    client = make_client()
+    started = asyncio.Event()
+
+    async def hang(**kwargs):
+        started.set()
+        await asyncio.sleep(10)
+
+    client.aio.models.generate_content = AsyncMock(side_effect=hang)
+    pool = GeminiModelPool(gemini_clients=[client])
+
+    async def run():
+        task = asyncio.create_task(pool.generate_async([UserMsg(text="hi")]))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert pool.stats()[0]["in_flight"] == 0
+
+
+def test_warmup_all_clients():
+    clients = [make_client(), make_client()]
+    pool = GeminiModelPool(gemini_clients=clients)
+    pool.warmup(connections=2)
+    assert all(c.models.get.call_count == 2 for c in clients)
@@ -0,0 +1,123 @@
+import re
+import threading
+from unittest.mock import MagicMock
+
+from google.genai import types
+
+from llmbrix.chat_history import ChatHistory
+from llmbrix.history_compactor import SUMMARY_PREFIX, HistoryCompactor
+from llmbrix.msg import ModelMsg, ToolMsg, UserMsg
+
+
+def make_model():
+    model = MagicMock()
+    model.generate.side_effect = lambda messages, **kwargs: ModelMsg.from_text(f"summary #{model.generate.call_count}")
+    return model
+
+
+def test_evicted_turns_are_summarized():
+    model = make_model()
+    compactor = HistoryCompactor(model)
+    history = ChatHistory(max_turns=2, compactor=compactor)
+    history.insert_batch([UserMsg(text="my name is Bob"), ModelMsg.from_text("hi Bob"), UserMsg(text="U2")])
+    assert history.get()[0].parts[0].text == "my name is Bob"
+
+    history.insert(UserMsg(text="U3"))
+    assert compactor.wait(timeout=5)
+    messages = history.get()
+    assert messages[0].parts[0].text == SUMMARY_PREFIX + "summary #1"
+    assert messages[1].parts[0].text == "U2"
+    assert len(history.get(n=1)) == 1
+    prompt = model.generate.call_args.args[0][0].parts[0].text
+    assert "USER: my name is Bob" in prompt and "ASSISTANT: hi Bob" in prompt
+
+
+def test_summary_is_rolled_forward():
+    model = make_model()
+    compactor = HistoryCompactor(model)
+    call = types.FunctionCall(name="get_weather", args={})
+    compactor.submit([UserMsg(text="a"), ToolMsg(tool_call=call, result={"temp": 20})])
+    compactor.wait(timeout=5)
+    compactor.submit([UserMsg(text="b")])
+    compactor.wait(timeout=5)
+    assert compactor.summary == "summary #2"
+    assert "summary #1" in model.generate.call_args.args[0][0].parts[0].text
+
+
+def test_failed_summarization_is_retried_with_backoff():
+    model = make_model()
+    compactor = HistoryCompactor(model, retry_backoff=0.01)
+    compactor.submit([UserMsg(text="a")])
+    compactor.wait(timeout=5)
+    model.generate.side_effect = [RuntimeError("boom"), RuntimeError("boom"), ModelMsg.from_text("summary #4")]
+    compactor.submit([UserMsg(text="b")])
+    assert compactor.wait(timeout=5)
+    assert compactor.summary == "summary #4"
+    assert compactor.unsummarized_messages() == []
+    assert model.generate.call_count == 4
+    assert "summary #1" in model.generate.call_args.args[0][0].parts[0].text
+
+
+def test_persistently_failing_summarization_drops_messages():
+    model = make_model()
+    compactor = HistoryCompactor(model, max_retries=2, retry_backoff=0)
+    compactor.submit([UserMsg(text="a")])
+    compactor.wait(timeout=5)
+    model.generate.side_effect = RuntimeError("boom")
+    compactor.submit([UserMsg(text="b"), UserMsg(text="c")])
+    assert compactor.wait(timeout=5)
+    assert model.generate.call_count == 4
+    assert compactor.summary == "summary #1"
+    assert compactor.unsummarized_messages() == []
+    assert compactor.n_dropped == 2
+
+
+def test_unsummarized_messages_are_capped():
+    compactor = HistoryCompactor(make_model(), executor=MagicMock(), max_unsummarized_messages=3)
+    compactor.submit([UserMsg(text=f"U{i}") for i in range(4)])
+    compactor.submit([UserMsg(text="U4")])
+    assert [m.parts[0].text for m in compactor.unsummarized_messages()] == ["U2", "U3", "U4"]
+    assert compactor.n_dropped == 2
+
+
+def test_evicted_messages_stay_in_history_until_summarized():
+    model = MagicMock()
+    model.generate.side_effect = RuntimeError("boom")
+    history = ChatHistory(max_turns=1, compactor=HistoryCompactor(model, retry_backoff=60))
+    history.insert_batch([UserMsg(text="U1"), ModelMsg.from_text("A1"), UserMsg(text="U2")])
+    assert not history.compactor.wait(timeout=0.5)  # retry is scheduled
+    assert model.generate.call_count == 1
+    assert [m.parts[0].text for m in history.get()] == ["U1", "A1", "U2"]
+    assert len(history.get(n=1)) == 1
+
+
+def test_history_snapshot_is_consistent_with_compactor():
+    def summarize(messages, **kwargs):
+        prompt = messages[0].parts[0].text
+        return ModelMsg.from_text(str(max(int(i) for i in re.findall(r"USER: U(\d+)", prompt))))
+
+    model = MagicMock()
+    model.generate.side_effect = summarize
+    history = ChatHistory(max_turns=1, compactor=HistoryCompactor(model, max_unsummarized_messages=200))
+    done = threading.Event()
+    violations = []
+
+    def reader():
+        while not done.is_set():
+            messages = history.get()
+            covered = -1
+            if messages and messages[0].parts[0].text.startswith(SUMMARY_PREFIX):
+                covered = int(messages.pop(0).parts[0].text[len(SUMMARY_PREFIX) :])
+            indices = [int(m.parts[0].text[1:]) for m in messages]
+            if indices != list(range(covered + 1, covered + 1 + len(indices))):
+                violations.append((covered, indices))
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(200):
+        history.insert(UserMsg(text=f"U{i}"))
+    assert history.compactor.wait(timeout=5)
+    done.set()
+    thread.join()
+    assert violations == []
+    assert [m.parts[0].text for m in history.get()] == [SUMMARY_PREFIX + "198", "U199"]
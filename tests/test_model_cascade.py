@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from google.genai import types
+from pydantic import BaseModel
+
+from llmbrix.model_cascade import ModelCascade
+from llmbrix.msg import ModelMsg, UserMsg
+
+
+class Classification(BaseModel):
+    label: str
+    confidence: int
+
+
+def make_model(name, response):
+    model = MagicMock()
+    model.model = name
+    model.generation_config = types.GenerateContentConfig()
+    model.generate.return_value = response
+    model.generate_async = AsyncMock(return_value=response)
+    return model
+
+
+def parsed_msg(confidence):
+    return ModelMsg(parts=[types.Part(text="{}")], parsed=Classification(label="positive", confidence=confidence))
+
+
+def test_requires_models():
+    with pytest.raises(ValueError):
+        ModelCascade(models=[])
+
+
+def test_confident_cheap_model_is_not_escalated():
+    cheap, big = make_model("cheap", ModelMsg.from_text("hi")), make_model("big", ModelMsg.from_text("hello"))
+    cascade = ModelCascade(models=[cheap, big])
+    assert cascade.generate([UserMsg(text="hi")]).text == "hi"
+    assert big.generate.call_count == 0
+    assert cascade.stats()[0]["escalation_rate"] == 0.0
+
+
+def test_empty_response_is_escalated():
+    cheap, big = make_model("cheap", ModelMsg(parts=[])), make_model("big", ModelMsg.from_text("hello"))
+    cascade = ModelCascade(models=[cheap, big])
+    assert cascade.generate([UserMsg(text="hi")]).text == "hello"
+    stats = cascade.stats()
+    assert stats[0]["escalation_rate"] == 1.0
+    assert stats[1]["n_requests"] == 1
+
+
+def test_missing_structured_output_is_escalated():
+    cheap = make_model("cheap", ModelMsg.from_text("not json"))
+    big = make_model("big", parsed_msg(9))
+    cascade = ModelCascade(models=[cheap, big])
+    msg = cascade.generate([UserMsg(text="hi")], response_schema=Classification)
+    assert msg.parsed.confidence == 9
+    big.generate.assert_called_once()
+    assert big.generate.call_args.kwargs["response_schema"] is Classification
+
+
+def test_low_confidence_is_escalated():
+    cheap, big = make_model("cheap", parsed_msg(3)), make_model("big", parsed_msg(2))
+    cascade = ModelCascade(models=[cheap, big], confidence_field="confidence", min_confidence=7)
+    assert cascade.generate([UserMsg(text="hi")], response_schema=Classification).parsed.confidence == 2
+    assert cascade.escalation_reason(parsed_msg(8), Classification) is None
+
+
+def test_custom_predicate():
+    cascade = ModelCascade(models=[make_model("m", None)], should_escalate=lambda m: "sorry" in m.text)
+    assert cascade.escalation_reason(ModelMsg.from_text("sorry, I can't")) == "custom predicate"
+    assert cascade.escalation_reason(ModelMsg.from_text("sure")) is None
+
+
+def test_confidence_args_validated():
+    with pytest.raises(ValueError):
+        ModelCascade(models=[make_model("m", None)], confidence_field="confidence")
+
+
+def test_generate_async_escalates():
+    cheap, big = make_model("cheap", ModelMsg(parts=[])), make_model("big", ModelMsg.from_text("hello"))
+    cascade = ModelCascade(models=[cheap, big])
+    assert asyncio.run(cascade.generate_async([UserMsg(text="hi")])).text == "hello"
@@ -0,0 +1,97 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from pydantic import BaseModel
+
+from llmbrix.msg import ModelMsg
+from llmbrix.packed_classifier import PackedClassifier
+
+
+class Sentiment(BaseModel):
+    is_positive: bool
+
+
+def make_model(drop_ids=(), max_output_tokens=10000):
+    model = MagicMock()
+    model.generation_config.max_output_tokens = max_output_tokens
+
+    def generate(messages, system_instruction=None, response_schema=None):
+        text = messages[-1].parts[-1].text
+        if response_schema is Sentiment:
+            return ModelMsg.from_text("{}").model_copy(update={"parsed": Sentiment(is_positive="good" in text)})
+        results = [
+            {"item_id": int(i), "is_positive": "good" in content}
+            for i, content in re.findall(r'<item id="(\d+)">\n(.*?)\n</item>', text)
+            if int(i) not in drop_ids
+        ]
+        return ModelMsg.from_text(json.dumps({"results": results}))
+
+    model.generate.side_effect = generate
+    return model
+
+
+def test_items_are_packed_into_one_request():
+    model = make_model()
+    classifier = PackedClassifier(model, Sentiment)
+    results = classifier.classify(["good movie", "bad movie", "good actors"])
+    assert [r.is_positive for r in results] == [True, False, True]
+    assert model.generate.call_count == 1
+
+
+def test_missing_items_are_retried_individually_and_pack_size_shrinks():
+    model = make_model(drop_ids={1})
+    classifier = PackedClassifier(model, Sentiment, max_items_per_request=4)
+    results = classifier.classify(["good", "bad", "good", "bad", "good"])
+    assert [r.is_positive for r in results] == [True, False, True, False, True]
+    assert classifier.n_retries == 1
+    assert classifier.items_per_request == 2
+
+
+def test_results_parsed_by_model_are_used():
+    model = make_model()
+    classifier = PackedClassifier(model, Sentiment)
+    parsed = classifier.pack_schema(
+        results=[
+            classifier.item_schema(item_id=1, is_positive=False),
+            classifier.item_schema(item_id=0, is_positive=True),
+        ]
+    )
+    model.generate.side_effect = lambda *args, **kwargs: ModelMsg.from_text("not json").model_copy(
+        update={"parsed": parsed}
+    )
+    results = classifier.classify(["a", "b"])
+    assert [type(r) for r in results] == [Sentiment, Sentiment]
+    assert [r.is_positive for r in results] == [True, False]
+    assert model.generate.call_count == 1
+
+
+def test_malformed_response_retries_all_items():
+    model = make_model()
+    model.generate.side_effect = lambda messages, system_instruction=None, response_schema=None: (
+        ModelMsg.from_text("not json")
+        if response_schema is not Sentiment
+        else ModelMsg.from_text("{}").model_copy(update={"parsed": Sentiment(is_positive=True)})
+    )
+    results = PackedClassifier(model, Sentiment).classify(["a", "b"])
+    assert all(r.is_positive for r in results)
+    assert model.generate.call_count == 3
+
+
+def test_pack_size_limited_by_token_budgets():
+    classifier = PackedClassifier(make_model(max_output_tokens=600), Sentiment, output_tokens_per_item=200)
+    assert classifier.max_items_per_request == 3
+    classifier = PackedClassifier(make_model(), Sentiment, max_input_tokens=10)
+    assert classifier._next_pack(["x" * 20, "x" * 20, "x" * 20], 0, 3) == [0, 1]
+
+
+def test_concurrent_classify_calls_share_pack_size():
+    model = make_model(drop_ids={1})
+    classifier = PackedClassifier(model, Sentiment, max_items_per_request=4)
+    items = ["good", "bad", "good", "bad"] * 5
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outputs = list(executor.map(classifier.classify, [items] * 8))
+    assert all([r.is_positive for r in results] == [i == "good" for i in items] for results in outputs)
+    assert 1 <= classifier.items_per_request <= 4
+    assert classifier.n_requests + classifier.n_retries == model.generate.call_count
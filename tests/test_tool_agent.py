@@ -4,6 +4,7 @@ import PIL.Image
 import pytest
 from google.genai import types
 
+from llmbrix.chat_history import ChatHistory
 from llmbrix.msg import ModelMsg, ToolMsg, UserMsg
 from llmbrix.tool_agent import ToolAgent
 
@@ -105,3 +106,13 @@ def test_chat_returns_final_model_msg(gemini_model_mock):
 
     result = agent.chat("Hello")
     assert result == expected_msg
+
+
+def test_first_turn_reserves_turn_seq(gemini_model_mock):
+    history = ChatHistory()
+    gemini_model_mock.generate.return_value = ModelMsg.from_text("hi")
+    agent = ToolAgent(gemini_model=gemini_model_mock, system_instruction="test", chat_history=history)
+    with patch.object(history, "begin_turn", wraps=history.begin_turn) as begin_turn:
+        agent.chat("hello")
+    begin_turn.assert_called_once()
+    assert len(history) == 2
@@ -0,0 +1,59 @@
+from google.genai import types
+
+from llmbrix.msg import ModelMsg, UserMsg
+from llmbrix.thinking import AdaptiveThinkingPolicy, RequestFeatures, ThinkingDecision
+
+
+def make_features(estimated_tokens=10, n_attachments=0, has_tools=False):
+    return RequestFeatures(
+        n_messages=1,
+        n_attachments=n_attachments,
+        estimated_tokens=estimated_tokens,
+        has_tools=has_tools,
+        has_response_schema=False,
+    )
+
+
+def test_features_from_request():
+    messages = [UserMsg(text="a" * 400), ModelMsg.from_text("ok")]
+    config = types.GenerateContentConfig(system_instruction="be brief")
+    features = RequestFeatures.from_request(messages, config)
+    assert features.n_messages == 2
+    assert features.n_attachments == 0
+    assert features.estimated_tokens > 100
+    assert features.has_tools is False
+
+
+def test_initial_decisions_follow_complexity():
+    policy = AdaptiveThinkingPolicy(epsilon=0.0)
+    assert policy.decide(make_features()).thinking_budget == 0
+    assert policy.decide(make_features(n_attachments=1)).thinking_budget == 1024
+    assert policy.decide(make_features(estimated_tokens=100_000)).thinking_budget == 4096
+
+
+def test_max_output_tokens_include_thinking_budget():
+    policy = AdaptiveThinkingPolicy(epsilon=0.0, answer_tokens=500)
+    assert policy.decide(make_features(n_attachments=1)).max_output_tokens == 1524
+    assert AdaptiveThinkingPolicy(epsilon=0.0).decide(make_features()).max_output_tokens is None
+
+
+def test_bad_quality_moves_policy_to_other_arm():
+    policy = AdaptiveThinkingPolicy(epsilon=0.0, learning_rate=1.0, quality_fn=lambda r: 1.0 if r.text else 0.0)
+    features = make_features()
+    decision = policy.decide(features)
+    policy.observe(features, decision, latency=0.5, response=ModelMsg(parts=[]))
+    assert policy.decide(features).thinking_budget != decision.thinking_budget
+
+
+def test_policy_without_quality_fn_does_not_learn_from_latency():
+    policy = AdaptiveThinkingPolicy(epsilon=0.0, learning_rate=1.0)
+    features = make_features(estimated_tokens=100_000)
+    decision = policy.decide(features)
+    policy.observe(features, decision, latency=60.0, response=ModelMsg.from_text("slow but good"))
+    assert policy.decide(features).thinking_budget == 4096
+
+
+def test_custom_classifier_and_arms():
+    arms = [ThinkingDecision(thinking_level=types.ThinkingLevel.LOW), ThinkingDecision(thinking_level="HIGH")]
+    policy = AdaptiveThinkingPolicy(arms=arms, classifier=lambda f: 5, epsilon=0.0)
+    assert policy.decide(make_features()).thinking_level == "HIGH"
@@ -0,0 +1,46 @@
+import pytest
+
+from llmbrix.tool_calling import ToolArgsValidator, ToolParam, ToolParamTypes
+
+
+@pytest.fixture
+def validator():
+    return ToolArgsValidator(
+        tool_name="search",
+        params=[
+            ToolParam(name="query", description="Search query.", type=ToolParamTypes.STRING),
+            ToolParam(name="limit", description="Max results.", type=ToolParamTypes.INTEGER),
+            ToolParam(
+                name="tags",
+                description="Tags.",
+                type=ToolParamTypes.ARRAY,
+                items_type=ToolParamTypes.STRING,
+                required=False,
+            ),
+        ],
+    )
+
+
+def test_valid_args_coerced(validator):
+    assert validator.validate({"query": "llm", "limit": 10.0}) == {"query": "llm", "limit": 10}
+    assert validator.validate({"query": "llm", "limit": "5", "tags": ["a"]}) == {
+        "query": "llm",
+        "limit": 5,
+        "tags": ["a"],
+    }
+
+
+def test_all_problems_reported(validator):
+    with pytest.raises(ValueError) as ex:
+        validator.validate({"limit": 2.5, "tags": [1], "sort": "date"})
+    message = str(ex.value)
+    assert message.startswith('Invalid arguments for tool "search"')
+    assert 'missing required argument "query"' in message
+    assert 'argument "limit"' in message
+    assert 'argument "tags.0"' in message
+    assert 'unknown argument "sort"' in message
+
+
+def test_no_params():
+    validator = ToolArgsValidator(tool_name="now", params=[])
+    assert validator.validate(None) == {}
@@ -0,0 +1,193 @@
+import json
+import threading
+
+from google.genai import types
+
+from llmbrix.artifacts import ArtifactRef, InMemoryArtifactStore
+from llmbrix.tool_calling import (
+    BaseTool,
+    LazyDebugTrace,
+    ResultCompactionPolicy,
+    ToolExecutor,
+    ToolOutput,
+    ToolParam,
+    ToolParamTypes,
+)
+
+
+class RowsTool(BaseTool):
+    def __init__(self, name="query_rows"):
+        super().__init__(name=name, description="Returns many rows.")
+
+    def execute(self, **kwargs) -> ToolOutput:
+        return ToolOutput(success=True, result={"rows": [{"id": i, "value": "x" * 20} for i in range(200)]})
+
+
+def call(name, **args):
+    return types.FunctionCall(name=name, args=args)
+
+
+def test_small_result_not_compacted():
+    executor = ToolExecutor(tools=[RowsTool()], result_compaction=ResultCompactionPolicy(max_chars=100_000))
+    [msg] = executor.execute([call("query_rows")])
+    assert len(msg.parts[0].function_response.response["rows"]) == 200
+
+
+def test_large_result_compacted_and_paged():
+    policy = ResultCompactionPolicy(max_chars=1000, preview_chars=100)
+    executor = ToolExecutor(tools=[RowsTool()], result_compaction=policy)
+    [msg] = executor.execute([call("query_rows")])
+    compacted = msg.parts[0].function_response.response
+    assert len(compacted["truncated_result"]) == 100
+    assert "rows" not in compacted
+
+    text, offset = "", 0
+    while offset is not None:
+        [page] = executor.execute([call("read_tool_result", result_handle=compacted["result_handle"], offset=offset)])
+        response = page.parts[0].function_response.response
+        text += response["content"]
+        offset = response["next_offset"]
+    assert len(text) == compacted["total_chars"]
+    assert len(json.loads(text)["rows"]) == 200
+
+
+def test_per_tool_compaction_override():
+    executor = ToolExecutor(
+        tools=[RowsTool(), RowsTool(name="summarized_rows")],
+        result_compaction=ResultCompactionPolicy(max_chars=1000),
+        tool_result_compaction={
+            "query_rows": None,
+            "summarized_rows": ResultCompactionPolicy(max_chars=1000, summarizer=lambda text: "200 rows"),
+        },
+    )
+    results = {
+        m.tool_name: m.parts[0].function_response.response
+        for m in executor.execute([call("query_rows"), call("summarized_rows")])
+    }
+    assert len(results["query_rows"]["rows"]) == 200
+    assert results["summarized_rows"]["summary"] == "200 rows"
+
+
+def test_summarizer_runs_in_worker_and_offset_is_optional():
+    threads = []
+
+    def summarizer(text):
+        threads.append(threading.current_thread())
+        return "200 rows"
+
+    executor = ToolExecutor(
+        tools=[RowsTool()], result_compaction=ResultCompactionPolicy(max_chars=1000, summarizer=summarizer)
+    )
+    [msg] = executor.execute([call("query_rows")])
+    handle = msg.parts[0].function_response.response["result_handle"]
+    assert threads and threads[0] is not threading.current_thread()
+    assert executor.paging_tool.args_validator.validate({"result_handle": handle}) == {"result_handle": handle}
+    [page] = executor.execute([call("read_tool_result", result_handle=handle)])
+    assert page.parts[0].function_response.response["offset"] == 0
+
+
+def test_failing_summarizer_falls_back_to_preview():
+    policy = ResultCompactionPolicy(max_chars=1000, preview_chars=50, summarizer=lambda text: 1 / 0)
+    [msg] = ToolExecutor(tools=[RowsTool()], result_compaction=policy).execute([call("query_rows")])
+    assert len(msg.parts[0].function_response.response["truncated_result"]) == 50
+
+
+def test_unknown_result_handle():
+    executor = ToolExecutor(tools=[RowsTool()], result_compaction=ResultCompactionPolicy())
+    [msg] = executor.execute([call("read_tool_result", result_handle="missing", offset=0)])
+    assert "not available" in msg.parts[0].function_response.response["error"]
+
+
+class PlotTool(BaseTool):
+    def __init__(self):
+        super().__init__(name="plot", description="Draws a plot.")
+
+    def execute(self, **kwargs) -> ToolOutput:
+        return ToolOutput(success=True, result={"status": "plot shown to user"}, artifacts={"png": b"\x89PNG"})
+
+
+def test_artifacts_offloaded_to_store():
+    executor = ToolExecutor(tools=[PlotTool()], artifact_store=InMemoryArtifactStore())
+    [msg] = executor.execute([call("plot")])
+    ref = msg.artifacts["png"]
+    assert isinstance(ref, ArtifactRef)
+    assert ref.get() == b"\x89PNG"
+
+
+class FailingTool(BaseTool):
+    def __init__(self):
+        super().__init__(name="failing", description="Always fails.")
+
+    def execute(self, **kwargs) -> ToolOutput:
+        raise RuntimeError("database unavailable")
+
+
+def test_error_debug_trace_is_lazy():
+    executor = ToolExecutor(tools=[FailingTool()])
+    output = executor._handle_tool_execution_error(call("failing"), RuntimeError("x"))
+    assert isinstance(output.debug_trace, LazyDebugTrace) and not output.debug_trace.is_computed
+    [(_, output)] = list(executor._execute_tool_calls([call("failing")]))
+    assert output.result["details"] == "database unavailable"
+    assert "database unavailable" in output.debug_trace["stack_trace"]
+    assert output.debug_trace["tool_request"]["name"] == "failing"
+
+
+def test_unsampled_error_has_no_stack_trace():
+    executor = ToolExecutor(tools=[FailingTool()], diagnostics_sample_rate=0.0)
+    [(_, output)] = list(executor._execute_tool_calls([call("failing")]))
+    assert output.debug_trace["stack_trace"] is None
+    assert output.debug_trace["exception"] == "RuntimeError: database unavailable"
+
+
+class CountTool(BaseTool):
+    def __init__(self):
+        super().__init__(
+            name="count",
+            description="Counts.",
+            params=[ToolParam(name="n", description="N.", type=ToolParamTypes.INTEGER)],
+        )
+        self._calls = []
+
+    def execute(self, n: int, **kwargs) -> ToolOutput:
+        self._calls.append(n)
+        return ToolOutput(success=True, result={"n": n})
+
+
+def test_invalid_args_rejected_before_execution():
+    tool = CountTool()
+    executor = ToolExecutor(tools=[tool])
+    [msg] = executor.execute([call("count", n="many")])
+    assert 'argument "n"' in msg.parts[0].function_response.response["error"]
+    [msg] = executor.execute([call("count", n=3.0)])
+    assert msg.parts[0].function_response.response == {"n": 3}
+    assert tool._calls == [3]
+
+
+def test_error_output_serialization_roundtrip():
+    executor = ToolExecutor(tools=[FailingTool()])
+    [(_, output)] = list(executor._execute_tool_calls([call("failing")]))
+    assert isinstance(output.model_dump()["debug_trace"], dict)
+    restored = ToolOutput.model_validate_json(output.model_dump_json())
+    assert restored.debug_trace == output.debug_trace.to_dict()
+    assert "database unavailable" in restored.debug_trace["stack_trace"]
+
+
+class UnpicklableArtifactTool(BaseTool):
+    def __init__(self):
+        super().__init__(name="unpicklable", description="Returns artifact which can't be pickled.")
+
+    def execute(self, **kwargs) -> ToolOutput:
+        return ToolOutput(success=True, result={"status": "ok"}, artifacts={"fn": lambda: None, "png": b"\x89PNG"})
+
+
+def test_artifact_offload_failure_keeps_tool_success():
+    executor = ToolExecutor(tools=[UnpicklableArtifactTool()], artifact_store=InMemoryArtifactStore())
+    [(_, output)] = list(executor._execute_tool_calls([call("unpicklable")]))
+    assert output.success and callable(output.artifacts["fn"])
+    msg = output.to_tool_msg(call("unpicklable"))
+    assert list(msg.artifacts) == ["png"]
+
+
+def test_raw_artifacts_not_attached_without_store():
+    [msg] = ToolExecutor(tools=[PlotTool()]).execute([call("plot")])
+    assert msg.artifacts is None